@@ -0,0 +1,77 @@
+import type { VercelRequest } from '@vercel/node';
+import { gunzipSync } from 'zlib';
+
+// Largest request body read, and largest a gzip body may decompress to
+export const MAX_BODY_BYTES = 4 * 1024 * 1024;
+
+// A request body that cannot be read, answered with status and { error: message }
+export class BodyError extends Error {
+  status: number;
+
+  constructor(status: number, message: string) {
+    super(message);
+    this.status = status;
+  }
+}
+
+// The body as the Vercel body parser left it. Its lazy req.body throws on
+// invalid JSON, e.g. a gzip body labelled application/json.
+function parsedBody(req: VercelRequest): VercelRequest['body'] {
+  try {
+    return req.body;
+  } catch {
+    throw new BodyError(400, 'Could not decode the request body');
+  }
+}
+
+async function readRawBody(req: VercelRequest): Promise<Buffer> {
+  const body = parsedBody(req);
+  if (Buffer.isBuffer(body)) return body;
+  if (typeof body === 'string') return Buffer.from(body);
+
+  // Without the Vercel body parser (or for content types it does not parse)
+  // the body is still in the stream
+  const chunks: Buffer[] = [];
+  let size = 0;
+  for await (const chunk of req) {
+    const buffer = typeof chunk === 'string' ? Buffer.from(chunk) : chunk;
+    size += buffer.length;
+    if (size > MAX_BODY_BYTES) {
+      throw new BodyError(413, 'Request body too large');
+    }
+    chunks.push(buffer);
+  }
+  return Buffer.concat(chunks);
+}
+
+// merge_and_upload.py sends gzip-encoded JSON as application/octet-stream,
+// which the Vercel body parser hands over as raw bytes. Those bodies are
+// decompressed here, to at most MAX_BODY_BYTES. Throws BodyError.
+export async function readJsonBody(req: VercelRequest): Promise<VercelRequest['body']> {
+  const encoding = req.headers['content-encoding'];
+  if (!encoding || encoding === 'identity') {
+    return parsedBody(req);
+  }
+  if (encoding !== 'gzip') {
+    throw new BodyError(415, 'Unsupported Content-Encoding');
+  }
+
+  const raw = await readRawBody(req);
+  if (raw.length > MAX_BODY_BYTES) {
+    throw new BodyError(413, 'Request body too large');
+  }
+  let data: Buffer;
+  try {
+    data = gunzipSync(raw, { maxOutputLength: MAX_BODY_BYTES });
+  } catch (error) {
+    if (error instanceof RangeError) {
+      throw new BodyError(413, 'Request body too large');
+    }
+    throw new BodyError(400, 'Could not decode the request body');
+  }
+  try {
+    return JSON.parse(data.toString('utf8'));
+  } catch {
+    throw new BodyError(400, 'Invalid JSON');
+  }
+}
@@ -0,0 +1,102 @@
+// Percentiles for the in-memory fallback store, from one log-scale histogram
+// per metric that is updated on every insert and eviction. Each histogram is
+// a Fenwick tree over fixed buckets, so a submission costs O(log buckets)
+// instead of sorting every stored value.
+//
+// This is only used when Supabase is not configured (local development and
+// previews). In production, percentiles come from the compute_percentiles RPC
+// in the database, which is defined outside this repository and is unchanged.
+//
+// Buckets are DDSketch-style: a value v >= MIN_VALUE lands in bucket
+// ceil(log(v / MIN_VALUE) / log(GAMMA)) + 2, so every bucket spans about 2% of
+// its value. Percentiles match the sort-based computation except that stored
+// values sharing the submitted value's bucket count as ties: a value is only
+// ranked above another when it is at least 2% larger. Integers up to 50 each
+// get a bucket of their own. Zero (and anything not positive) has the first
+// bucket, other values below MIN_VALUE the second, and values above
+// MAX_VALUE share the last.
+
+const RELATIVE_ACCURACY = 0.01;
+const GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY);
+const LOG_GAMMA = Math.log(GAMMA);
+const MIN_VALUE = 1e-6;
+const MAX_VALUE = 1e13;
+const BUCKETS = Math.ceil(Math.log(MAX_VALUE / MIN_VALUE) / LOG_GAMMA) + 3;
+
+export interface SubmissionMetrics {
+  totalSessions: number;
+  totalTokens: number;
+  toolCount: number;
+  longestSession: number;
+  nightCoding: number;
+  cacheRate: number;
+}
+
+type MetricName = keyof SubmissionMetrics;
+
+const METRICS: MetricName[] = [
+  'totalSessions',
+  'totalTokens',
+  'toolCount',
+  'longestSession',
+  'nightCoding',
+  'cacheRate',
+];
+
+export interface MetricStore {
+  capacity: number;
+  // Ring buffer of the stored submissions, so the oldest can be evicted
+  entries: SubmissionMetrics[];
+  next: number;
+  size: number;
+  histograms: Record<MetricName, Int32Array>;
+}
+
+export function bucketOf(value: number): number {
+  if (!(value > 0)) return 0;
+  if (value < MIN_VALUE) return 1;
+  return Math.min(Math.ceil(Math.log(value / MIN_VALUE) / LOG_GAMMA) + 2, BUCKETS - 1);
+}
+
+function addToBucket(tree: Int32Array, bucket: number, delta: number): void {
+  for (let i = bucket + 1; i <= tree.length; i += i & -i) {
+    tree[i - 1] += delta;
+  }
+}
+
+// Number of stored values in buckets below the given one
+function countBelow(tree: Int32Array, bucket: number): number {
+  let count = 0;
+  for (let i = bucket; i > 0; i -= i & -i) {
+    count += tree[i - 1];
+  }
+  return count;
+}
+
+export function createMetricStore(capacity = 10000): MetricStore {
+  const histograms = {} as Record<MetricName, Int32Array>;
+  for (const metric of METRICS) {
+    histograms[metric] = new Int32Array(BUCKETS);
+  }
+  return { capacity, entries: [], next: 0, size: 0, histograms };
+}
+
+// Store a submission, evicting the oldest once the store is at capacity
+export function addSubmission(store: MetricStore, metrics: SubmissionMetrics): void {
+  const evicted = store.size === store.capacity ? store.entries[store.next] : undefined;
+  for (const metric of METRICS) {
+    const tree = store.histograms[metric];
+    if (evicted) addToBucket(tree, bucketOf(evicted[metric]), -1);
+    addToBucket(tree, bucketOf(metrics[metric]), 1);
+  }
+  store.entries[store.next] = metrics;
+  store.next = (store.next + 1) % store.capacity;
+  if (!evicted) store.size += 1;
+}
+
+// Share of stored values not below value, as a whole percentage (50 when empty)
+export function percentileOf(store: MetricStore, metric: MetricName, value: number): number {
+  if (store.size === 0) return 50;
+  const below = countBelow(store.histograms[metric], bucketOf(value));
+  return Math.round(100 - (below / store.size) * 100);
+}
@@ -1,6 +1,7 @@
 import type { VercelRequest, VercelResponse } from '@vercel/node';
-import { randomBytes } from 'crypto';
+import { createHash, randomBytes } from 'crypto';
 import { getSupabase } from './_supabase.js';
+import { BodyError, readJsonBody } from './_body.js';
 
 const supabase = getSupabase();
 
@@ -13,11 +14,67 @@ function generateId(): string {
   return bytes.toString('base64url').slice(0, 8);
 }
 
+// Retries of an upload carry the same Idempotency-Key, and get the same ID
+// from it, so a bundle whose response was lost is not stored twice
+function idempotentId(key: string): string {
+  return createHash('sha256').update(key).digest('base64url').slice(0, 8);
+}
+
+// Postgres unique_violation: the ID is taken, by this bundle if it is a retry
+const UNIQUE_VIOLATION = '23505';
+
+// IDs tried for a bundle before giving up with 409
+const MAX_ID_ATTEMPTS = 5;
+
+// Whether two parsed JSON values are equal, whatever the order of their keys
+// (a jsonb column does not keep it)
+function sameJson(a: unknown, b: unknown): boolean {
+  if (a === b) return true;
+  if (typeof a !== 'object' || typeof b !== 'object' || a === null || b === null) return false;
+  if (Array.isArray(a) !== Array.isArray(b)) return false;
+  const x = a as Record<string, unknown>;
+  const y = b as Record<string, unknown>;
+  const keys = Object.keys(x);
+  return keys.length === Object.keys(y).length && keys.every(k => Object.hasOwn(y, k) && sameJson(x[k], y[k]));
+}
+
+// Store bundle under id unless the ID is taken. Returns the bundle already
+// stored under it, or undefined if this one was stored.
+async function insertBundle(id: string, bundle: unknown): Promise<unknown> {
+  if (supabase) {
+    const { error } = await supabase
+      .from('stored_bundles')
+      .insert({ id, bundle });
+
+    if (!error) return undefined;
+    if (error.code !== UNIQUE_VIOLATION) throw error;
+    const { data, error: selectError } = await supabase
+      .from('stored_bundles')
+      .select('bundle')
+      .eq('id', id)
+      .single();
+    if (selectError) throw selectError;
+    return data.bundle;
+  }
+
+  // Fallback to in-memory storage for local development
+  const stored = inMemoryBundles.get(id);
+  if (stored !== undefined) return JSON.parse(stored);
+  inMemoryBundles.set(id, JSON.stringify(bundle));
+
+  // Limit in-memory storage to 1000 entries
+  if (inMemoryBundles.size > 1000) {
+    const firstKey = inMemoryBundles.keys().next().value;
+    if (firstKey) inMemoryBundles.delete(firstKey);
+  }
+  return undefined;
+}
+
 export default async function handler(req: VercelRequest, res: VercelResponse) {
   // Enable CORS
   res.setHeader('Access-Control-Allow-Origin', '*');
   res.setHeader('Access-Control-Allow-Methods', 'POST, OPTIONS');
-  res.setHeader('Access-Control-Allow-Headers', 'Content-Type');
+  res.setHeader('Access-Control-Allow-Headers', 'Content-Type, Content-Encoding, Idempotency-Key');
 
   if (req.method === 'OPTIONS') {
     return res.status(200).end();
@@ -28,36 +85,30 @@ export default async function handler(req: VercelRequest, res: VercelResponse) {
   }
 
   try {
-    const bundle = req.body;
+    const bundle = await readJsonBody(req);
 
     if (!bundle || !bundle.stats) {
       return res.status(400).json({ error: 'Invalid bundle: missing stats' });
     }
 
-    const id = generateId();
-
-    if (supabase) {
-      const { error } = await supabase
-        .from('stored_bundles')
-        .insert({ id, bundle });
-
-      if (error) {
-        console.error('Supabase insert error:', error);
-        return res.status(500).json({ error: 'Internal server error' });
-      }
-    } else {
-      // Fallback to in-memory storage for local development
-      inMemoryBundles.set(id, JSON.stringify(bundle));
-
-      // Limit in-memory storage to 1000 entries
-      if (inMemoryBundles.size > 1000) {
-        const firstKey = inMemoryBundles.keys().next().value;
-        if (firstKey) inMemoryBundles.delete(firstKey);
+    // A taken ID is only this upload's if the bundle stored under it is this
+    // one; otherwise it belongs to another upload and a fresh ID is tried
+    const key = req.headers['idempotency-key'];
+    let id = typeof key === 'string' && key ? idempotentId(key) : generateId();
+    for (let attempt = 1; ; attempt++) {
+      const stored = await insertBundle(id, bundle);
+      if (stored === undefined || sameJson(stored, bundle)) break;
+      if (attempt === MAX_ID_ATTEMPTS) {
+        return res.status(409).json({ error: 'Could not allocate a bundle ID' });
       }
+      id = generateId();
     }
 
     return res.status(200).json({ id });
   } catch (error) {
+    if (error instanceof BodyError) {
+      return res.status(error.status).json({ error: error.message });
+    }
     console.error('Error storing bundle:', error);
     return res.status(500).json({ error: 'Internal server error' });
   }
@@ -1,20 +1,12 @@
 import type { VercelRequest, VercelResponse } from '@vercel/node';
 import { getSupabase } from './_supabase.js';
+import { BodyError, readJsonBody } from './_body.js';
+import { addSubmission, createMetricStore, percentileOf } from './_percentiles.js';
 
 const supabase = getSupabase();
 
-// In-memory fallback for local development
-const inMemoryBundles: Array<{
-  timestamp: number;
-  stats: {
-    totalSessions: number;
-    totalTokens: number;
-    toolCount: number;
-    longestSession: number;
-    nightCoding: number;
-    cacheRate: number;
-  };
-}> = [];
+// In-memory fallback for local development: the last 10000 submissions
+const inMemoryStore = createMetricStore(10000);
 
 interface AnonymousBundle {
   stats: {
@@ -42,18 +34,11 @@ interface AnonymousBundle {
   generatedAt: string;
 }
 
-function computePercentile(value: number, allValues: number[]): number {
-  if (allValues.length === 0) return 50;
-  const sorted = [...allValues].sort((a, b) => a - b);
-  const below = sorted.filter(v => v < value).length;
-  return Math.round(100 - (below / sorted.length) * 100);
-}
-
 export default async function handler(req: VercelRequest, res: VercelResponse) {
   // Enable CORS
   res.setHeader('Access-Control-Allow-Origin', '*');
   res.setHeader('Access-Control-Allow-Methods', 'POST, OPTIONS');
-  res.setHeader('Access-Control-Allow-Headers', 'Content-Type');
+  res.setHeader('Access-Control-Allow-Headers', 'Content-Type, Content-Encoding');
 
   if (req.method === 'OPTIONS') {
     return res.status(200).end();
@@ -64,7 +49,7 @@ export default async function handler(req: VercelRequest, res: VercelResponse) {
   }
 
   try {
-    const bundle: AnonymousBundle = req.body;
+    const bundle: AnonymousBundle = await readJsonBody(req);
 
     if (!bundle.stats) {
       return res.status(400).json({ error: 'Invalid bundle: missing stats' });
@@ -104,7 +89,9 @@ export default async function handler(req: VercelRequest, res: VercelResponse) {
         return res.status(500).json({ error: 'Internal server error' });
       }
 
-      // Increment total wraps and compute percentiles in parallel
+      // Increment total wraps and compute percentiles in parallel. The ranking
+      // happens in the database; the histograms in _percentiles.ts are only
+      // used by the in-memory fallback below.
       const [wrapsResult, percentilesResult] = await Promise.all([
         supabase.rpc('increment_total_wraps'),
         supabase.rpc('compute_percentiles', {
@@ -136,49 +123,35 @@ export default async function handler(req: VercelRequest, res: VercelResponse) {
       });
     }
 
-    // Fallback to in-memory storage
-    const bundleData = {
-      timestamp: Date.now(),
-      stats: {
-        totalSessions: bundle.stats.totalSessions,
-        totalTokens,
-        toolCount,
-        longestSession: bundle.stats.longestSessionMinutes,
-        nightCoding: nightPercentage,
-        cacheRate,
-      },
-    };
-
-    inMemoryBundles.push(bundleData);
-
-    // Keep only last 10000 entries
-    if (inMemoryBundles.length > 10000) {
-      inMemoryBundles.shift();
-    }
-
-    // Compute percentiles against all stored data
-    const allTokens = inMemoryBundles.map(b => b.stats.totalTokens);
-    const allTools = inMemoryBundles.map(b => b.stats.toolCount);
-    const allNight = inMemoryBundles.map(b => b.stats.nightCoding);
-    const allSessions = inMemoryBundles.map(b => b.stats.longestSession);
-    const allCache = inMemoryBundles.map(b => b.stats.cacheRate);
-    const allTotalSessions = inMemoryBundles.map(b => b.stats.totalSessions);
+    // Fallback to in-memory storage; the oldest submission is evicted once it is full
+    addSubmission(inMemoryStore, {
+      totalSessions: bundle.stats.totalSessions,
+      totalTokens,
+      toolCount,
+      longestSession: bundle.stats.longestSessionMinutes,
+      nightCoding: nightPercentage,
+      cacheRate,
+    });
 
+    // Percentiles against all stored data, from the per-metric histograms
     const percentiles = {
-      tokenUsage: computePercentile(totalTokens, allTokens),
-      toolDiversity: computePercentile(toolCount, allTools),
-      nightCoding: computePercentile(nightPercentage, allNight),
-      sessionLength: computePercentile(bundle.stats.longestSessionMinutes, allSessions),
-      cacheEfficiency: computePercentile(cacheRate, allCache),
-      totalSessions: computePercentile(bundle.stats.totalSessions, allTotalSessions),
+      tokenUsage: percentileOf(inMemoryStore, 'totalTokens', totalTokens),
+      toolDiversity: percentileOf(inMemoryStore, 'toolCount', toolCount),
+      nightCoding: percentileOf(inMemoryStore, 'nightCoding', nightPercentage),
+      sessionLength: percentileOf(inMemoryStore, 'longestSession', bundle.stats.longestSessionMinutes),
+      cacheEfficiency: percentileOf(inMemoryStore, 'cacheRate', cacheRate),
+      totalSessions: percentileOf(inMemoryStore, 'totalSessions', bundle.stats.totalSessions),
     };
 
     return res.status(200).json({
       success: true,
       percentiles,
-      totalWraps: inMemoryBundles.length,
+      totalWraps: inMemoryStore.size,
     });
   } catch (error) {
+    if (error instanceof BodyError) {
+      return res.status(error.status).json({ error: error.message });
+    }
     console.error('Error processing bundle:', error);
     return res.status(500).json({ error: 'Internal server error' });
   }
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Benchmark extra accumulators riding on the extract_stats.py scan.
+
+Generates a synthetic ~/.claude tree (see generate_corpus.py), then times a cold
+scan_projects three ways: as usual, with an empty accumulator list (every line decoded,
+nothing extra counted) and with the two example accumulators below. Checks that the
+accumulators agree with the built-in stats, that the tool calls extract() counts per
+project add up to the toolUsage main() prints for the same tree, and that they give the
+same results with --jobs.
+
+The accumulators double as examples of the protocol extract() expects: feed(record, ctx),
+merge(other) and result().
+
+Usage:
+    python3 benchmarks/bench_accumulators.py
+    python3 benchmarks/bench_accumulators.py --scale medium --jobs 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Optional
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "skills" / "vibechecked" / "scripts"))
+
+import extract_stats  # noqa: E402
+from generate_corpus import SCALES, generate_claude_dir  # noqa: E402
+
+
+class HourHistogram:
+    """Records per hour of the day (UTC), from their timestamps."""
+
+    def __init__(self):
+        self.hours = [0] * 24
+
+    def feed(self, record: dict, ctx: dict) -> None:
+        moment = extract_stats._record_time(record.get("timestamp"))
+        if moment is not None:
+            self.hours[moment.hour] += 1
+
+    def merge(self, other: "HourHistogram") -> None:
+        self.hours = [a + b for a, b in zip(self.hours, other.hours)]
+
+    def result(self) -> list:
+        return self.hours
+
+
+class ProjectTools:
+    """Tool calls per project, counted like the built-in tool usage."""
+
+    def __init__(self):
+        self.counts = {}
+
+    def feed(self, record: dict, ctx: dict) -> None:
+        message = record.get("message")
+        if record.get("type") == "file-history-snapshot" or not isinstance(message, dict):
+            return
+        content = message.get("content")
+        if not isinstance(content, list):
+            return
+        for item in content:
+            if isinstance(item, dict) and item.get("type") == "tool_use" and item.get("name", ""):
+                self.counts.setdefault(ctx["project"], Counter())[item["name"]] += 1
+
+    def merge(self, other: "ProjectTools") -> None:
+        for project, counts in other.counts.items():
+            self.counts.setdefault(project, Counter()).update(counts)
+
+    def result(self) -> dict:
+        return self.counts
+
+
+def _best_time(scan: Callable[[], None], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scan()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _scan(projects_dir: Path, accumulators: Optional[list] = None, jobs: int = 1) -> dict:
+    return extract_stats.scan_projects(projects_dir, jobs=jobs, accumulators=accumulators)
+
+
+def _main_output(claude_dir: Path, prompts_dir: Path) -> dict:
+    """What extract_stats.py prints for claude_dir."""
+    argv = ["extract_stats.py", "--claude-dir", str(claude_dir), "--prompts-dir", str(prompts_dir), "--no-cache"]
+    out = io.StringIO()
+    with mock.patch.object(sys, "argv", argv), contextlib.redirect_stdout(out):
+        extract_stats.main()
+    return json.loads(out.getvalue())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extract_stats.py accumulators")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Corpus size (default: small)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus (default: 0)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per mode, best is kept (default: 3)")
+    parser.add_argument("--jobs", type=int, default=2, help="Processes for the --jobs check (default: 2)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        claude_dir = Path(tmp) / ".claude"
+        generate_claude_dir(claude_dir, *SCALES[args.scale], seed=args.seed)
+        projects_dir = claude_dir / "projects"
+
+        def accumulators():
+            return [HourHistogram(), ProjectTools()]
+
+        used = accumulators()
+        scan = _scan(projects_dir, used)
+        results = [accumulator.result() for accumulator in used]
+        hours, project_tools = results
+        extracted = extract_stats.extract(projects_dir, accumulators())
+        parallel = extract_stats.extract(projects_dir, accumulators(), jobs=args.jobs)
+        output = _main_output(claude_dir, Path(tmp) / "prompts")
+
+        plain_seconds = _best_time(lambda: _scan(projects_dir), args.repeat)
+        decoded_seconds = _best_time(lambda: _scan(projects_dir, []), args.repeat)
+        accumulated_seconds = _best_time(lambda: _scan(projects_dir, accumulators()), args.repeat)
+
+    if sum(project_tools.values(), Counter()) != scan["tool_counts"]:
+        print("Error: accumulated tool counts differ from the built-in ones", file=sys.stderr)
+        sys.exit(1)
+    if dict(sum(extracted[1].values(), Counter())) != output["stats"]["toolUsage"]:
+        print("Error: the tool calls extract() counted differ from the toolUsage main() prints", file=sys.stderr)
+        sys.exit(1)
+    if extracted != results or parallel != results:
+        print(f"Error: extract() gave different results than the scan, or with --jobs {args.jobs}", file=sys.stderr)
+        sys.exit(1)
+
+    records = scan["metrics"]["records_parsed"]
+    extra_us = (accumulated_seconds - decoded_seconds) / max(records, 1) * 1e6
+    print(f"corpus:        {scan['metrics']['files_visited']} files, {records} records")
+    print(f"scan:          {plain_seconds:.3f}s")
+    print(f"all decoded:   {decoded_seconds:.3f}s")
+    print(f"accumulators:  {accumulated_seconds:.3f}s  ({extra_us:.2f} us per record for {len(used)} accumulators)")
+
+
+if __name__ == "__main__":
+    main()
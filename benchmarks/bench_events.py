@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Benchmark answering questions from the --events columns instead of the session JSONL.
+
+Generates a synthetic ~/.claude tree (see generate_corpus.py) and exports its events from
+the scan pass, as --events does (scan_projects(events=...)). That export is timed against
+a plain scan followed by export_events, which reads every file again, and must write the
+same files. The same three questions are then answered two ways: an hour-of-day
+histogram of records, tool calls per project, and the longest streak of active (UTC) days.
+Once with accumulators on a full extract() pass that decodes every JSON line, and once from
+load_events columns, using only C-level iteration (compress, map, Counter) over the typed
+arrays. Checks that both give the same answers, and that the export agrees with the scan's
+tool and prompt counts.
+
+Usage:
+    python3 benchmarks/bench_events.py
+    python3 benchmarks/bench_events.py --scale medium --jobs 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from collections import Counter
+from itertools import compress
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "skills" / "vibechecked" / "scripts"))
+
+import extract_stats  # noqa: E402
+from bench_accumulators import HourHistogram, ProjectTools  # noqa: E402
+from generate_corpus import SCALES, generate_claude_dir  # noqa: E402
+
+HOUR_MS = 3_600_000
+DAY_MS = 24 * HOUR_MS
+
+
+class ActiveDays:
+    """UTC days with at least one timestamped record."""
+
+    def __init__(self):
+        self.days = set()
+
+    def feed(self, record: dict, ctx: dict) -> None:
+        moment = extract_stats._record_time(record.get("timestamp"))
+        if moment is not None:
+            self.days.add((moment - extract_stats.EPOCH).days)
+
+    def merge(self, other: ActiveDays) -> None:
+        self.days |= other.days
+
+    def result(self) -> set:
+        return self.days
+
+
+def longest_run(days: set) -> int:
+    """Longest run of consecutive day numbers."""
+    best = 0
+    for day in days:
+        if day - 1 not in days:
+            end = day
+            while end + 1 in days:
+                end += 1
+            best = max(best, end - day + 1)
+    return best
+
+
+def from_records(projects_dir: Path, jobs: int) -> tuple:
+    hours, project_tools, days = extract_stats.extract(
+        projects_dir, [HourHistogram(), ProjectTools(), ActiveDays()], jobs
+    )
+    return hours, {project: dict(counts) for project, counts in project_tools.items()}, longest_run(days)
+
+
+def from_columns(events_dir: Path) -> tuple:
+    events = extract_stats.load_events(events_dir)
+    columns = events["columns"]
+    tool_use = events["kinds"].index("tool_use")
+    # One mask byte per event, made by translating the kind column in one C call
+    is_record = bytes(columns["kind"]).translate(bytes(kind != tool_use for kind in range(256)))
+    is_tool = bytes(columns["kind"]).translate(bytes(kind == tool_use for kind in range(256)))
+
+    timed = list(filter(extract_stats.EVENT_NO_TIME.__ne__, compress(columns["ts"], is_record)))
+    hours = [0] * 24
+    for hour, count in Counter(map(HOUR_MS.__rfloordiv__, timed)).items():
+        hours[hour % 24] += count
+
+    project_tools: dict = {}
+    for (project, name), count in Counter(compress(zip(columns["project"], columns["name"]), is_tool)).items():
+        project_tools.setdefault(events["projects"][project], {})[events["names"][name]] = count
+
+    days = set(map(DAY_MS.__rfloordiv__, timed))
+    return hours, project_tools, longest_run(days)
+
+
+def _scan_with_events(projects_dir: Path, events_dir: Path, jobs: int) -> dict:
+    columns = extract_stats.open_event_columns(events_dir)
+    scan = extract_stats.scan_projects(projects_dir, jobs=jobs, events=columns)
+    extract_stats.close_event_columns(columns)
+    return scan
+
+
+def _read_dir(path: Path) -> dict:
+    return {child.name: child.read_bytes() for child in sorted(path.iterdir())}
+
+
+def _timed(run: Callable[[], object]) -> tuple:
+    start = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extract_stats.py --events columns")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Corpus size (default: small)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus (default: 0)")
+    parser.add_argument("--jobs", type=int, default=1, help="Processes for the export and the JSON pass (default: 1)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        claude_dir = Path(tmp) / ".claude"
+        generate_claude_dir(claude_dir, *SCALES[args.scale], seed=args.seed)
+        projects_dir = claude_dir / "projects"
+        events_dir = Path(tmp) / "events"
+        second_dir = Path(tmp) / "events-second-pass"
+
+        scan, scan_seconds = _timed(lambda: extract_stats.scan_projects(projects_dir, jobs=args.jobs))
+        manifest, second_seconds = _timed(
+            lambda: extract_stats.export_events(scan["files"], projects_dir, second_dir, args.jobs)
+        )
+        _, single_seconds = _timed(lambda: _scan_with_events(projects_dir, events_dir, args.jobs))
+        if _read_dir(events_dir) != _read_dir(second_dir):
+            print("Error: the scan pass and export_events wrote different event files", file=sys.stderr)
+            sys.exit(1)
+        json_bytes = sum(path.stat().st_size for path, _ in scan["files"])
+        column_bytes = sum(path.stat().st_size for path in events_dir.iterdir())
+
+        records, records_seconds = _timed(lambda: from_records(projects_dir, args.jobs))
+        columns, columns_seconds = _timed(lambda: from_columns(events_dir))
+
+        kinds = Counter(bytes(extract_stats.load_events(events_dir)["columns"]["kind"]))
+
+    if columns != records:
+        print("Error: the event columns and the session records give different answers", file=sys.stderr)
+        sys.exit(1)
+    prompts = sum(len(spans) for sources in scan["project_prompts"].values() for _, spans in sources)
+    if kinds[extract_stats.EVENT_KIND_IDS["tool_use"]] != sum(scan["tool_counts"].values()):
+        print("Error: tool_use events differ from the scanned tool counts", file=sys.stderr)
+        sys.exit(1)
+    if kinds[extract_stats.EVENT_KIND_IDS["prompt"]] != prompts:
+        print("Error: prompt events differ from the scanned prompts", file=sys.stderr)
+        sys.exit(1)
+
+    counts = ", ".join(f"{kinds[i]} {kind}" for i, kind in enumerate(extract_stats.EVENT_KINDS))
+    print(f"corpus:   {len(scan['files'])} files, {json_bytes / 1e6:.1f} MB of JSONL")
+    print(f"export:   {manifest['count']} events ({counts}), {column_bytes / 1e6:.2f} MB")
+    print(
+        f"scan:     {scan_seconds + second_seconds:.3f}s with export_events after it, {single_seconds:.3f}s in one pass"
+    )
+    print(f"records:  {records_seconds:.3f}s  (extract() with 3 accumulators)")
+    speedup = records_seconds / columns_seconds
+    print(f"columns:  {columns_seconds:.3f}s  (load_events and the same 3 answers, {speedup:.0f}x faster)")
+    print(f"answers:  longest UTC streak {columns[2]} days, {len(columns[1])} projects with tool calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Benchmark the JSON backends extract_stats.py can decode session lines with.
+
+Generates a synthetic ~/.claude tree (see generate_corpus.py), then for every backend in
+JSON_BACKENDS that is installed (stdlib json always is) times decoding every session
+line from bytes, and a full cold scan_projects with the pre-parse filter as that backend
+uses it (see PREFILTER_MIN_BYTES) and with it off. Reports MB of JSON per second and
+checks that every backend decodes the same records and produces the same scan.
+
+Usage:
+    python3 benchmarks/bench_json.py
+    python3 benchmarks/bench_json.py --scale medium --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "skills" / "vibechecked" / "scripts"))
+
+import extract_stats  # noqa: E402
+from generate_corpus import SCALES, generate_claude_dir  # noqa: E402
+
+
+def _decode_all(lines: List[bytes]) -> list:
+    records = []
+    for line in lines:
+        try:
+            records.append(extract_stats.decode_json(line))
+        except ValueError:
+            records.append(None)
+    return records
+
+
+def _scan(projects_dir: Path) -> dict:
+    scan = extract_stats.scan_projects(projects_dir)
+    return {key: value for key, value in scan.items() if key not in ("files", "cache", "metrics")}
+
+
+def _scan_unfiltered(projects_dir: Path) -> dict:
+    with mock.patch.object(extract_stats, "_prefilter_min_bytes", sys.maxsize):
+        return _scan(projects_dir)
+
+
+def _best_time(run: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extract_stats.py JSON backends")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Corpus size (default: small)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus (default: 0)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per backend, best is kept (default: 3)")
+    args = parser.parse_args()
+
+    backends = [name for name in extract_stats.JSON_BACKENDS if extract_stats._json_loads(name) is not None]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        claude_dir = Path(tmp) / ".claude"
+        generate_claude_dir(claude_dir, *SCALES[args.scale], seed=args.seed)
+        projects_dir = claude_dir / "projects"
+        lines = [
+            line for path in extract_stats.iter_jsonl_files(projects_dir) for line in path.read_bytes().splitlines()
+        ]
+        megabytes = sum(len(line) for line in lines) / 1e6
+
+        default = extract_stats.JSON_BACKEND
+        try:
+            for name in backends:
+                extract_stats.use_json_backend(name)
+                results[name] = {
+                    "records": _decode_all(lines),
+                    "scan": _scan(projects_dir),
+                    "decode": _best_time(lambda: _decode_all(lines), args.repeat),
+                    "seconds": _best_time(lambda: _scan(projects_dir), args.repeat),
+                    "unfiltered": _best_time(lambda: _scan_unfiltered(projects_dir), args.repeat),
+                }
+        finally:
+            extract_stats.use_json_backend(default)
+
+    reference = results["json"]
+    for name, result in results.items():
+        if result["records"] != reference["records"] or result["scan"] != reference["scan"]:
+            print(f"Error: {name} gave different results than json", file=sys.stderr)
+            sys.exit(1)
+
+    print(f"corpus:  {len(lines)} lines, {megabytes:.1f} MB (default backend: {default})")
+    print(f"{'backend':<9} {'decode MB/s':>12} {'speedup':>8} {'scan s':>8} {'speedup':>8} {'no filter s':>12}")
+    for name, result in results.items():
+        print(
+            f"{name:<9} {megabytes / result['decode']:>12.1f} {reference['decode'] / result['decode']:>7.2f}x "
+            f"{result['seconds']:>8.3f} {reference['seconds'] / result['seconds']:>7.2f}x {result['unfiltered']:>12.3f}"
+        )
+    missing = [name for name in extract_stats.JSON_BACKENDS if name not in results]
+    if missing:
+        print(f"not installed: {', '.join(missing)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+// Load benchmark for the /api/submit percentile computation.
+//
+// Replays --requests synthetic submissions against the in-memory stand-in
+// store twice: the way api/submit.ts used to rank them (keep the last
+// --capacity submissions in an array, copy and sort all of them for each of
+// six metrics on every request) and with the histograms in api/_percentiles.ts.
+// Sorting is slow enough that only every --compare-every'th request is ranked
+// that way; the others are only stored. Reports throughput and per-request
+// latency for both, and how far the histogram percentiles are from the sorted
+// ones on the requests both ranked. Exits with an error if any percentile is
+// off by more than --max-error points: ties within a bucket and rounding move
+// a percentile by a point or two, more while the store holds few submissions.
+// This covers the in-memory fallback only: with Supabase configured,
+// api/submit.ts ranks submissions with the compute_percentiles RPC instead.
+//
+// Needs a Node.js that runs TypeScript directly (22.18+ or 23.6+):
+//     node benchmarks/bench_percentiles.ts
+//     node benchmarks/bench_percentiles.ts --requests 50000 --compare-every 50
+
+import { addSubmission, createMetricStore, percentileOf } from '../api/_percentiles.ts';
+import type { SubmissionMetrics } from '../api/_percentiles.ts';
+
+const METRICS: (keyof SubmissionMetrics)[] = [
+  'totalTokens',
+  'toolCount',
+  'nightCoding',
+  'longestSession',
+  'cacheRate',
+  'totalSessions',
+];
+
+function option(name: string, fallback: number): number {
+  const index = process.argv.indexOf(`--${name}`);
+  return index < 0 ? fallback : Number(process.argv[index + 1]);
+}
+
+// Deterministic uniform numbers in [0, 1) (mulberry32)
+function generator(seed: number): () => number {
+  let state = seed >>> 0;
+  return () => {
+    state = (state + 0x6d2b79f5) >>> 0;
+    let t = state;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+// Submissions shaped like real ones: heavy-tailed counts, fractions in [0, 1]
+function submissions(count: number, seed: number): SubmissionMetrics[] {
+  const random = generator(seed);
+  const logNormal = (median: number, spread: number) => {
+    const normal = Math.sqrt(-2 * Math.log(1 - random())) * Math.cos(2 * Math.PI * random());
+    return median * Math.exp(spread * normal);
+  };
+  const result: SubmissionMetrics[] = [];
+  for (let i = 0; i < count; i++) {
+    const input = Math.round(logNormal(2e6, 1.5));
+    result.push({
+      totalSessions: Math.round(logNormal(150, 1)),
+      totalTokens: input + Math.round(logNormal(4e5, 1.5)),
+      toolCount: 1 + Math.floor(random() * 30),
+      longestSession: Math.round(logNormal(90, 0.8)),
+      nightCoding: random() < 0.2 ? 0 : random() ** 2,
+      cacheRate: Math.round(logNormal(2e7, 1.5)) / Math.max(input, 1),
+    });
+  }
+  return result;
+}
+
+// api/submit.ts before the histograms, verbatim
+function computePercentile(value: number, allValues: number[]): number {
+  if (allValues.length === 0) return 50;
+  const sorted = [...allValues].sort((a, b) => a - b);
+  const below = sorted.filter(v => v < value).length;
+  return Math.round(100 - (below / sorted.length) * 100);
+}
+
+function sortedPercentiles(requests: SubmissionMetrics[], capacity: number, every: number) {
+  const stored: SubmissionMetrics[] = [];
+  const latencies: number[] = [];
+  const results = new Map<number, number[]>();
+  requests.forEach((metrics, i) => {
+    const start = performance.now();
+    stored.push(metrics);
+    if (stored.length > capacity) stored.shift();
+    if (i % every !== 0) return;
+    results.set(i, METRICS.map(metric => computePercentile(metrics[metric], stored.map(b => b[metric]))));
+    latencies.push(performance.now() - start);
+  });
+  return { latencies, results };
+}
+
+function sketchPercentiles(requests: SubmissionMetrics[], capacity: number) {
+  const store = createMetricStore(capacity);
+  const latencies: number[] = [];
+  const results: number[][] = [];
+  for (const metrics of requests) {
+    const start = performance.now();
+    addSubmission(store, metrics);
+    results.push(METRICS.map(metric => percentileOf(store, metric, metrics[metric])));
+    latencies.push(performance.now() - start);
+  }
+  return { latencies, results };
+}
+
+function summary(name: string, latencies: number[]): string {
+  const total = latencies.reduce((a, b) => a + b, 0);
+  const sorted = [...latencies].sort((a, b) => a - b);
+  const at = (q: number) => (sorted[Math.min(sorted.length - 1, Math.floor(q * sorted.length))] * 1000).toFixed(1);
+  const rate = Math.round(latencies.length / (total / 1000));
+  return `${name.padEnd(9)} ${String(rate).padStart(10)} ${at(0.5).padStart(9)} ${at(0.99).padStart(9)}`;
+}
+
+function main() {
+  const count = option('requests', 20000);
+  const capacity = option('capacity', 10000);
+  const maxError = option('max-error', 5);
+  const every = option('compare-every', 20);
+  const requests = submissions(count, option('seed', 0));
+
+  const sorted = sortedPercentiles(requests, capacity, every);
+  const sketch = sketchPercentiles(requests, capacity);
+
+  let worst = 0;
+  let exact = 0;
+  let errorSum = 0;
+  sorted.results.forEach((expected, i) => {
+    expected.forEach((value, j) => {
+      const error = Math.abs(sketch.results[i][j] - value);
+      worst = Math.max(worst, error);
+      errorSum += error;
+      if (error === 0) exact += 1;
+    });
+  });
+  const lookups = sorted.results.size * METRICS.length;
+
+  console.log(`requests: ${count}, store capacity ${capacity}, ${METRICS.length} metrics each`);
+  console.log(`${'mode'.padEnd(9)} ${'requests/s'.padStart(10)} ${'p50 us'.padStart(9)} ${'p99 us'.padStart(9)}`);
+  console.log(summary('sorted', sorted.latencies));
+  console.log(summary('histogram', sketch.latencies));
+  console.log(
+    `error:    over ${sorted.results.size} requests, ${((exact / lookups) * 100).toFixed(1)}% of percentiles exact, ` +
+      `mean ${(errorSum / lookups).toFixed(3)} points, max ${worst} points`
+  );
+  if (worst > maxError) {
+    console.error(`Error: a percentile is off by ${worst} points, more than --max-error ${maxError}`);
+    process.exit(1);
+  }
+}
+
+main();
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Benchmark the pre-parse line filter in extract_stats.py.
+
+Generates a synthetic ~/.claude tree (see generate_corpus.py), then, for every backend
+in JSON_BACKENDS that is installed (stdlib json always is), scans every session file
+with scan_session_file with the byte-level filter off (every line decoded) and with it
+applied to lines of at least each of --thresholds bytes (see PREFILTER_MIN_BYTES). The
+modes take turns within every round, so drift in the machine's speed hits them alike,
+and the best of --repeat rounds is kept. Reports decode counts, timings and the speedup
+over decoding every line, marks the threshold the backend uses, and checks that every
+mode produces the same digests.
+
+Usage:
+    python3 benchmarks/bench_prefilter.py
+    python3 benchmarks/bench_prefilter.py --scale medium --thresholds 512,2048 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "skills" / "vibechecked" / "scripts"))
+
+import extract_stats  # noqa: E402
+from generate_corpus import SCALES, generate_claude_dir  # noqa: E402
+
+
+def _scan(paths, min_bytes: int):
+    with mock.patch.object(extract_stats, "_prefilter_min_bytes", min_bytes):
+        return [extract_stats.scan_session_file(path)["digest"] for path in paths]
+
+
+def _decode_count(paths, min_bytes: int):
+    """Scan paths counting decode_json calls. Returns (digests, decodes)."""
+    calls = 0
+    real_decode = extract_stats.decode_json
+
+    def counting_decode(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        return real_decode(*args, **kwargs)
+
+    with mock.patch.object(extract_stats, "decode_json", counting_decode):
+        digests = _scan(paths, min_bytes)
+    return digests, calls
+
+
+def _best_times(paths, modes: list, repeat: int) -> dict:
+    """Best scan time of every mode over repeat rounds, taking turns in alternating order."""
+    best = dict.fromkeys(modes, float("inf"))
+    for round_number in range(repeat):
+        for min_bytes in modes if round_number % 2 == 0 else reversed(modes):
+            start = time.perf_counter()
+            _scan(paths, min_bytes)
+            best[min_bytes] = min(best[min_bytes], time.perf_counter() - start)
+    return best
+
+
+def _comparable(digest: dict) -> dict:
+    """Digest with the counters the filter lets saturate clamped to the values that matter."""
+    result = dict(digest)
+    result["timestamp_count"] = min(digest["timestamp_count"], 2)
+    result["user_messages"] = min(digest["user_messages"], 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the extract_stats.py pre-parse filter")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Corpus size (default: small)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus (default: 0)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing rounds, best is kept (default: 5)")
+    parser.add_argument(
+        "--thresholds",
+        default="0,512,2048,8192",
+        help="Comma-separated thresholds in bytes to time (default: 0,512,2048,8192)",
+    )
+    args = parser.parse_args()
+    backends = [name for name in extract_stats.JSON_BACKENDS if extract_stats._json_loads(name) is not None]
+    used = {name: extract_stats.PREFILTER_MIN_BYTES.get(name, sys.maxsize) for name in backends}
+    thresholds = {int(value) for value in args.thresholds.split(",")}
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        claude_dir = Path(tmp) / ".claude"
+        generate_claude_dir(claude_dir, *SCALES[args.scale], seed=args.seed)
+        projects_dir = claude_dir / "projects"
+        paths = list(extract_stats.iter_jsonl_files(projects_dir))
+        corpus_mb = sum(p.stat().st_size for p in paths) / 1e6
+
+        default = extract_stats.JSON_BACKEND
+        reference = None
+        try:
+            for name in backends:
+                extract_stats.use_json_backend(name)
+                modes = [sys.maxsize, *sorted((thresholds | {used[name]}) - {sys.maxsize})]
+                decodes = {}
+                for min_bytes in modes:
+                    digests, decodes[min_bytes] = _decode_count(paths, min_bytes)
+                    digests = [_comparable(d) for d in digests]
+                    if reference is None:
+                        reference = digests
+                    elif digests != reference:
+                        print(f"Error: {name} filtering from {min_bytes} bytes gave other digests", file=sys.stderr)
+                        sys.exit(1)
+                results[name] = {"decodes": decodes, "seconds": _best_times(paths, modes, args.repeat)}
+        finally:
+            extract_stats.use_json_backend(default)
+
+    print(f"corpus:  {len(paths)} files, {results['json']['decodes'][sys.maxsize]} records, {corpus_mb:.1f} MB")
+    print(f"timing:  best of {args.repeat}, * marks the threshold the backend uses (default backend: {default})")
+    print(f"{'backend':<9} {'filter':<16} {'decodes':>8} {'scan s':>8} {'speedup':>8}")
+    for name, result in results.items():
+        seconds = result["seconds"]
+        for min_bytes, decodes in result["decodes"].items():
+            label = ("off" if min_bytes == sys.maxsize else f">= {min_bytes} bytes") + (
+                " *" if min_bytes == used[name] else ""
+            )
+            print(
+                f"{name:<9} {label:<16} {decodes:>8} {seconds[min_bytes]:>8.3f} "
+                f"{seconds[sys.maxsize] / seconds[min_bytes]:>7.2f}x"
+            )
+    missing = [name for name in extract_stats.JSON_BACKENDS if name not in results]
+    if missing:
+        print(f"not installed: {', '.join(missing)}")
+
+
+if __name__ == "__main__":
+    main()
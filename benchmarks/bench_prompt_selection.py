@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Benchmark prompt deduplication and sampling (--dedupe-prompts / --prompt-budget).
+
+Generates a synthetic ~/.claude tree (see generate_corpus.py), then runs select_prompts
+with deduplication alone and with each --budget, reporting what was removed, the time
+taken and the prompt text left. Checks that samples stay within their budget and are the
+same on every run. The corpus holds few near duplicates, so near-duplicate recall is
+measured separately: each prompt of --min-words or more is copied with one word changed,
+and the share of copies caught is reported. A one-word edit moves a SimHash fingerprint
+by fewer bits the longer the prompt, so recall climbs with --min-words.
+
+Usage:
+    python3 benchmarks/bench_prompt_selection.py
+    python3 benchmarks/bench_prompt_selection.py --scale medium --budget 1M 4M
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "skills" / "vibechecked" / "scripts"))
+
+import extract_stats  # noqa: E402
+from generate_corpus import SCALES, generate_claude_dir  # noqa: E402
+
+
+def _select(project_prompts: dict, dedupe: bool, budget: Optional[int]) -> dict:
+    start = time.perf_counter()
+    selected, report = extract_stats.select_prompts(project_prompts, dedupe, budget)
+    seconds = time.perf_counter() - start
+    kept = sum(len(prompt.encode()) for prompt in _prompts(selected))
+    return {"selected": selected, "report": report, "seconds": seconds, "kept": kept}
+
+
+def _prompts(project_prompts: dict) -> list:
+    return [
+        prompt
+        for sources in project_prompts.values()
+        for path, spans in sources
+        for prompt in extract_stats.iter_prompts(path, spans)
+    ]
+
+
+def near_duplicate_recall(prompts: list, min_words: int) -> tuple:
+    """(copies caught, copies made): each prompt of min_words or more is copied with its middle word changed."""
+    bands: list = [{} for _ in range(extract_stats.NEAR_DUPLICATE_MAX_BITS + 1)]
+    cache: dict = {}
+    caught = made = 0
+    for prompt in prompts:
+        words = prompt.split()
+        fingerprint = extract_stats.simhash(prompt, cache)
+        if fingerprint is None or len(words) < min_words:
+            continue
+        if extract_stats._is_near_duplicate(bands, fingerprint):
+            continue
+        words[len(words) // 2] = "changed"
+        copy = extract_stats.simhash(" ".join(words), cache)
+        made += 1
+        caught += copy is not None and extract_stats._is_near_duplicate(bands, copy)
+    return caught, made
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extract_stats.py prompt deduplication and sampling")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Corpus size (default: small)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus (default: 0)")
+    parser.add_argument(
+        "--budget",
+        nargs="+",
+        default=["256K", "1M"],
+        help="Prompt budgets to sample to, e.g. 800K 4M (default: 256K 1M)",
+    )
+    parser.add_argument(
+        "--min-words", type=int, default=100, help="Shortest prompt copied for the recall check (default: 100)"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        claude_dir = Path(tmp) / ".claude"
+        generate_claude_dir(claude_dir, *SCALES[args.scale], seed=args.seed)
+        project_prompts = extract_stats.scan_projects(claude_dir / "projects")["project_prompts"]
+        prompts = _prompts(project_prompts)
+
+        runs = {"dedupe": _select(project_prompts, True, None)}
+        for budget in args.budget:
+            size = extract_stats.parse_byte_size(budget)
+            runs[f"budget {budget}"] = _select(project_prompts, False, size)
+            runs[f"dedupe + {budget}"] = run = _select(project_prompts, True, size)
+            if run["kept"] > size:
+                print(f"Error: sample of {run['kept']} bytes exceeds the {budget} budget", file=sys.stderr)
+                sys.exit(1)
+            if _select(project_prompts, True, size)["selected"] != run["selected"]:
+                print(f"Error: sampling to {budget} is not repeatable", file=sys.stderr)
+                sys.exit(1)
+        caught, made = near_duplicate_recall(prompts, args.min_words)
+
+    megabytes = sum(len(prompt.encode()) for prompt in prompts) / 1e6
+    print(f"corpus:  {len(prompts)} prompts, {megabytes:.2f} MB")
+    print(f"{'mode':<16} {'dupes':>6} {'near':>6} {'sampled':>8} {'kept MB':>8} {'time s':>7}")
+    for name, run in runs.items():
+        report = run["report"]
+        print(
+            f"{name:<16} {report['duplicates']:>6} {report['nearDuplicates']:>6} {report['sampledOut']:>8} "
+            f"{run['kept'] / 1e6:>8.2f} {run['seconds']:>7.2f}"
+        )
+    print(f"near-duplicate recall: {caught}/{made} one-word edits of {args.min_words}+ word prompts caught")
+
+
+if __name__ == "__main__":
+    main()
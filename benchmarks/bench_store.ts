@@ -0,0 +1,187 @@
+// Benchmark and check the /api/store handler behind a stand-in for the Vercel
+// request helpers.
+//
+// Serves the real api/store.ts handler from a local HTTP server that prepares
+// requests the way @vercel/node does: when a request has a Content-Type, the
+// whole body is read before the handler runs and req.body parses it lazily
+// (application/json is parsed, throwing on invalid JSON; application/
+// octet-stream stays a Buffer; text/plain becomes a string; other types give
+// undefined). Without a Content-Type the body is left in the stream. Times
+// --requests uploads of a bundle sent as plain JSON and as gzip the way
+// merge_and_upload.py sends it, then checks that:
+//   - gzip bodies are stored, whether handed over as a Buffer or in the stream
+//   - retries with the same Idempotency-Key get the same ID, but another
+//     bundle whose key maps to a taken ID gets a new one
+//   - a body that is or decompresses to more than MAX_BODY_BYTES gets 413
+//   - a corrupt gzip body, or one the parser failed as JSON, gets a 400 whose
+//     error mentions decoding, which makes the uploader resend it uncompressed
+//   - an unknown Content-Encoding gets 415
+// Exits with an error if a check fails.
+//
+// Needs a Node.js that runs TypeScript directly (22.18+ or 23.6+) and the
+// npm dependencies installed:
+//     node benchmarks/bench_store.ts
+//     node benchmarks/bench_store.ts --requests 500
+
+import { createServer } from 'node:http';
+import type { IncomingMessage, ServerResponse } from 'node:http';
+import { registerHooks } from 'node:module';
+import { randomBytes } from 'node:crypto';
+import { gzipSync } from 'node:zlib';
+import type { VercelRequest, VercelResponse } from '@vercel/node';
+
+// The api/ modules import each other as .js, the way they are deployed
+registerHooks({
+  resolve(specifier, context, nextResolve) {
+    try {
+      return nextResolve(specifier, context);
+    } catch (error) {
+      if (!specifier.startsWith('.') || !specifier.endsWith('.js')) throw error;
+      return nextResolve(specifier.replace(/\.js$/, '.ts'), context);
+    }
+  },
+});
+
+const { MAX_BODY_BYTES } = await import('../api/_body.ts');
+const { default: handler } = await import('../api/store.ts');
+
+type Handler = (req: VercelRequest, res: VercelResponse) => unknown;
+
+function option(name: string, fallback: number): number {
+  const index = process.argv.indexOf(`--${name}`);
+  return index < 0 ? fallback : Number(process.argv[index + 1]);
+}
+
+async function readAll(req: IncomingMessage): Promise<Buffer> {
+  const chunks: Buffer[] = [];
+  for await (const chunk of req) chunks.push(chunk);
+  return Buffer.concat(chunks);
+}
+
+// The lazy req.body of @vercel/node
+function bodyParser(body: Buffer, contentType: string): () => unknown {
+  return () => {
+    const type = contentType.split(';')[0].trim().toLowerCase();
+    if (type === 'application/json') {
+      try {
+        const text = body.toString();
+        return text ? JSON.parse(text) : {};
+      } catch {
+        throw Object.assign(new Error('Invalid JSON'), { statusCode: 400 });
+      }
+    }
+    if (type === 'application/octet-stream') return body;
+    if (type === 'text/plain') return body.toString();
+    return undefined;
+  };
+}
+
+function serve(run: Handler) {
+  return createServer(async (req: IncomingMessage, res: ServerResponse) => {
+    const contentType = req.headers['content-type'];
+    if (contentType) {
+      const parse = bodyParser(await readAll(req), contentType);
+      Object.defineProperty(req, 'body', { get: parse, configurable: true });
+    }
+    const response = Object.assign(res, {
+      status(code: number) {
+        res.statusCode = code;
+        return response;
+      },
+      json(payload: unknown) {
+        res.setHeader('Content-Type', 'application/json');
+        res.end(JSON.stringify(payload));
+        return response;
+      },
+    });
+    await run(req as VercelRequest, response as unknown as VercelResponse);
+  });
+}
+
+interface Reply {
+  status: number;
+  body: { id?: string; error?: string };
+}
+
+async function post(url: string, body: Buffer | string, headers: Record<string, string>): Promise<Reply> {
+  const data = typeof body === 'string' ? body : new Uint8Array(body);
+  const response = await fetch(url, { method: 'POST', body: data, headers });
+  return { status: response.status, body: await response.json() };
+}
+
+function check(ok: boolean, message: string) {
+  if (!ok) {
+    console.error(`Error: ${message}`);
+    process.exit(1);
+  }
+}
+
+async function timed(count: number, send: () => Promise<Reply>): Promise<number> {
+  const start = performance.now();
+  for (let i = 0; i < count; i++) {
+    check((await send()).status === 200, 'an upload was not stored');
+  }
+  return performance.now() - start;
+}
+
+async function main() {
+  const count = option('requests', 200);
+  const server = serve(handler);
+  await new Promise<void>(resolve => server.listen(0, '127.0.0.1', resolve));
+  const address = server.address();
+  const url = `http://127.0.0.1:${typeof address === 'object' && address ? address.port : 0}/api/store`;
+
+  const bundle = JSON.stringify({
+    stats: { totalSessions: 12, toolUsage: Object.fromEntries([...Array(40)].map((_, i) => [`Tool${i}`, i * 7])) },
+    personaId: 'the-architect',
+  });
+  const gzipped = gzipSync(bundle);
+  const json = { 'Content-Type': 'application/json' };
+  const gzip = { 'Content-Type': 'application/octet-stream', 'Content-Encoding': 'gzip' };
+
+  try {
+    const plainMs = await timed(count, () => post(url, bundle, json));
+    const gzipMs = await timed(count, () => post(url, gzipped, gzip));
+
+    const stream = await post(url, gzipped, { 'Content-Encoding': 'gzip' });
+    check(stream.status === 200 && !!stream.body.id, 'a gzip body left in the stream was not stored');
+
+    const key = { 'Idempotency-Key': 'f3b8c1d2-retry' };
+    const first = await post(url, gzipped, { ...gzip, ...key });
+    const retry = await post(url, bundle, { ...json, ...key });
+    const other = await post(url, gzipped, { ...gzip, 'Idempotency-Key': 'another-upload' });
+    check(first.status === 200 && retry.body.id === first.body.id, 'a retry with the same key got another ID');
+    check(other.body.id !== first.body.id, 'uploads with different keys got the same ID');
+    // As if another upload's key mapped to the same ID
+    const changed = JSON.stringify({ ...JSON.parse(bundle), personaId: 'the-night-owl' });
+    const collided = await post(url, changed, { ...json, ...key });
+    check(collided.status === 200 && !!collided.body.id, 'a bundle whose ID was taken was not stored');
+    check(collided.body.id !== first.body.id, 'a bundle whose ID was taken got the other bundle\'s ID');
+    const reordered = JSON.stringify(Object.fromEntries(Object.entries(JSON.parse(bundle)).reverse()));
+    const replay = await post(url, reordered, { ...json, ...key });
+    check(replay.body.id === first.body.id, 'a retry with its keys in another order got another ID');
+
+    const bomb = gzipSync(Buffer.alloc(MAX_BODY_BYTES + 1, ' '));
+    check((await post(url, bomb, gzip)).status === 413, 'a body decompressing past the limit was not refused');
+    const large = randomBytes(MAX_BODY_BYTES + 1);
+    check((await post(url, large, gzip)).status === 413, 'a gzip body over the limit was not refused');
+    const streamed = await post(url, large, { 'Content-Encoding': 'gzip' });
+    check(streamed.status === 413, 'a streamed gzip body over the limit was not refused');
+
+    const corrupt = await post(url, randomBytes(64), gzip);
+    check(corrupt.status === 400 && /decode/i.test(corrupt.body.error ?? ''), 'a corrupt gzip body was not a 400');
+    const labelled = await post(url, gzipped, { ...json, 'Content-Encoding': 'gzip' });
+    check(labelled.status === 400 && /decode/i.test(labelled.body.error ?? ''), 'gzip labelled JSON was not a 400');
+    const brotli = await post(url, gzipped, { ...gzip, 'Content-Encoding': 'br' });
+    check(brotli.status === 415, 'an unknown Content-Encoding was not a 415');
+
+    console.log(`bundle:  ${bundle.length} bytes as JSON, ${gzipped.length} gzip-compressed`);
+    console.log(`plain:   ${count} uploads in ${plainMs.toFixed(1)} ms`);
+    console.log(`gzip:    ${count} uploads in ${gzipMs.toFixed(1)} ms`);
+    console.log('checks:  gzip bodies, idempotency keys, ID collisions, size limits, decode errors, unknown encodings ok');
+  } finally {
+    server.close();
+  }
+}
+
+await main();
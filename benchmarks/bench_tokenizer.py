@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Microbenchmark the word counting in extract_stats.py.
+
+Collects every prompt of a synthetic ~/.claude tree (see generate_corpus.py), then counts
+their words per session file the way the scanner does, and the way it did while
+WORD_PATTERN still matched single letters and every word was checked for its length.
+The two take turns within every round, so drift in the machine's speed hits them alike,
+and the best of --repeat rounds is kept. Reports throughput in MB of prompt text per
+second and checks that both give the same counts in the same order, since insertion
+order breaks ties in the reported top words.
+
+Usage:
+    python3 benchmarks/bench_tokenizer.py
+    python3 benchmarks/bench_tokenizer.py --scale medium --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "skills" / "vibechecked" / "scripts"))
+
+import extract_stats  # noqa: E402
+from generate_corpus import SCALES, generate_claude_dir  # noqa: E402
+
+LEGACY_WORD_PATTERN = re.compile(r"[a-zA-Z][a-zA-Z0-9_-]*[a-zA-Z0-9]|[a-zA-Z]")
+
+
+def legacy_count(files: List[List[str]]) -> List[Counter]:
+    """Word counts per file as the tokenizer used to produce them."""
+    results = []
+    for prompts in files:
+        word_counts: Counter = Counter()
+        for text in prompts:
+            words = LEGACY_WORD_PATTERN.findall(text.lower())
+            meaningful_words = [w for w in words if w not in extract_stats.STOPWORDS and len(w) > 1]
+            word_counts.update(meaningful_words)
+        results.append(word_counts)
+    return results
+
+
+def current_count(files: List[List[str]]) -> List[Counter]:
+    """Word counts per file as the scanner produces them now."""
+    results = []
+    for prompts in files:
+        word_counts: Counter = Counter()
+        for text in prompts:
+            extract_stats._count_words(word_counts, text)
+        results.append(word_counts)
+    return results
+
+
+def _best_times(counts: List[Callable[[List[List[str]]], List[Counter]]], files: List[List[str]], repeat: int) -> list:
+    """Best time of every tokenizer over repeat rounds, taking turns in alternating order."""
+    best = [float("inf")] * len(counts)
+    for round_number in range(repeat):
+        order = range(len(counts)) if round_number % 2 == 0 else reversed(range(len(counts)))
+        for i in order:
+            start = time.perf_counter()
+            counts[i](files)
+            best[i] = min(best[i], time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extract_stats.py word counting")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Corpus size (default: small)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus (default: 0)")
+    parser.add_argument("--repeat", type=int, default=15, help="Timing rounds, best is kept (default: 15)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        claude_dir = Path(tmp) / ".claude"
+        generate_claude_dir(claude_dir, *SCALES[args.scale], seed=args.seed)
+        scan = extract_stats.scan_projects(claude_dir / "projects")
+        files = [
+            list(extract_stats.iter_prompts(path, spans))
+            for sources in scan["project_prompts"].values()
+            for path, spans in sources
+        ]
+
+    megabytes = sum(len(text.encode()) for prompts in files for text in prompts) / 1e6
+    legacy = legacy_count(files)
+    current = current_count(files)
+    if [list(c.items()) for c in legacy] != [list(c.items()) for c in current]:
+        print("Error: tokenizers produced different word counts", file=sys.stderr)
+        sys.exit(1)
+
+    legacy_seconds, current_seconds = _best_times([legacy_count, current_count], files, args.repeat)
+    prompt_count = sum(len(prompts) for prompts in files)
+    print(f"corpus:   {prompt_count} prompts in {len(files)} files, {megabytes:.1f} MB")
+    print(f"legacy:   {megabytes / legacy_seconds:6.1f} MB/s")
+    print(f"current:  {megabytes / current_seconds:6.1f} MB/s  ({legacy_seconds / current_seconds:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
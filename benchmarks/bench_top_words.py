@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Accuracy report for the approximate top-words mode of extract_stats.py.
+
+Scans a synthetic ~/.claude tree (see generate_corpus.py) or an existing one once with
+exact word counts and once per --capacity with bounded Misra-Gries summaries
+(--top-words-capacity), then compares the reported top words. Prints, per capacity, how
+many of the exact top N survive, whether their order is unchanged, the largest relative
+error in their counts, the most words held at the end of the scan, the traced peak
+allocation and the scan time.
+
+Usage:
+    python3 benchmarks/bench_top_words.py
+    python3 benchmarks/bench_top_words.py --scale medium --capacity 100 500 2000
+    python3 benchmarks/bench_top_words.py --claude-dir ~/.claude      # existing tree, read-only
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "skills" / "vibechecked" / "scripts"))
+
+import extract_stats  # noqa: E402
+from generate_corpus import SCALES, generate_claude_dir  # noqa: E402
+
+
+def _scan(projects_dir: Path, capacity: Optional[int]) -> dict:
+    """Scan with the given word capacity. Returns the scan plus its time and traced peak."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        scan = extract_stats.scan_projects(projects_dir, word_capacity=capacity)
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"scan": scan, "seconds": seconds, "peak": peak}
+
+
+def compare(exact: list, approx: list) -> dict:
+    """How well an approximate top-N list matches the exact one."""
+    exact_counts = dict(exact)
+    approx_counts = dict(approx)
+    kept = [word for word, _ in exact if word in approx_counts]
+    errors = [(exact_counts[word] - approx_counts[word]) / exact_counts[word] for word in kept]
+    return {
+        "kept": len(kept),
+        "same_order": [word for word, _ in exact] == [word for word, _ in approx],
+        "max_error": max(errors, default=0.0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare approximate and exact top words")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Corpus size (default: small)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus (default: 0)")
+    parser.add_argument("--claude-dir", type=Path, help="Use an existing .claude directory instead")
+    parser.add_argument(
+        "--capacity",
+        type=int,
+        nargs="+",
+        default=[50, 200, 1000, 5000],
+        help="Word capacities to try (default: 50 200 1000 5000)",
+    )
+    parser.add_argument("--top", type=int, default=20, help="Number of top words compared (default: 20)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        claude_dir = args.claude_dir
+        if claude_dir is None:
+            claude_dir = Path(tmp) / ".claude"
+            generate_claude_dir(claude_dir, *SCALES[args.scale], seed=args.seed)
+        projects_dir = claude_dir / "projects"
+
+        exact = _scan(projects_dir, None)
+        approx = {capacity: _scan(projects_dir, capacity) for capacity in args.capacity}
+
+    exact_top = extract_stats.compute_top_words(exact["scan"], args.top)
+    distinct = len(exact["scan"]["word_counts"])
+    print(f"corpus: {distinct} distinct words, {sum(exact['scan']['word_counts'].values())} counted")
+    print(
+        f"{'capacity':>9} {'top kept':>9} {'order':>6} {'max err':>8} {'words held':>11} {'peak MB':>8} {'scan s':>7}"
+    )
+    print(
+        f"{'exact':>9} {len(exact_top):>6}/{args.top:<2} {'same':>6} {0:>8.1%} {distinct:>11} "
+        f"{exact['peak'] / 1e6:>8.1f} {exact['seconds']:>7.2f}"
+    )
+    for capacity, run in approx.items():
+        result = compare(exact_top, extract_stats.compute_top_words(run["scan"], args.top))
+        print(
+            f"{capacity:>9} {result['kept']:>6}/{args.top:<2} {'same' if result['same_order'] else 'diff':>6} "
+            f"{result['max_error']:>8.1%} {len(run['scan']['word_counts']):>11} "
+            f"{run['peak'] / 1e6:>8.1f} {run['seconds']:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
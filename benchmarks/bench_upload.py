@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""Benchmark and check the merge_and_upload.py uploader against a local stand-in server.
+
+Builds a bundle from a synthetic ~/.claude tree (see generate_corpus.py) and serves
+/api/store and /api/submit from a local HTTP server. Times --requests uploads sent the
+old way (uncompressed, one urllib connection each) and over one gzip session, and
+reports the bytes on the wire. Then checks that /api/store and /api/submit share one
+connection, that failures are retried under one Idempotency-Key (a retry after a lost
+response is stored once), that a server rejecting gzip with 415 gets plain JSON while a
+500 keeps gzip, that a bundle the server never got stays queued until
+resume_uploads sends it, and that one the server rejects with a 4xx is set aside as
+*.rejected without holding up the bundles queued after it.
+Also times validate_bundle, which main runs on every bundle before it is sent.
+
+Usage:
+    python3 benchmarks/bench_upload.py
+    python3 benchmarks/bench_upload.py --scale medium --requests 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "skills" / "vibechecked" / "scripts"))
+
+import extract_stats  # noqa: E402
+import merge_and_upload  # noqa: E402
+from generate_corpus import SCALES, generate_claude_dir  # noqa: E402
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers like api/store.ts and api/submit.ts, with failures the server sets up.
+
+    Like the Vercel body parser, a gzip body labelled application/json fails as invalid JSON.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; keep-alive replies must not wait on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.bytes_received += len(body)
+        self.server.requests += 1
+        gzipped = self.headers.get("Content-Encoding") == "gzip"
+        if self.server.fail_next:
+            self.server.fail_next -= 1
+            return self._reply(self.server.fail_status, {"error": "Service unavailable"})
+        if gzipped and self.server.reject_gzip:
+            return self._reply(415, {"error": "Unsupported Content-Encoding"})
+        if gzipped and self.headers.get("Content-Type") == "application/json":
+            return self._reply(400, {"error": "Invalid JSON"})
+        bundle = json.loads(gzip.decompress(body) if gzipped else body)
+        if not bundle.get("stats"):
+            return self._reply(400, {"error": "Invalid bundle: missing stats"})
+        if self.path == "/api/store":
+            key = self.headers.get("Idempotency-Key") or str(self.server.requests)
+            stored_id = self.server.stored.setdefault(key, f"id{len(self.server.stored)}")
+            if self.server.drop_next:
+                # Stored, but the response is lost
+                self.server.drop_next -= 1
+                self.close_connection = True
+                return
+            return self._reply(200, {"id": stored_id})
+        if self.path == "/api/submit":
+            return self._reply(200, {"success": True, "percentiles": {}, "totalWraps": self.server.requests})
+        self._reply(404, {"error": "Not found"})
+
+    def _reply(self, status: int, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port: int = 0) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", port), StandInHandler)
+    server.daemon_threads = True
+    reset(server)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def reset(server: ThreadingHTTPServer) -> None:
+    server.connections = server.requests = server.bytes_received = server.fail_next = server.drop_next = 0
+    server.fail_status = 503
+    server.reject_gzip = False
+    server.stored = {}
+
+
+def _legacy_upload(base_url: str, bundle: dict) -> str:
+    """One uncompressed POST on a new connection, as upload_bundle used to send it."""
+    request = urllib.request.Request(
+        f"{base_url}/api/store",
+        data=json.dumps(bundle).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=15) as response:
+        return json.loads(response.read().decode("utf-8"))["id"]
+
+
+def _session_uploads(base_url: str, bundle: dict, count: int) -> None:
+    session = merge_and_upload.new_session(base_url)
+    try:
+        for _ in range(count):
+            merge_and_upload.send_with_retries(session, "/api/store", bundle)
+    finally:
+        merge_and_upload.close_session(session)
+
+
+def _timed(run: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+def _check(ok: bool, message: str) -> None:
+    if not ok:
+        print(f"Error: {message}", file=sys.stderr)
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the merge_and_upload.py uploader")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Corpus size (default: small)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus (default: 0)")
+    parser.add_argument("--requests", type=int, default=20, help="Uploads timed per mode (default: 20)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        claude_dir = Path(tmp) / ".claude"
+        generate_claude_dir(claude_dir, *SCALES[args.scale], seed=args.seed)
+        base_stats = extract_stats.load_stats_cache(claude_dir / "stats-cache.json")
+        scan = extract_stats.scan_projects(claude_dir / "projects")
+        stats = extract_stats.build_output(base_stats, scan, claude_dir / "projects", Path(tmp) / "prompts")
+        bundle = merge_and_upload.merge_bundle(stats, {}, {}, {})
+        errors = merge_and_upload.validate_bundle(bundle)
+        _check(not errors, f"bundle does not match the schema: {errors}")
+        validate_seconds = _timed(lambda: [merge_and_upload.validate_bundle(bundle) for _ in range(1000)]) / 1000
+        outbox = Path(tmp) / "outbox"
+
+        server = start_server()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            legacy_seconds = _timed(lambda: [_legacy_upload(base_url, bundle) for _ in range(args.requests)])
+            legacy = (server.connections, server.bytes_received)
+            reset(server)
+            session_seconds = _timed(lambda: _session_uploads(base_url, bundle, args.requests))
+            current = (server.connections, server.bytes_received)
+            _check(server.requests == args.requests, "session uploads were not all accepted")
+
+            with mock.patch.object(merge_and_upload.time, "sleep"):
+                # /api/store and /api/submit over one connection
+                reset(server)
+                session = merge_and_upload.new_session(base_url)
+                stored = merge_and_upload.send_with_retries(session, "/api/store", bundle)
+                submitted = merge_and_upload.send_with_retries(session, "/api/submit", bundle)
+                merge_and_upload.close_session(session)
+                _check(stored and submitted and server.connections == 1, "store and submit did not share a connection")
+
+                # Transient failures are retried
+                reset(server)
+                server.fail_next = 2
+                short_id, _ = merge_and_upload.upload_bundle(bundle, base_url, outbox)
+                _check(short_id is not None, "retries did not succeed")
+                _check(server.requests == 3, f"expected 3 attempts, server saw {server.requests}")
+
+                # A retry after a lost response reuses the Idempotency-Key and is stored once
+                reset(server)
+                server.drop_next = 1
+                short_id, _ = merge_and_upload.upload_bundle(bundle, base_url, outbox)
+                _check(server.requests == 2, f"expected 2 attempts, server saw {server.requests}")
+                _check(short_id == "id0" and len(server.stored) == 1, "the retried bundle was stored twice")
+
+                # A 500 is retried, still gzip-encoded
+                reset(server)
+                server.fail_next, server.fail_status = 1, 500
+                session = merge_and_upload.new_session(base_url)
+                retried = merge_and_upload.send_with_retries(session, "/api/store", bundle)
+                merge_and_upload.close_session(session)
+                _check(retried is not None and session["gzip"], "a 500 turned gzip off")
+
+                # A server that cannot decode gzip gets plain JSON
+                reset(server)
+                server.reject_gzip = True
+                session = merge_and_upload.new_session(base_url)
+                plain = merge_and_upload.send_with_retries(session, "/api/store", bundle)
+                merge_and_upload.close_session(session)
+                _check(plain is not None and not session["gzip"], "no uncompressed fallback")
+
+                # A bundle that never reached the server stays queued until resumed
+                port = server.server_address[1]
+                server.shutdown()
+                server.server_close()
+                short_id, queued = merge_and_upload.upload_bundle(bundle, base_url, outbox)
+                _check(short_id is None and queued is not None, "upload to a closed port")
+                _check(merge_and_upload.queued_uploads(outbox) == [queued], "failed bundle was not queued")
+                server = start_server(port)
+                ids = merge_and_upload.resume_uploads(base_url, outbox)
+                _check(ids is not None and len(ids) == 1, "queued bundle was not resumed")
+                _check(not merge_and_upload.queued_uploads(outbox), "resumed bundle is still queued")
+
+                # A bundle the server rejects is set aside, and the ones queued after it still sent
+                reset(server)
+                short_id, queued = merge_and_upload.upload_bundle({"stats": {}}, base_url, outbox)
+                _check(short_id is None and queued is None, "a rejected bundle was reported as queued")
+                _check(server.requests == 1, f"a rejected bundle was sent {server.requests} times")
+                reset(server)
+                merge_and_upload.add_to_outbox(outbox, "/api/store", {"stats": {}})
+                merge_and_upload.add_to_outbox(outbox, "/api/store", bundle)
+                ids = merge_and_upload.resume_uploads(base_url, outbox)
+                _check(ids is not None and len(ids) == 1, "a rejected bundle held up the queue")
+                _check(not merge_and_upload.queued_uploads(outbox), "a rejected bundle is still queued")
+                _check(len(list(outbox.glob("*.rejected"))) == 2, "rejected bundles were not set aside")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    plain_bytes = len(merge_and_upload.encode_payload(bundle, compress=False))
+    print(f"bundle:   {len(json.dumps(bundle)) / 1e3:.1f} KB as before, {plain_bytes / 1e3:.1f} KB compact")
+    print(
+        f"legacy:   {args.requests} uploads in {legacy_seconds * 1000:.1f} ms, "
+        f"{legacy[0]} connections, {legacy[1] / 1e3:.1f} KB sent"
+    )
+    print(
+        f"session:  {args.requests} uploads in {session_seconds * 1000:.1f} ms, "
+        f"{current[0]} connection, {current[1] / 1e3:.1f} KB sent ({legacy[1] / max(current[1], 1):.1f}x less)"
+    )
+    print(f"validate: {validate_seconds * 1e6:.1f} us per bundle")
+    print("checks:   connection reuse, retries, idempotent retries, gzip fallback, outbox resume, rejected uploads ok")
+
+
+if __name__ == "__main__":
+    main()
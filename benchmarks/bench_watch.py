@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Benchmark and check the updates --watch makes to the snapshot and prompt files.
+
+Generates a synthetic ~/.claude tree (see generate_corpus.py) and runs one update of
+watch on it (update_watched). Then prompts are appended to some session files and a
+second update is timed: it must parse only the new records, append only the new prompts,
+and leave the same stats and the same prompts per project as a fresh run writes. Then the
+prompts directory is deleted, and next written by another run, between updates; last, a
+session file is truncated. Each time the update must write the prompt files again,
+exactly as a fresh run does. Every check is done with plain and with gzip-compressed
+chunks.
+
+Usage:
+    python3 benchmarks/bench_watch.py
+    python3 benchmarks/bench_watch.py --scale medium --append 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "skills" / "vibechecked" / "scripts"))
+
+import extract_stats  # noqa: E402
+from generate_corpus import SCALES, generate_claude_dir  # noqa: E402
+
+
+def append_prompts(paths: list, count: int) -> int:
+    """Append count prompts, round robin, to the session files in paths."""
+    for i in range(count):
+        record = {
+            "type": "user",
+            "message": {"role": "user", "content": f"appended prompt {i}: keep the watcher honest"},
+            "timestamp": "2025-11-01T12:00:00.000Z",
+        }
+        with paths[i % len(paths)].open("a") as f:
+            f.write(json.dumps(record) + "\n")
+    return count
+
+
+def read_prompts(prompts_dir: Path, compression: Optional[str]) -> Counter:
+    """Every prompt in the prompt files, by the file name prefix of its project."""
+    prompts: Counter = Counter()
+    if compression:
+        for filename, chunk in extract_stats.read_prompt_index(prompts_dir).items():
+            prefix = filename.rsplit("-chunk-", 1)[0]
+            for i in range(len(chunk["prompts"])):
+                prompts[prefix, extract_stats.read_indexed_prompt(prompts_dir, filename, chunk, i)] += 1
+        return prompts
+    for path in prompts_dir.glob("*.txt"):
+        prefix = path.name.rsplit("-chunk-", 1)[0]
+        for prompt in path.read_text().split(extract_stats.PROMPT_SEPARATOR):
+            prompts[prefix, prompt] += 1
+    return prompts
+
+
+def read_files(prompts_dir: Path) -> dict:
+    return {path.name: path.read_bytes() for path in sorted(prompts_dir.iterdir())}
+
+
+def fresh_run(claude_dir: Path, prompts_dir: Path, compression: Optional[str]) -> dict:
+    update = extract_stats.update_watched(claude_dir, prompts_dir, extract_stats.new_watcher(), compression=compression)
+    return update["output"]
+
+
+def _stats(output: dict) -> dict:
+    return {key: value for key, value in output.items() if key != "promptsDir"}
+
+
+def _check(ok: bool, message: str) -> None:
+    if not ok:
+        print(f"Error: {message}", file=sys.stderr)
+        sys.exit(1)
+
+
+def check_watch(claude_dir: Path, tmp: Path, compression: Optional[str], appended: int) -> dict:
+    label = compression or "plain"
+    prompts_dir = tmp / f"prompts-{label}"
+    fresh_dir = tmp / f"fresh-{label}"
+    watcher = extract_stats.new_watcher()
+    first = extract_stats.update_watched(claude_dir, prompts_dir, watcher, compression=compression)
+    _check(first["rewritten"], f"{label}: the first update did not write the prompt files")
+
+    sessions = sorted((claude_dir / "projects").glob("*/*.jsonl"))
+    append_prompts(sessions[:: max(1, len(sessions) // 10)], appended)
+    start = time.perf_counter()
+    second = extract_stats.update_watched(claude_dir, prompts_dir, watcher, compression=compression)
+    seconds = time.perf_counter() - start
+    fresh = fresh_run(claude_dir, fresh_dir, compression)
+    _check(not second["rewritten"], f"{label}: appending to session files rewrote the prompt files")
+    _check(second["prompts"] == appended, f"{label}: {second['prompts']} prompts appended, not {appended}")
+    _check(
+        second["metrics"]["records_parsed"] == appended,
+        f"{label}: the update parsed {second['metrics']['records_parsed']} records, not only the {appended} new ones",
+    )
+    _check(_stats(second["output"]) == _stats(fresh), f"{label}: the update's output differs from a fresh run")
+    _check(
+        read_prompts(prompts_dir, compression) == read_prompts(fresh_dir, compression),
+        f"{label}: the appended prompt files hold different prompts than a fresh run's",
+    )
+
+    def check_rewrite(change: Callable[[], None], what: str) -> None:
+        change()
+        update = extract_stats.update_watched(claude_dir, prompts_dir, watcher, compression=compression)
+        fresh = fresh_run(claude_dir, fresh_dir, compression)
+        _check(update["rewritten"], f"{label}: {what} did not rewrite the prompt files")
+        _check(_stats(update["output"]) == _stats(fresh), f"{label}: the rewrite after {what} differs from a fresh run")
+        _check(
+            read_files(prompts_dir) == read_files(fresh_dir), f"{label}: the prompt files rewritten after {what} differ"
+        )
+
+    def delete_prompts() -> None:
+        shutil.rmtree(prompts_dir)
+        append_prompts(sessions[1:2], 1)
+
+    def other_run() -> None:
+        fresh_run(claude_dir, prompts_dir, compression)
+        append_prompts(sessions[1:2], 1)
+
+    def truncate() -> None:
+        session = sessions[0]
+        session.write_bytes(session.read_bytes()[: session.stat().st_size // 2].rsplit(b"\n", 1)[0] + b"\n")
+
+    check_rewrite(delete_prompts, "deleting the prompts directory")
+    check_rewrite(other_run, "another run writing the prompts directory")
+    check_rewrite(truncate, "truncating a session file")
+    return {"seconds": seconds, "bytes": second["metrics"]["bytes_read"], "full": first["metrics"]["bytes_read"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and check --watch updates")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Corpus size (default: small)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus (default: 0)")
+    parser.add_argument("--append", type=int, default=20, help="Prompts to append between updates (default: 20)")
+    args = parser.parse_args()
+
+    for compression in (None, "gzip"):
+        with tempfile.TemporaryDirectory() as tmp:
+            claude_dir = Path(tmp) / ".claude"
+            generate_claude_dir(claude_dir, *SCALES[args.scale], seed=args.seed)
+            result = check_watch(claude_dir, Path(tmp), compression, args.append)
+        print(
+            f"{compression or 'plain':6} update: {result['seconds']:.3f}s, {result['bytes'] / 1e3:.1f} KB read "
+            f"of {result['full'] / 1e6:.1f} MB, {args.append} prompts appended"
+        )
+    print("checks:  appends match a fresh run; deleted or replaced prompt files and truncation rewrite them")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Benchmark and check --since/--until extraction from a scan and from the --index database.
+
+Generates a synthetic ~/.claude tree (see generate_corpus.py) and adds a project whose only
+session has records before and after the window but none inside it. The window's stats are
+then computed by scan_projects, and by update_session_index plus query_session_index, and
+the outputs build_output makes from them are compared: both paths must give the same stats,
+quirks and projectCount, and the out-of-window session must count towards none of them.
+An index query for a single project (--index --project) must count one project.
+
+Usage:
+    python3 benchmarks/bench_window.py
+    python3 benchmarks/bench_window.py --scale medium --since 2025-05-01 --until 2025-07-01
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "skills" / "vibechecked" / "scripts"))
+
+import extract_stats  # noqa: E402
+from generate_corpus import SCALES, generate_claude_dir  # noqa: E402
+
+OUTSIDE_PROJECT = "-Users-dev-code-outside-window"
+
+
+def add_outside_session(projects_dir: Path, window: tuple) -> None:
+    """A session with one prompt the day before the window and one the day after it."""
+    since, until = window
+    records = []
+    for moment in (since - timedelta(days=1), until + timedelta(days=1)):
+        records.append(
+            {
+                "type": "user",
+                "message": {"role": "user", "content": "outside the window"},
+                "timestamp": moment.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            }
+        )
+    path = projects_dir / OUTSIDE_PROJECT / "outside.jsonl"
+    path.parent.mkdir(parents=True)
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+
+def window_output(scan: dict, projects_dir: Path, prompts_dir: Path) -> dict:
+    output = extract_stats.build_output(extract_stats.windowed_stats(scan), scan, projects_dir, prompts_dir)
+    del output["promptsDir"]
+    return output
+
+
+def _timed(run: Callable[[], object]) -> tuple:
+    start = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - start
+
+
+def _check(ok: bool, message: str) -> None:
+    if not ok:
+        print(f"Error: {message}", file=sys.stderr)
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and check windowed extraction by scan and by index")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Corpus size (default: small)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus (default: 0)")
+    parser.add_argument("--since", default="2025-05-01", help="Start of the window (default: 2025-05-01)")
+    parser.add_argument("--until", default="2025-07-01", help="End of the window (default: 2025-07-01)")
+    args = parser.parse_args()
+    window = (
+        extract_stats.parse_window_bound(args.since),
+        extract_stats.parse_window_bound(args.until, end=True),
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        claude_dir = Path(tmp) / ".claude"
+        generate_claude_dir(claude_dir, *SCALES[args.scale], seed=args.seed)
+        projects_dir = claude_dir / "projects"
+        add_outside_session(projects_dir, window)
+
+        scan, scan_seconds = _timed(lambda: extract_stats.scan_projects(projects_dir, window=window))
+        conn = extract_stats.open_session_index(Path(tmp) / "index.sqlite")
+        try:
+            _, index_seconds = _timed(lambda: extract_stats.update_session_index(conn, projects_dir))
+            indexed, query_seconds = _timed(lambda: extract_stats.query_session_index(conn, window))
+            project = "-Users-dev-code-project-0"
+            one_project = extract_stats.query_session_index(conn, projects=[project])
+        except sqlite3.Error as e:
+            _check(False, f"session index failed: {e}")
+        finally:
+            conn.close()
+
+        from_scan = window_output(scan, projects_dir, Path(tmp) / "prompts-scan")
+        from_index = window_output(indexed, projects_dir, Path(tmp) / "prompts-index")
+        from_project = window_output(one_project, projects_dir, Path(tmp) / "prompts-project")
+
+    stats = from_scan["stats"]
+    _check(from_scan == from_index, "the scan and the index give different stats for the window")
+    _check(OUTSIDE_PROJECT not in scan["projects"], "a session outside the window counts as a project")
+    _check(stats["projectCount"] == len(scan["projects"]), "projectCount counts projects without sessions")
+    _check(stats["projectCount"] > 0, "no project has a session in the window")
+    _check(from_project["stats"]["projectCount"] == 1, "--project counts other projects towards projectCount")
+
+    quirks = from_scan["quirks"]
+    print(
+        f"window:   {args.since} to {args.until}, {stats['totalSessions']} sessions in {stats['projectCount']} projects"
+    )
+    print(f"scan:     {scan_seconds:.3f}s  (scan_projects with a window)")
+    print(f"index:    {index_seconds:.3f}s to build, {query_seconds:.3f}s to query")
+    print(
+        f"checks:   scan and index agree, {quirks['abandonedSessions']} abandoned sessions, "
+        f"out-of-window session left out"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""Generate a synthetic ~/.claude tree for benchmarking the VibeChecked scripts.
+
+Writes stats-cache.json plus projects/<project>/<session>.jsonl files whose records follow
+the shapes Claude Code writes: user prompts (including system-tagged and meta ones), tool
+results, assistant text/thinking/tool_use blocks with stop reasons, file-history
+snapshots, summaries, and subagent sessions under <session>/subagents/. Output is fully
+determined by the scale and seed.
+
+Usage:
+    python3 benchmarks/generate_corpus.py /tmp/claude-bench              # small corpus
+    python3 benchmarks/generate_corpus.py /tmp/claude-bench --scale large
+    python3 benchmarks/generate_corpus.py /tmp/claude-bench --projects 3 --sessions 10 --records 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import shutil
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Tuple
+
+# (projects, sessions per project, records per session)
+SCALES = {
+    "tiny": (2, 5, 40),
+    "small": (4, 25, 120),
+    "medium": (12, 80, 200),
+    "large": (20, 150, 250),
+}
+
+TOOLS = ["Bash", "Read", "Edit", "Write", "Grep", "Glob", "Task", "TodoWrite", "WebFetch", "MultiEdit"]
+TOOL_WEIGHTS = [30, 25, 20, 6, 8, 5, 2, 3, 1, 2]
+MODELS = ["claude-opus-4-1-20250805", "claude-sonnet-4-5-20250929", "claude-haiku-4-5-20251001"]
+STOP_REASONS = [None, None, None, "end_turn", "max_tokens", "stop_sequence"]
+PROMPT_WORDS = (
+    "fix the failing test in parser refactor cache layer add endpoint for stats why does build "
+    "break on deploy make component render faster can you review schema migration lint errors "
+    "again still broken please update readme rename function docker config typescript types"
+).split()
+# Word frequencies in prompts fall off roughly like Zipf's law
+PROMPT_WORD_WEIGHTS = [1 / rank for rank in range(1, len(PROMPT_WORDS) + 1)]
+SYSTEM_PROMPTS = [
+    "<command-name>/clear</command-name>",
+    "<local-command-stdout></local-command-stdout>",
+    "<system-reminder>Context was compacted.</system-reminder>",
+]
+CODE_LINES = [
+    "def load(path: str) -> dict:",
+    '    """Read the "config" file."""',
+    "    with open(path) as f:",
+    "        return json.load(f)  # café",
+    "\tif (!ok) { throw new Error(`bad ${id}`); }",
+    "+  const total = items.reduce((a, b) => a + b, 0);",
+]
+
+
+def text(rng: random.Random, size: int) -> str:
+    """Code-like text with the quotes, tabs and newlines that make real payloads costly to decode."""
+    lines = []
+    while size > 0:
+        line = rng.choice(CODE_LINES)
+        lines.append(line)
+        size -= len(line) + 1
+    return "\n".join(lines)
+
+
+def pasted(rng: random.Random) -> str:
+    """A pasted log or stack trace, full of one-off hashes and identifiers that bloat the vocabulary."""
+    lines = []
+    for _ in range(rng.randint(3, 30)):
+        kind = rng.random()
+        if kind < 0.3:
+            lines.append(f"commit {rng.getrandbits(160):040x}")
+        elif kind < 0.6:
+            lines.append(
+                f"  at handler_{rng.getrandbits(32):08x} (src/mod{rng.randint(0, 500)}.ts:{rng.randint(1, 900)})"
+            )
+        else:
+            lines.append(rng.choice(CODE_LINES))
+    return "\n".join(lines)
+
+
+def usage(rng: random.Random) -> dict:
+    """Token usage as recorded on assistant messages."""
+    return {
+        "input_tokens": rng.randint(1, 400),
+        "cache_creation_input_tokens": rng.randint(0, 3000),
+        "cache_read_input_tokens": rng.randint(0, 60000),
+        "output_tokens": rng.randint(1, 2000),
+    }
+
+
+def _iso(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+def session_records(rng: random.Random, session_id: str, cwd: str, start: datetime, count: int) -> List[dict]:
+    """Records of one session, roughly following the mix of record types in real logs."""
+    base = {"isSidechain": False, "userType": "external", "cwd": cwd, "sessionId": session_id, "version": "2.0.14"}
+    records: List[dict] = []
+    moment = start
+    parent = None
+    while len(records) < count:
+        moment += timedelta(seconds=rng.randint(1, 90))
+        ts = _iso(moment)
+        record_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        roll = rng.random()
+        after = {}
+        if roll < 0.09 or not records:
+            content = " ".join(rng.choices(PROMPT_WORDS, PROMPT_WORD_WEIGHTS, k=rng.randint(2, 60)))
+            if rng.random() < 0.2:
+                content += "\n\n" + pasted(rng)
+            if rng.random() < 0.1:
+                content = rng.choice(SYSTEM_PROMPTS)
+            record = {"type": "user", "message": {"role": "user", "content": content}}
+            if rng.random() < 0.03:
+                record["isMeta"] = True
+        elif roll < 0.36:
+            result = {
+                "tool_use_id": "toolu_" + record_id[:12],
+                "type": "tool_result",
+                "content": text(rng, rng.randint(100, 9000)),
+            }
+            record = {"type": "user", "message": {"role": "user", "content": [result]}}
+            # Claude Code writes the raw tool output after the timestamp
+            after = {"toolUseResult": {"stdout": result["content"], "stderr": "", "interrupted": False}}
+        elif roll < 0.60:
+            tool = {"type": "tool_use", "id": "toolu_" + record_id[:12], "name": rng.choices(TOOLS, TOOL_WEIGHTS)[0]}
+            tool["input"] = {"command": text(rng, rng.randint(10, 400))}
+            message = {"role": "assistant", "model": rng.choice(MODELS), "content": [tool], "stop_reason": "tool_use"}
+            message["usage"] = usage(rng)
+            record = {"type": "assistant", "message": message}
+        elif roll < 0.86:
+            if rng.random() < 0.5:
+                block = {"type": "thinking", "thinking": text(rng, rng.randint(200, 6000)), "signature": "E" * 600}
+            else:
+                block = {"type": "text", "text": text(rng, rng.randint(20, 1500))}
+            stop = rng.choice(STOP_REASONS)
+            if rng.random() < 0.01:
+                stop = "user_interrupt"
+            message = {"role": "assistant", "model": rng.choice(MODELS), "content": [block], "stop_reason": stop}
+            message["usage"] = usage(rng)
+            record = {"type": "assistant", "message": message}
+        elif roll < 0.95:
+            backups = {f"src/file{rng.randint(0, 40)}.py": text(rng, rng.randint(300, 12000))}
+            snapshot = {"messageId": record_id, "trackedFileBackups": backups, "timestamp": ts}
+            records.append({"type": "file-history-snapshot", "messageId": record_id, "snapshot": snapshot})
+            continue
+        elif roll < 0.97:
+            records.append({"type": "summary", "summary": "Refactored the parser", "leafUuid": record_id})
+            continue
+        else:
+            record = {"type": "system", "subtype": "stop_hook_summary", "content": "hooks ok", "level": "info"}
+
+        record = {"parentUuid": parent, **base, **record, "uuid": record_id, "timestamp": ts, **after}
+        parent = record_id
+        records.append(record)
+    return records
+
+
+def _write_jsonl(path: Path, records: List[dict]) -> int:
+    data = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(data)
+    return len(data.encode())
+
+
+def _stats_cache(sessions: List[Tuple[datetime, datetime, int]], rng: random.Random) -> dict:
+    """stats-cache.json contents consistent with the generated sessions."""
+    hour_counts: Counter = Counter()
+    daily: dict = {}
+    longest = (timedelta(0), 0)
+    for start, end, messages in sessions:
+        hour_counts[str(start.hour)] += 1
+        day = daily.setdefault(start.date().isoformat(), {"messageCount": 0, "sessionCount": 0, "toolCallCount": 0})
+        day["messageCount"] += messages
+        day["sessionCount"] += 1
+        day["toolCallCount"] += messages // 4
+        longest = max(longest, (end - start, messages))
+
+    total_messages = sum(messages for _, _, messages in sessions)
+    model_usage = {}
+    for model in MODELS:
+        scale = total_messages * rng.randint(50, 400)
+        model_usage[model] = {
+            "inputTokens": scale,
+            "outputTokens": scale // 3,
+            "cacheReadInputTokens": scale * 20,
+            "cacheCreationInputTokens": scale * 2,
+        }
+    return {
+        "version": 2,
+        "lastComputedDate": max(daily) if daily else None,
+        "dailyActivity": [{"date": d, **daily[d]} for d in sorted(daily)],
+        "modelUsage": model_usage,
+        "totalSessions": len(sessions),
+        "totalMessages": total_messages,
+        "longestSession": {"duration": int(longest[0].total_seconds() * 1000), "messageCount": longest[1]},
+        "hourCounts": dict(sorted(hour_counts.items(), key=lambda item: int(item[0]))),
+    }
+
+
+def generate_claude_dir(
+    claude_dir: Path,
+    projects: int,
+    sessions: int,
+    records: int,
+    seed: int = 0,
+    subagent_rate: float = 0.15,
+) -> dict:
+    """Write a synthetic .claude directory. Returns a summary of what was written."""
+    rng = random.Random(seed)
+    if claude_dir.exists():
+        shutil.rmtree(claude_dir)
+    projects_dir = claude_dir / "projects"
+
+    epoch = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    written = {"sessionFiles": 0, "subagentFiles": 0, "records": 0, "bytes": 0}
+    session_spans = []
+    for p in range(projects):
+        cwd = f"/Users/dev/code/project-{p}"
+        project_dir = projects_dir / cwd.replace("/", "-")
+        for _ in range(sessions):
+            session_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            start = epoch + timedelta(days=rng.randint(0, 240), minutes=rng.randint(0, 1439))
+            count = max(1, int(rng.gauss(records, records / 3)))
+            session = session_records(rng, session_id, cwd, start, count)
+            written["bytes"] += _write_jsonl(project_dir / f"{session_id}.jsonl", session)
+            written["sessionFiles"] += 1
+            written["records"] += len(session)
+            stamps = [r["timestamp"] for r in session if "timestamp" in r]
+            end = datetime.fromisoformat(stamps[-1].replace("Z", "+00:00")) if stamps else start
+            session_spans.append((start, end, sum(1 for r in session if "message" in r)))
+
+            if rng.random() < subagent_rate:
+                agent = session_records(rng, session_id, cwd, start, max(1, count // 4))
+                path = project_dir / session_id / "subagents" / f"agent-{rng.getrandbits(32):08x}.jsonl"
+                written["bytes"] += _write_jsonl(path, agent)
+                written["subagentFiles"] += 1
+
+    claude_dir.mkdir(parents=True, exist_ok=True)
+    (claude_dir / "stats-cache.json").write_text(json.dumps(_stats_cache(session_spans, rng), indent=2))
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic ~/.claude tree for benchmarks")
+    parser.add_argument("claude_dir", type=Path, help="Directory to write (replaced if it exists)")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Preset size (default: small)")
+    parser.add_argument("--projects", type=int, help="Number of projects (overrides --scale)")
+    parser.add_argument("--sessions", type=int, help="Sessions per project (overrides --scale)")
+    parser.add_argument("--records", type=int, help="Mean records per session (overrides --scale)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    projects, sessions, records = SCALES[args.scale]
+    summary = generate_claude_dir(
+        args.claude_dir,
+        args.projects or projects,
+        args.sessions or sessions,
+        args.records or records,
+        args.seed,
+    )
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""Time each stage of extract_stats.py and merge_and_upload.py on a synthetic ~/.claude tree.
+
+Every stage is timed (best of --repeat runs) and then run once more under tracemalloc to
+record its peak Python allocation. The end-to-end stages call each script's main() with
+the fixtures passed on the command line (--claude-dir, --dry-run), so nothing touches the
+network or the real ~/.claude. Results are written as JSON so runs can be compared.
+
+Usage:
+    python3 benchmarks/run_benchmarks.py                              # small corpus
+    python3 benchmarks/run_benchmarks.py --scale medium --output after.json
+    python3 benchmarks/run_benchmarks.py --compare before.json        # show the change per stage
+    python3 benchmarks/run_benchmarks.py --claude-dir ~/.claude       # existing tree, read-only
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "skills" / "vibechecked" / "scripts"))
+
+import extract_stats  # noqa: E402
+import merge_and_upload  # noqa: E402
+from generate_corpus import SCALES, generate_claude_dir  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+Stage = Tuple[str, Callable[[], None]]
+
+QUOTES_FIXTURE = {
+    "memorablePrompts": {"funniest": {"prompt": "make it pop", "context": "styling"}},
+    "contrasts": {"shortestEffective": "ship it"},
+}
+STYLE_FIXTURE = {
+    "communicationStyle": {"politenessLevel": "direct"},
+    "obsessions": {"topics": ["testing"]},
+    "topPhrases": [{"phrase": "fix the", "count": 3}],
+    "dominantTopics": ["testing"],
+}
+PERSONA_FIXTURE = {
+    "persona": "code-roulette",
+    "traits": ["fast"],
+    "promptingStyle": "Short and direct",
+    "communicationTone": "Casual",
+    "funFacts": ["Ran the benchmarks"],
+}
+
+
+def extract_stages(claude_dir: Path, prompts_dir: Path, stats_out: Path) -> List[Stage]:
+    """Stages of extract_stats.py, in pipeline order. Later stages use earlier results."""
+    projects_dir = claude_dir / "projects"
+    index_file = stats_out.with_name(extract_stats.SESSION_INDEX_NAME)
+    state: dict = {}
+
+    def load_stats():
+        state["stats"] = extract_stats.load_stats_cache(claude_dir / "stats-cache.json")
+
+    def scan_cold():
+        state["scan"] = extract_stats.scan_projects(projects_dir)
+
+    def scan_warm():
+        extract_stats.scan_projects(projects_dir, state["scan"]["cache"])
+
+    def tools():
+        state["tools"] = extract_stats.extract_tools(state["scan"])
+
+    def quirks():
+        state["quirks"] = extract_stats.calculate_quirks(state["stats"], state["scan"])
+
+    def top_words():
+        extract_stats.compute_top_words(state["scan"])
+
+    def bundle():
+        total_minutes = extract_stats.calculate_total_session_minutes(state["scan"])
+        extract_stats.build_bundle(state["stats"], state["tools"], state["quirks"], projects_dir, total_minutes)
+
+    def index_cold():
+        index = extract_stats.open_session_index(index_file, rebuild=True)
+        extract_stats.update_session_index(index, projects_dir)
+        index.close()
+
+    def index_query():
+        index = extract_stats.open_session_index(index_file)
+        extract_stats.update_session_index(index, projects_dir)
+        extract_stats.query_session_index(index)
+        index.close()
+
+    def prompts():
+        extract_stats.write_prompts_to_files(state["scan"]["project_prompts"], prompts_dir)
+
+    def prompts_gzip():
+        extract_stats.write_prompts_to_files(state["scan"]["project_prompts"], prompts_dir, "gzip")
+
+    def main():
+        argv = ["extract_stats.py", "--claude-dir", str(claude_dir), "--prompts-dir", str(prompts_dir), "--no-cache"]
+        out = io.StringIO()
+        with mock.patch.object(sys, "argv", argv), contextlib.redirect_stdout(out):
+            extract_stats.main()
+        stats_out.write_text(out.getvalue())
+
+    return [
+        ("extract.load_stats_cache", load_stats),
+        ("extract.scan_projects.cold", scan_cold),
+        ("extract.scan_projects.warm", scan_warm),
+        ("extract.extract_tools", tools),
+        ("extract.calculate_quirks", quirks),
+        ("extract.compute_top_words", top_words),
+        ("extract.build_bundle", bundle),
+        ("extract.update_session_index.cold", index_cold),
+        ("extract.query_session_index.warm", index_query),
+        ("extract.write_prompts_to_files", prompts),
+        ("extract.write_prompts_to_files.gzip", prompts_gzip),
+        ("extract.main", main),
+    ]
+
+
+def merge_stages(fixtures_dir: Path, stats_file: Path) -> List[Stage]:
+    """Stages of merge_and_upload.py, reading the stats written by extract.main."""
+    files = {
+        "STATS_FILE": stats_file,
+        "QUOTES_FILE": fixtures_dir / "vibes-quotes.json",
+        "STYLE_FILE": fixtures_dir / "vibes-style.json",
+        "PERSONA_FILE": fixtures_dir / "vibes-persona.json",
+    }
+    files["QUOTES_FILE"].write_text(json.dumps(QUOTES_FIXTURE))
+    files["STYLE_FILE"].write_text(json.dumps(STYLE_FIXTURE))
+    files["PERSONA_FILE"].write_text(json.dumps(PERSONA_FIXTURE))
+    state: dict = {}
+
+    def load():
+        state["inputs"] = [merge_and_upload.load_json(path) for path in files.values()]
+
+    def merge():
+        merge_and_upload.merge_bundle(*state["inputs"])
+
+    def main():
+        with contextlib.ExitStack() as stack:
+            for name, path in files.items():
+                stack.enter_context(mock.patch.object(merge_and_upload, name, path))
+            stack.enter_context(mock.patch.object(sys, "argv", ["merge_and_upload.py", "--dry-run"]))
+            stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+            merge_and_upload.main()
+
+    return [
+        ("merge.load_json", load),
+        ("merge.merge_bundle", merge),
+        ("merge.main", main),
+    ]
+
+
+def run_stage(run: Callable[[], None], repeat: int) -> dict:
+    """Best wall time over repeat runs, then peak traced allocation of one more run."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(best, 6), "peakMB": round(peak / 1e6, 3)}
+
+
+def _corpus_summary(claude_dir: Path) -> dict:
+    projects_dir = claude_dir / "projects"
+    files = list(projects_dir.rglob("*.jsonl")) if projects_dir.exists() else []
+    return {"jsonlFiles": len(files), "bytes": sum(path.stat().st_size for path in files)}
+
+
+def print_results(results: dict, baseline: Optional[dict] = None) -> None:
+    """Human-readable table on stderr, with the change against baseline if given."""
+    corpus = results["corpus"]
+    print(f"corpus: {corpus['jsonlFiles']} JSONL files, {corpus['bytes'] / 1e6:.1f} MB", file=sys.stderr)
+    for name, stage in results["stages"].items():
+        line = f"  {name:<38} {stage['seconds'] * 1000:>10.1f} ms {stage['peakMB']:>9.1f} MB"
+        before = (baseline or {}).get("stages", {}).get(name)
+        if before and before["seconds"] > 0:
+            line += f"   {stage['seconds'] / before['seconds']:.2f}x time"
+            if before["peakMB"] > 0:
+                line += f"  {stage['peakMB'] / before['peakMB']:.2f}x memory"
+        print(line, file=sys.stderr)
+    if results.get("processPeakRssMB") is not None:
+        print(f"process peak RSS: {results['processPeakRssMB']:.1f} MB", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the VibeChecked extraction and merge stages")
+    parser.add_argument(
+        "--scale", choices=sorted(SCALES), default="small", help="Synthetic corpus size (default: small)"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus (default: 0)")
+    parser.add_argument("--claude-dir", type=Path, help="Benchmark an existing .claude directory instead")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage, best is kept (default: 3)")
+    parser.add_argument("--output", type=Path, help="Write results JSON here (default: stdout)")
+    parser.add_argument("--compare", type=Path, help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        claude_dir = args.claude_dir
+        if claude_dir is None:
+            claude_dir = tmp_dir / ".claude"
+            generate_claude_dir(claude_dir, *SCALES[args.scale], seed=args.seed)
+
+        stats_file = tmp_dir / "vibes-stats.json"
+        stages = extract_stages(claude_dir, tmp_dir / "vibes-prompts", stats_file)
+        stages += merge_stages(tmp_dir, stats_file)
+
+        results = {
+            "generatedAt": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus": {
+                "scale": None if args.claude_dir else args.scale,
+                "seed": None if args.claude_dir else args.seed,
+                **_corpus_summary(claude_dir),
+            },
+            "stages": {name: run_stage(run, args.repeat) for name, run in stages},
+        }
+
+    if resource is not None:
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        results["processPeakRssMB"] = round(rss / (1e6 if sys.platform == "darwin" else 1e3), 1)
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_results(results, baseline)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
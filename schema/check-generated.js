@@ -1,10 +1,11 @@
 #!/usr/bin/env node
 /**
- * Pre-commit hook to verify generated types are in sync with schema.
+ * Pre-commit hook to verify generated types and validator are in sync with schema.
  * Exits with code 1 if regeneration is needed.
  */
 
 import { compile } from 'json-schema-to-typescript'
+import { generatePython } from './python.js'
 import { readFileSync, existsSync } from 'fs'
 import { dirname, join } from 'path'
 import { fileURLToPath } from 'url'
@@ -12,6 +13,7 @@ import { fileURLToPath } from 'url'
 const __dirname = dirname(fileURLToPath(import.meta.url))
 const schemaPath = join(__dirname, 'bundle.schema.json')
 const tsOutputPath = join(__dirname, '..', 'src', 'data', 'bundle.generated.ts')
+const pyOutputPath = join(__dirname, '..', 'skills', 'vibechecked', 'scripts', 'bundle_validator.py')
 async function main() {
   const schema = JSON.parse(readFileSync(schemaPath, 'utf-8'))
 
@@ -40,7 +42,21 @@ async function main() {
     process.exit(1)
   }
 
-  console.log('✓ Generated types are in sync with schema')
+  // Check Python validator
+  if (!existsSync(pyOutputPath)) {
+    console.error('ERROR: skills/vibechecked/scripts/bundle_validator.py does not exist')
+    console.error('Run: npm run generate:types')
+    process.exit(1)
+  }
+
+  const actualPy = readFileSync(pyOutputPath, 'utf-8')
+  if (actualPy !== generatePython(schema)) {
+    console.error('ERROR: skills/vibechecked/scripts/bundle_validator.py is out of sync with schema')
+    console.error('Run: npm run generate:types')
+    process.exit(1)
+  }
+
+  console.log('✓ Generated types and validator are in sync with schema')
 }
 
 main().catch((err) => {
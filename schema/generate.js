@@ -1,10 +1,11 @@
 #!/usr/bin/env node
 /**
- * Generate TypeScript types from JSON Schema.
+ * Generate TypeScript types and the Python bundle validator from JSON Schema.
  * Run with: node schema/generate.js
  */
 
 import { compile } from 'json-schema-to-typescript'
+import { generatePython } from './python.js'
 import { readFileSync, writeFileSync } from 'fs'
 import { dirname, join } from 'path'
 import { fileURLToPath } from 'url'
@@ -12,6 +13,7 @@ import { fileURLToPath } from 'url'
 const __dirname = dirname(fileURLToPath(import.meta.url))
 const schemaPath = join(__dirname, 'bundle.schema.json')
 const tsOutputPath = join(__dirname, '..', 'src', 'data', 'bundle.generated.ts')
+const pyOutputPath = join(__dirname, '..', 'skills', 'vibechecked', 'scripts', 'bundle_validator.py')
 
 async function main() {
   const schema = JSON.parse(readFileSync(schemaPath, 'utf-8'))
@@ -31,6 +33,11 @@ async function main() {
   writeFileSync(tsOutputPath, tsTypes)
   console.log(`  Written to ${tsOutputPath}`)
 
+  // Generate Python validator
+  console.log('Generating Python validator...')
+  writeFileSync(pyOutputPath, generatePython(schema))
+  console.log(`  Written to ${pyOutputPath}`)
+
   console.log('Done!')
 }
 
@@ -0,0 +1,271 @@
+/**
+ * Generate a dependency-free Python validator from JSON Schema.
+ * Used by generate.js and check-generated.js.
+ *
+ * Every $def becomes a function with its checks written out inline, so
+ * validating a bundle is plain attribute and type tests: no schema is
+ * walked at runtime. Keywords the generator does not know are an error,
+ * so a schema change cannot silently go unchecked.
+ */
+
+const HEADER = `# AUTO-GENERATED FILE - DO NOT EDIT
+# Generated from schema/bundle.schema.json
+# Run 'npm run generate:types' to regenerate
+"""Validate an AnonymousBundle against schema/bundle.schema.json.
+
+validate_bundle(bundle) returns a list of error messages, empty when the bundle is valid.
+An optional property set to null counts as absent: the analysis prompts write null for
+categories they found nothing for, and the web app reads them with optional chaining.
+"""
+
+from __future__ import annotations
+
+import re
+`
+
+const HELPERS = `
+
+def _kind(value: object) -> str:
+    """JSON type name of a decoded value, for error messages."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, dict):
+        return "object"
+    return type(value).__name__
+`
+
+// Keywords each type may carry; anything else fails generation
+const KNOWN = {
+  common: ['type', 'description', 'title', '$schema', '$id', '$defs'],
+  object: ['properties', 'required', 'additionalProperties'],
+  array: ['items', 'minItems', 'maxItems'],
+  string: ['enum', 'pattern', 'format'],
+  integer: ['minimum', 'maximum'],
+}
+
+// RFC 3339 date-time, as JSON Schema's "format": "date-time"
+const DATE_TIME = '^\\d{4}-\\d{2}-\\d{2}[Tt]\\d{2}:\\d{2}:\\d{2}(\\.\\d+)?([Zz]|[+-]\\d{2}:\\d{2})$'
+
+function snake(name) {
+  return name.replace(/([a-z0-9])([A-Z])/g, '$1_$2').toLowerCase()
+}
+
+function pyString(value) {
+  return JSON.stringify(value)
+}
+
+// A raw string literal for a regular expression, as long as it needs no escaping
+function pyRegex(pattern) {
+  if (pattern.includes('"') || pattern.endsWith('\\')) {
+    throw new Error(`Unsupported pattern: ${pattern}`)
+  }
+  return `r"${pattern}"`
+}
+
+class Generator {
+  constructor(schema) {
+    this.defs = schema.$defs || {}
+    this.patterns = []
+  }
+
+  checkKeywords(schema, where) {
+    if (schema.$ref) {
+      const extra = Object.keys(schema).filter((key) => key !== '$ref' && key !== 'description')
+      if (extra.length) throw new Error(`${where}: $ref with ${extra.join(', ')} is not supported`)
+      return
+    }
+    const allowed = KNOWN[schema.type]
+    if (!allowed) throw new Error(`${where}: unsupported type ${JSON.stringify(schema.type)}`)
+    for (const key of Object.keys(schema)) {
+      if (!KNOWN.common.includes(key) && !allowed.includes(key)) {
+        throw new Error(`${where}: unsupported keyword "${key}"`)
+      }
+    }
+    if (schema.format && schema.format !== 'date-time') {
+      throw new Error(`${where}: unsupported format "${schema.format}"`)
+    }
+  }
+
+  refName(ref) {
+    const match = /^#\/\$defs\/(\w+)$/.exec(ref)
+    if (!match || !this.defs[match[1]]) throw new Error(`Unresolved $ref ${ref}`)
+    return `_check_${snake(match[1])}`
+  }
+
+  pattern(source) {
+    let index = this.patterns.indexOf(source)
+    if (index < 0) index = this.patterns.push(source) - 1
+    return `_PATTERN_${index}`
+  }
+
+  // Lines checking the value named expr; path is an f-string fragment naming it in errors
+  emit(schema, expr, path, indent, depth, where) {
+    this.checkKeywords(schema, where)
+    const pad = ' '.repeat(indent)
+    const fail = (message) => `${pad}    errors.append(f"${path}: ${message}")`
+    if (schema.$ref) {
+      return [`${pad}${this.refName(schema.$ref)}(${expr}, f"${path}", errors)`]
+    }
+    switch (schema.type) {
+      case 'integer': {
+        const lines = [
+          `${pad}if not (${expr}.__class__ is int or (${expr}.__class__ is float and ${expr}.is_integer())):`,
+          fail(`expected integer, got {_kind(${expr})}`),
+        ]
+        if (schema.minimum !== undefined) {
+          lines.push(`${pad}elif ${expr} < ${schema.minimum}:`, fail(`{${expr}} is below the minimum ${schema.minimum}`))
+        }
+        if (schema.maximum !== undefined) {
+          lines.push(`${pad}elif ${expr} > ${schema.maximum}:`, fail(`{${expr}} is above the maximum ${schema.maximum}`))
+        }
+        return lines
+      }
+      case 'string': {
+        const lines = [`${pad}if ${expr}.__class__ is not str:`, fail(`expected string, got {_kind(${expr})}`)]
+        if (schema.enum) {
+          const options = `(${schema.enum.map(pyString).join(', ')})`
+          lines.push(`${pad}elif ${expr} not in ${options}:`, fail(`{${expr}!r} is not one of ${schema.enum.join(', ')}`))
+        }
+        if (schema.pattern) {
+          const pattern = this.pattern(schema.pattern)
+          lines.push(
+            `${pad}elif not ${pattern}.search(${expr}):`,
+            fail(`{${expr}!r} does not match {${pattern}.pattern}`)
+          )
+        }
+        if (schema.format === 'date-time') {
+          lines.push(
+            `${pad}elif not ${this.pattern(DATE_TIME)}.search(${expr}):`,
+            fail(`{${expr}!r} is not an RFC 3339 date-time`)
+          )
+        }
+        return lines
+      }
+      case 'array': {
+        const item = `item${depth}`
+        const index = `index${depth}`
+        const lines = [`${pad}if ${expr}.__class__ is not list:`, fail(`expected array, got {_kind(${expr})}`)]
+        if (schema.minItems !== undefined) {
+          lines.push(
+            `${pad}elif len(${expr}) < ${schema.minItems}:`,
+            fail(`expected at least ${schema.minItems} items, got {len(${expr})}`)
+          )
+        }
+        if (schema.maxItems !== undefined) {
+          lines.push(
+            `${pad}elif len(${expr}) > ${schema.maxItems}:`,
+            fail(`expected at most ${schema.maxItems} items, got {len(${expr})}`)
+          )
+        }
+        if (schema.items) {
+          lines.push(
+            `${pad}else:`,
+            `${pad}    for ${index}, ${item} in enumerate(${expr}):`,
+            ...this.emit(schema.items, item, `${path}[{${index}}]`, indent + 8, depth + 1, `${where}.items`)
+          )
+        }
+        return lines
+      }
+      case 'object': {
+        if (schema.properties) {
+          throw new Error(`${where}: objects with properties must be $defs`)
+        }
+        const lines = [`${pad}if ${expr}.__class__ is not dict:`, fail(`expected object, got {_kind(${expr})}`)]
+        if (typeof schema.additionalProperties === 'object') {
+          const key = `key${depth}`
+          const entry = `entry${depth}`
+          lines.push(
+            `${pad}else:`,
+            `${pad}    for ${key}, ${entry} in ${expr}.items():`,
+            ...this.emit(schema.additionalProperties, entry, `${path}.{${key}}`, indent + 8, depth + 1, `${where}.*`)
+          )
+        } else if (schema.additionalProperties === false) {
+          lines.push(`${pad}elif ${expr}:`, fail(`unexpected properties {', '.join(${expr})}`))
+        }
+        return lines
+      }
+    }
+    throw new Error(`${where}: unsupported type ${JSON.stringify(schema.type)}`)
+  }
+
+  // A function checking an object with declared properties
+  emitFunction(name, schema, where, docstring) {
+    this.checkKeywords(schema, where)
+    if (schema.type !== 'object' || !schema.properties) {
+      throw new Error(`${where}: only object $defs with properties are supported`)
+    }
+    const names = Object.keys(schema.properties)
+    const required = schema.required || []
+    const prefix = name.replace(/^_check/, '').toUpperCase()
+    const lines = [
+      '',
+      '',
+      `${prefix}_PROPERTIES = frozenset(`,
+      '    {',
+      ...names.map((key) => `        ${pyString(key)},`),
+      '    }',
+      ')',
+      '',
+      '',
+      `def ${name}(value: object, path: str, errors: list) -> None:`,
+      `    """${docstring}"""`,
+      '    if value.__class__ is not dict:',
+      '        errors.append(f"{path}: expected object, got {_kind(value)}")',
+      '        return',
+    ]
+    for (const key of required) {
+      if (!names.includes(key)) throw new Error(`${where}: required "${key}" is not a property`)
+      lines.push(`    if ${pyString(key)} not in value:`, `        errors.append(f"{path}: missing ${key}")`)
+    }
+    if (schema.additionalProperties === false) {
+      lines.push(
+        '    for key in value:',
+        `        if key not in ${prefix}_PROPERTIES:`,
+        '            errors.append(f"{path}: unexpected property {key}")'
+      )
+    } else if (schema.additionalProperties !== undefined) {
+      throw new Error(`${where}: additionalProperties on $defs must be false or absent`)
+    }
+    for (const key of names) {
+      const property = schema.properties[key]
+      if (required.includes(key)) {
+        lines.push(`    if ${pyString(key)} in value:`, `        item = value[${pyString(key)}]`)
+      } else {
+        lines.push(`    item = value.get(${pyString(key)})`, '    if item is not None:')
+      }
+      lines.push(...this.emit(property, 'item', `{path}.${key}`, 8, 1, `${where}.${key}`))
+    }
+    return lines
+  }
+
+  generate(schema) {
+    const body = []
+    for (const [name, def] of Object.entries(this.defs)) {
+      body.push(...this.emitFunction(`_check_${snake(name)}`, def, `$defs.${name}`, `Check one ${name} object.`))
+    }
+    body.push(...this.emitFunction('_check_bundle', schema, 'bundle', `Check a whole ${schema.title}.`))
+    body.push(
+      '',
+      '',
+      'def validate_bundle(bundle: object) -> list[str]:',
+      '    """Error messages for everything in bundle the schema does not allow; empty if it is valid."""',
+      '    errors: list[str] = []',
+      '    _check_bundle(bundle, "bundle", errors)',
+      '    return errors'
+    )
+    const patterns = this.patterns.map((source, index) => `_PATTERN_${index} = re.compile(${pyRegex(source)}, re.ASCII)`)
+    return [HEADER, ...patterns, HELPERS.trimEnd(), ...body, ''].join('\n')
+  }
+}
+
+export function generatePython(schema) {
+  return new Generator(schema).generate(schema)
+}
@@ -0,0 +1,769 @@
+# AUTO-GENERATED FILE - DO NOT EDIT
+# Generated from schema/bundle.schema.json
+# Run 'npm run generate:types' to regenerate
+"""Validate an AnonymousBundle against schema/bundle.schema.json.
+
+validate_bundle(bundle) returns a list of error messages, empty when the bundle is valid.
+An optional property set to null counts as absent: the analysis prompts write null for
+categories they found nothing for, and the web app reads them with optional chaining.
+"""
+
+from __future__ import annotations
+
+import re
+
+_PATTERN_0 = re.compile(r"^\d{4}-\d{2}-\d{2}$", re.ASCII)
+_PATTERN_1 = re.compile(r"^\d{4}-\d{2}-\d{2}[Tt]\d{2}:\d{2}:\d{2}(\.\d+)?([Zz]|[+-]\d{2}:\d{2})$", re.ASCII)
+
+
+def _kind(value: object) -> str:
+    """JSON type name of a decoded value, for error messages."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, dict):
+        return "object"
+    return type(value).__name__
+
+
+_STATS_PROPERTIES = frozenset(
+    {
+        "totalSessions",
+        "totalMessages",
+        "totalTokens",
+        "totalToolCalls",
+        "toolUsage",
+        "modelUsage",
+        "hourCounts",
+        "peakHour",
+        "longestSessionMinutes",
+        "totalMinutes",
+        "projectCount",
+        "daysActive",
+        "activeDates",
+    }
+)
+
+
+def _check_stats(value: object, path: str, errors: list) -> None:
+    """Check one Stats object."""
+    if value.__class__ is not dict:
+        errors.append(f"{path}: expected object, got {_kind(value)}")
+        return
+    if "totalSessions" not in value:
+        errors.append(f"{path}: missing totalSessions")
+    if "totalMessages" not in value:
+        errors.append(f"{path}: missing totalMessages")
+    if "totalTokens" not in value:
+        errors.append(f"{path}: missing totalTokens")
+    if "totalToolCalls" not in value:
+        errors.append(f"{path}: missing totalToolCalls")
+    if "toolUsage" not in value:
+        errors.append(f"{path}: missing toolUsage")
+    if "modelUsage" not in value:
+        errors.append(f"{path}: missing modelUsage")
+    if "hourCounts" not in value:
+        errors.append(f"{path}: missing hourCounts")
+    if "peakHour" not in value:
+        errors.append(f"{path}: missing peakHour")
+    if "longestSessionMinutes" not in value:
+        errors.append(f"{path}: missing longestSessionMinutes")
+    if "projectCount" not in value:
+        errors.append(f"{path}: missing projectCount")
+    if "daysActive" not in value:
+        errors.append(f"{path}: missing daysActive")
+    for key in value:
+        if key not in _STATS_PROPERTIES:
+            errors.append(f"{path}: unexpected property {key}")
+    if "totalSessions" in value:
+        item = value["totalSessions"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.totalSessions: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.totalSessions: {item} is below the minimum 0")
+    if "totalMessages" in value:
+        item = value["totalMessages"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.totalMessages: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.totalMessages: {item} is below the minimum 0")
+    if "totalTokens" in value:
+        item = value["totalTokens"]
+        _check_token_counts(item, f"{path}.totalTokens", errors)
+    if "totalToolCalls" in value:
+        item = value["totalToolCalls"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.totalToolCalls: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.totalToolCalls: {item} is below the minimum 0")
+    if "toolUsage" in value:
+        item = value["toolUsage"]
+        if item.__class__ is not dict:
+            errors.append(f"{path}.toolUsage: expected object, got {_kind(item)}")
+        else:
+            for key1, entry1 in item.items():
+                if not (entry1.__class__ is int or (entry1.__class__ is float and entry1.is_integer())):
+                    errors.append(f"{path}.toolUsage.{key1}: expected integer, got {_kind(entry1)}")
+    if "modelUsage" in value:
+        item = value["modelUsage"]
+        if item.__class__ is not dict:
+            errors.append(f"{path}.modelUsage: expected object, got {_kind(item)}")
+        else:
+            for key1, entry1 in item.items():
+                if not (entry1.__class__ is int or (entry1.__class__ is float and entry1.is_integer())):
+                    errors.append(f"{path}.modelUsage.{key1}: expected integer, got {_kind(entry1)}")
+    if "hourCounts" in value:
+        item = value["hourCounts"]
+        if item.__class__ is not list:
+            errors.append(f"{path}.hourCounts: expected array, got {_kind(item)}")
+        elif len(item) < 24:
+            errors.append(f"{path}.hourCounts: expected at least 24 items, got {len(item)}")
+        elif len(item) > 24:
+            errors.append(f"{path}.hourCounts: expected at most 24 items, got {len(item)}")
+        else:
+            for index1, item1 in enumerate(item):
+                if not (item1.__class__ is int or (item1.__class__ is float and item1.is_integer())):
+                    errors.append(f"{path}.hourCounts[{index1}]: expected integer, got {_kind(item1)}")
+    if "peakHour" in value:
+        item = value["peakHour"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.peakHour: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.peakHour: {item} is below the minimum 0")
+        elif item > 23:
+            errors.append(f"{path}.peakHour: {item} is above the maximum 23")
+    if "longestSessionMinutes" in value:
+        item = value["longestSessionMinutes"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.longestSessionMinutes: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.longestSessionMinutes: {item} is below the minimum 0")
+    item = value.get("totalMinutes")
+    if item is not None:
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.totalMinutes: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.totalMinutes: {item} is below the minimum 0")
+    if "projectCount" in value:
+        item = value["projectCount"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.projectCount: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.projectCount: {item} is below the minimum 0")
+    if "daysActive" in value:
+        item = value["daysActive"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.daysActive: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.daysActive: {item} is below the minimum 0")
+    item = value.get("activeDates")
+    if item is not None:
+        if item.__class__ is not list:
+            errors.append(f"{path}.activeDates: expected array, got {_kind(item)}")
+        else:
+            for index1, item1 in enumerate(item):
+                _check_daily_activity(item1, f"{path}.activeDates[{index1}]", errors)
+
+
+_TOKEN_COUNTS_PROPERTIES = frozenset(
+    {
+        "input",
+        "output",
+        "cached",
+        "cacheCreation",
+    }
+)
+
+
+def _check_token_counts(value: object, path: str, errors: list) -> None:
+    """Check one TokenCounts object."""
+    if value.__class__ is not dict:
+        errors.append(f"{path}: expected object, got {_kind(value)}")
+        return
+    if "input" not in value:
+        errors.append(f"{path}: missing input")
+    if "output" not in value:
+        errors.append(f"{path}: missing output")
+    if "cached" not in value:
+        errors.append(f"{path}: missing cached")
+    for key in value:
+        if key not in _TOKEN_COUNTS_PROPERTIES:
+            errors.append(f"{path}: unexpected property {key}")
+    if "input" in value:
+        item = value["input"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.input: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.input: {item} is below the minimum 0")
+    if "output" in value:
+        item = value["output"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.output: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.output: {item} is below the minimum 0")
+    if "cached" in value:
+        item = value["cached"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.cached: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.cached: {item} is below the minimum 0")
+    item = value.get("cacheCreation")
+    if item is not None:
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.cacheCreation: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.cacheCreation: {item} is below the minimum 0")
+
+
+_DAILY_ACTIVITY_PROPERTIES = frozenset(
+    {
+        "date",
+        "sessions",
+    }
+)
+
+
+def _check_daily_activity(value: object, path: str, errors: list) -> None:
+    """Check one DailyActivity object."""
+    if value.__class__ is not dict:
+        errors.append(f"{path}: expected object, got {_kind(value)}")
+        return
+    if "date" not in value:
+        errors.append(f"{path}: missing date")
+    if "sessions" not in value:
+        errors.append(f"{path}: missing sessions")
+    for key in value:
+        if key not in _DAILY_ACTIVITY_PROPERTIES:
+            errors.append(f"{path}: unexpected property {key}")
+    if "date" in value:
+        item = value["date"]
+        if item.__class__ is not str:
+            errors.append(f"{path}.date: expected string, got {_kind(item)}")
+        elif not _PATTERN_0.search(item):
+            errors.append(f"{path}.date: {item!r} does not match {_PATTERN_0.pattern}")
+    if "sessions" in value:
+        item = value["sessions"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.sessions: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.sessions: {item} is below the minimum 0")
+
+
+_QUIRKS_PROPERTIES = frozenset(
+    {
+        "interruptCount",
+        "abandonedSessions",
+        "lateNightSessions",
+        "earlyMorningSessions",
+        "weekendPercentage",
+        "shortestSessionSeconds",
+        "longestStreakDays",
+    }
+)
+
+
+def _check_quirks(value: object, path: str, errors: list) -> None:
+    """Check one Quirks object."""
+    if value.__class__ is not dict:
+        errors.append(f"{path}: expected object, got {_kind(value)}")
+        return
+    if "interruptCount" not in value:
+        errors.append(f"{path}: missing interruptCount")
+    if "abandonedSessions" not in value:
+        errors.append(f"{path}: missing abandonedSessions")
+    if "lateNightSessions" not in value:
+        errors.append(f"{path}: missing lateNightSessions")
+    if "earlyMorningSessions" not in value:
+        errors.append(f"{path}: missing earlyMorningSessions")
+    if "weekendPercentage" not in value:
+        errors.append(f"{path}: missing weekendPercentage")
+    if "shortestSessionSeconds" not in value:
+        errors.append(f"{path}: missing shortestSessionSeconds")
+    if "longestStreakDays" not in value:
+        errors.append(f"{path}: missing longestStreakDays")
+    for key in value:
+        if key not in _QUIRKS_PROPERTIES:
+            errors.append(f"{path}: unexpected property {key}")
+    if "interruptCount" in value:
+        item = value["interruptCount"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.interruptCount: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.interruptCount: {item} is below the minimum 0")
+    if "abandonedSessions" in value:
+        item = value["abandonedSessions"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.abandonedSessions: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.abandonedSessions: {item} is below the minimum 0")
+    if "lateNightSessions" in value:
+        item = value["lateNightSessions"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.lateNightSessions: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.lateNightSessions: {item} is below the minimum 0")
+    if "earlyMorningSessions" in value:
+        item = value["earlyMorningSessions"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.earlyMorningSessions: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.earlyMorningSessions: {item} is below the minimum 0")
+    if "weekendPercentage" in value:
+        item = value["weekendPercentage"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.weekendPercentage: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.weekendPercentage: {item} is below the minimum 0")
+        elif item > 100:
+            errors.append(f"{path}.weekendPercentage: {item} is above the maximum 100")
+    if "shortestSessionSeconds" in value:
+        item = value["shortestSessionSeconds"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.shortestSessionSeconds: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.shortestSessionSeconds: {item} is below the minimum 0")
+    if "longestStreakDays" in value:
+        item = value["longestStreakDays"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.longestStreakDays: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.longestStreakDays: {item} is below the minimum 0")
+
+
+_INSIGHTS_PROPERTIES = frozenset(
+    {
+        "memorablePrompts",
+        "communicationStyle",
+        "obsessions",
+        "contrasts",
+        "topWords",
+        "topPhrases",
+        "dominantTopics",
+    }
+)
+
+
+def _check_insights(value: object, path: str, errors: list) -> None:
+    """Check one Insights object."""
+    if value.__class__ is not dict:
+        errors.append(f"{path}: expected object, got {_kind(value)}")
+        return
+    for key in value:
+        if key not in _INSIGHTS_PROPERTIES:
+            errors.append(f"{path}: unexpected property {key}")
+    item = value.get("memorablePrompts")
+    if item is not None:
+        _check_memorable_prompts(item, f"{path}.memorablePrompts", errors)
+    item = value.get("communicationStyle")
+    if item is not None:
+        _check_communication_style(item, f"{path}.communicationStyle", errors)
+    item = value.get("obsessions")
+    if item is not None:
+        _check_obsessions(item, f"{path}.obsessions", errors)
+    item = value.get("contrasts")
+    if item is not None:
+        _check_contrasts(item, f"{path}.contrasts", errors)
+    item = value.get("topWords")
+    if item is not None:
+        if item.__class__ is not list:
+            errors.append(f"{path}.topWords: expected array, got {_kind(item)}")
+        else:
+            for index1, item1 in enumerate(item):
+                _check_word_count(item1, f"{path}.topWords[{index1}]", errors)
+    item = value.get("topPhrases")
+    if item is not None:
+        if item.__class__ is not list:
+            errors.append(f"{path}.topPhrases: expected array, got {_kind(item)}")
+        else:
+            for index1, item1 in enumerate(item):
+                _check_phrase_count(item1, f"{path}.topPhrases[{index1}]", errors)
+    item = value.get("dominantTopics")
+    if item is not None:
+        if item.__class__ is not list:
+            errors.append(f"{path}.dominantTopics: expected array, got {_kind(item)}")
+        else:
+            for index1, item1 in enumerate(item):
+                if item1.__class__ is not str:
+                    errors.append(f"{path}.dominantTopics[{index1}]: expected string, got {_kind(item1)}")
+
+
+_MEMORABLE_PROMPTS_PROPERTIES = frozenset(
+    {
+        "funniest",
+        "mostFrustrated",
+        "mostAmbitious",
+        "weirdest",
+    }
+)
+
+
+def _check_memorable_prompts(value: object, path: str, errors: list) -> None:
+    """Check one MemorablePrompts object."""
+    if value.__class__ is not dict:
+        errors.append(f"{path}: expected object, got {_kind(value)}")
+        return
+    for key in value:
+        if key not in _MEMORABLE_PROMPTS_PROPERTIES:
+            errors.append(f"{path}: unexpected property {key}")
+    item = value.get("funniest")
+    if item is not None:
+        _check_prompt_with_context(item, f"{path}.funniest", errors)
+    item = value.get("mostFrustrated")
+    if item is not None:
+        _check_prompt_with_context(item, f"{path}.mostFrustrated", errors)
+    item = value.get("mostAmbitious")
+    if item is not None:
+        _check_prompt_with_context(item, f"{path}.mostAmbitious", errors)
+    item = value.get("weirdest")
+    if item is not None:
+        _check_prompt_with_context(item, f"{path}.weirdest", errors)
+
+
+_PROMPT_WITH_CONTEXT_PROPERTIES = frozenset(
+    {
+        "prompt",
+        "context",
+    }
+)
+
+
+def _check_prompt_with_context(value: object, path: str, errors: list) -> None:
+    """Check one PromptWithContext object."""
+    if value.__class__ is not dict:
+        errors.append(f"{path}: expected object, got {_kind(value)}")
+        return
+    if "prompt" not in value:
+        errors.append(f"{path}: missing prompt")
+    for key in value:
+        if key not in _PROMPT_WITH_CONTEXT_PROPERTIES:
+            errors.append(f"{path}: unexpected property {key}")
+    if "prompt" in value:
+        item = value["prompt"]
+        if item.__class__ is not str:
+            errors.append(f"{path}.prompt: expected string, got {_kind(item)}")
+    item = value.get("context")
+    if item is not None:
+        if item.__class__ is not str:
+            errors.append(f"{path}.context: expected string, got {_kind(item)}")
+
+
+_COMMUNICATION_STYLE_PROPERTIES = frozenset(
+    {
+        "catchphrases",
+        "signatureOpeners",
+        "verbalTics",
+        "politenessLevel",
+        "averagePromptLength",
+        "promptingEvolution",
+    }
+)
+
+
+def _check_communication_style(value: object, path: str, errors: list) -> None:
+    """Check one CommunicationStyle object."""
+    if value.__class__ is not dict:
+        errors.append(f"{path}: expected object, got {_kind(value)}")
+        return
+    for key in value:
+        if key not in _COMMUNICATION_STYLE_PROPERTIES:
+            errors.append(f"{path}: unexpected property {key}")
+    item = value.get("catchphrases")
+    if item is not None:
+        if item.__class__ is not list:
+            errors.append(f"{path}.catchphrases: expected array, got {_kind(item)}")
+        else:
+            for index1, item1 in enumerate(item):
+                if item1.__class__ is not str:
+                    errors.append(f"{path}.catchphrases[{index1}]: expected string, got {_kind(item1)}")
+    item = value.get("signatureOpeners")
+    if item is not None:
+        if item.__class__ is not list:
+            errors.append(f"{path}.signatureOpeners: expected array, got {_kind(item)}")
+        else:
+            for index1, item1 in enumerate(item):
+                if item1.__class__ is not str:
+                    errors.append(f"{path}.signatureOpeners[{index1}]: expected string, got {_kind(item1)}")
+    item = value.get("verbalTics")
+    if item is not None:
+        if item.__class__ is not list:
+            errors.append(f"{path}.verbalTics: expected array, got {_kind(item)}")
+        else:
+            for index1, item1 in enumerate(item):
+                if item1.__class__ is not str:
+                    errors.append(f"{path}.verbalTics[{index1}]: expected string, got {_kind(item1)}")
+    item = value.get("politenessLevel")
+    if item is not None:
+        if item.__class__ is not str:
+            errors.append(f"{path}.politenessLevel: expected string, got {_kind(item)}")
+        elif item not in ("diplomatic", "direct", "demanding", "apologetic"):
+            errors.append(f"{path}.politenessLevel: {item!r} is not one of diplomatic, direct, demanding, apologetic")
+    item = value.get("averagePromptLength")
+    if item is not None:
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.averagePromptLength: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.averagePromptLength: {item} is below the minimum 0")
+    item = value.get("promptingEvolution")
+    if item is not None:
+        if item.__class__ is not str:
+            errors.append(f"{path}.promptingEvolution: expected string, got {_kind(item)}")
+
+
+_OBSESSIONS_PROPERTIES = frozenset(
+    {
+        "topics",
+        "frequentlyRevisited",
+        "actualProjects",
+    }
+)
+
+
+def _check_obsessions(value: object, path: str, errors: list) -> None:
+    """Check one Obsessions object."""
+    if value.__class__ is not dict:
+        errors.append(f"{path}: expected object, got {_kind(value)}")
+        return
+    for key in value:
+        if key not in _OBSESSIONS_PROPERTIES:
+            errors.append(f"{path}: unexpected property {key}")
+    item = value.get("topics")
+    if item is not None:
+        if item.__class__ is not list:
+            errors.append(f"{path}.topics: expected array, got {_kind(item)}")
+        else:
+            for index1, item1 in enumerate(item):
+                if item1.__class__ is not str:
+                    errors.append(f"{path}.topics[{index1}]: expected string, got {_kind(item1)}")
+    item = value.get("frequentlyRevisited")
+    if item is not None:
+        if item.__class__ is not list:
+            errors.append(f"{path}.frequentlyRevisited: expected array, got {_kind(item)}")
+        else:
+            for index1, item1 in enumerate(item):
+                if item1.__class__ is not str:
+                    errors.append(f"{path}.frequentlyRevisited[{index1}]: expected string, got {_kind(item1)}")
+    item = value.get("actualProjects")
+    if item is not None:
+        if item.__class__ is not list:
+            errors.append(f"{path}.actualProjects: expected array, got {_kind(item)}")
+        else:
+            for index1, item1 in enumerate(item):
+                if item1.__class__ is not str:
+                    errors.append(f"{path}.actualProjects[{index1}]: expected string, got {_kind(item1)}")
+
+
+_CONTRASTS_PROPERTIES = frozenset(
+    {
+        "shortestEffective",
+        "longestRamble",
+        "politestMoment",
+        "mostDemanding",
+        "capsLockPrompts",
+        "vaguePromptCount",
+        "undoRequests",
+    }
+)
+
+
+def _check_contrasts(value: object, path: str, errors: list) -> None:
+    """Check one Contrasts object."""
+    if value.__class__ is not dict:
+        errors.append(f"{path}: expected object, got {_kind(value)}")
+        return
+    for key in value:
+        if key not in _CONTRASTS_PROPERTIES:
+            errors.append(f"{path}: unexpected property {key}")
+    item = value.get("shortestEffective")
+    if item is not None:
+        if item.__class__ is not str:
+            errors.append(f"{path}.shortestEffective: expected string, got {_kind(item)}")
+    item = value.get("longestRamble")
+    if item is not None:
+        if item.__class__ is not str:
+            errors.append(f"{path}.longestRamble: expected string, got {_kind(item)}")
+    item = value.get("politestMoment")
+    if item is not None:
+        if item.__class__ is not str:
+            errors.append(f"{path}.politestMoment: expected string, got {_kind(item)}")
+    item = value.get("mostDemanding")
+    if item is not None:
+        if item.__class__ is not str:
+            errors.append(f"{path}.mostDemanding: expected string, got {_kind(item)}")
+    item = value.get("capsLockPrompts")
+    if item is not None:
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.capsLockPrompts: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.capsLockPrompts: {item} is below the minimum 0")
+    item = value.get("vaguePromptCount")
+    if item is not None:
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.vaguePromptCount: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.vaguePromptCount: {item} is below the minimum 0")
+    item = value.get("undoRequests")
+    if item is not None:
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.undoRequests: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.undoRequests: {item} is below the minimum 0")
+
+
+_WORD_COUNT_PROPERTIES = frozenset(
+    {
+        "word",
+        "count",
+    }
+)
+
+
+def _check_word_count(value: object, path: str, errors: list) -> None:
+    """Check one WordCount object."""
+    if value.__class__ is not dict:
+        errors.append(f"{path}: expected object, got {_kind(value)}")
+        return
+    if "word" not in value:
+        errors.append(f"{path}: missing word")
+    if "count" not in value:
+        errors.append(f"{path}: missing count")
+    for key in value:
+        if key not in _WORD_COUNT_PROPERTIES:
+            errors.append(f"{path}: unexpected property {key}")
+    if "word" in value:
+        item = value["word"]
+        if item.__class__ is not str:
+            errors.append(f"{path}.word: expected string, got {_kind(item)}")
+    if "count" in value:
+        item = value["count"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.count: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.count: {item} is below the minimum 0")
+
+
+_PHRASE_COUNT_PROPERTIES = frozenset(
+    {
+        "phrase",
+        "count",
+    }
+)
+
+
+def _check_phrase_count(value: object, path: str, errors: list) -> None:
+    """Check one PhraseCount object."""
+    if value.__class__ is not dict:
+        errors.append(f"{path}: expected object, got {_kind(value)}")
+        return
+    if "phrase" not in value:
+        errors.append(f"{path}: missing phrase")
+    if "count" not in value:
+        errors.append(f"{path}: missing count")
+    for key in value:
+        if key not in _PHRASE_COUNT_PROPERTIES:
+            errors.append(f"{path}: unexpected property {key}")
+    if "phrase" in value:
+        item = value["phrase"]
+        if item.__class__ is not str:
+            errors.append(f"{path}.phrase: expected string, got {_kind(item)}")
+    if "count" in value:
+        item = value["count"]
+        if not (item.__class__ is int or (item.__class__ is float and item.is_integer())):
+            errors.append(f"{path}.count: expected integer, got {_kind(item)}")
+        elif item < 0:
+            errors.append(f"{path}.count: {item} is below the minimum 0")
+
+
+_BUNDLE_PROPERTIES = frozenset(
+    {
+        "stats",
+        "quirks",
+        "insights",
+        "personaId",
+        "traits",
+        "promptingStyle",
+        "communicationTone",
+        "funFacts",
+        "generatedAt",
+    }
+)
+
+
+def _check_bundle(value: object, path: str, errors: list) -> None:
+    """Check a whole AnonymousBundle."""
+    if value.__class__ is not dict:
+        errors.append(f"{path}: expected object, got {_kind(value)}")
+        return
+    if "stats" not in value:
+        errors.append(f"{path}: missing stats")
+    if "personaId" not in value:
+        errors.append(f"{path}: missing personaId")
+    if "traits" not in value:
+        errors.append(f"{path}: missing traits")
+    if "promptingStyle" not in value:
+        errors.append(f"{path}: missing promptingStyle")
+    if "communicationTone" not in value:
+        errors.append(f"{path}: missing communicationTone")
+    if "funFacts" not in value:
+        errors.append(f"{path}: missing funFacts")
+    if "generatedAt" not in value:
+        errors.append(f"{path}: missing generatedAt")
+    for key in value:
+        if key not in _BUNDLE_PROPERTIES:
+            errors.append(f"{path}: unexpected property {key}")
+    if "stats" in value:
+        item = value["stats"]
+        _check_stats(item, f"{path}.stats", errors)
+    item = value.get("quirks")
+    if item is not None:
+        _check_quirks(item, f"{path}.quirks", errors)
+    item = value.get("insights")
+    if item is not None:
+        _check_insights(item, f"{path}.insights", errors)
+    if "personaId" in value:
+        item = value["personaId"]
+        if item.__class__ is not str:
+            errors.append(f"{path}.personaId: expected string, got {_kind(item)}")
+    if "traits" in value:
+        item = value["traits"]
+        if item.__class__ is not list:
+            errors.append(f"{path}.traits: expected array, got {_kind(item)}")
+        else:
+            for index1, item1 in enumerate(item):
+                if item1.__class__ is not str:
+                    errors.append(f"{path}.traits[{index1}]: expected string, got {_kind(item1)}")
+    if "promptingStyle" in value:
+        item = value["promptingStyle"]
+        if item.__class__ is not str:
+            errors.append(f"{path}.promptingStyle: expected string, got {_kind(item)}")
+    if "communicationTone" in value:
+        item = value["communicationTone"]
+        if item.__class__ is not str:
+            errors.append(f"{path}.communicationTone: expected string, got {_kind(item)}")
+    if "funFacts" in value:
+        item = value["funFacts"]
+        if item.__class__ is not list:
+            errors.append(f"{path}.funFacts: expected array, got {_kind(item)}")
+        else:
+            for index1, item1 in enumerate(item):
+                if item1.__class__ is not str:
+                    errors.append(f"{path}.funFacts[{index1}]: expected string, got {_kind(item1)}")
+    if "generatedAt" in value:
+        item = value["generatedAt"]
+        if item.__class__ is not str:
+            errors.append(f"{path}.generatedAt: expected string, got {_kind(item)}")
+        elif not _PATTERN_1.search(item):
+            errors.append(f"{path}.generatedAt: {item!r} is not an RFC 3339 date-time")
+
+
+def validate_bundle(bundle: object) -> list[str]:
+    """Error messages for everything in bundle the schema does not allow; empty if it is valid."""
+    errors: list[str] = []
+    _check_bundle(bundle, "bundle", errors)
+    return errors
@@ -2,27 +2,64 @@
 """Extract Claude Code usage stats for VibeChecked.
 
 Reads local stats and session data, outputs JSON to stdout.
-No external dependencies - stdlib only.
+No external dependencies - stdlib only (--compress zstd optionally uses zstandard).
+Session lines are decoded with orjson or simdjson when installed; set
+VIBECHECKED_JSON_BACKEND=json (or orjson, simdjson) to pick one.
 
 Usage:
     python3 extract_stats.py                          # Extract stats + write prompts
     python3 extract_stats.py --prompts-dir /tmp/vibes  # Custom prompts directory
     python3 extract_stats.py --claude-dir ~/.claude     # Custom claude directory
+    python3 extract_stats.py --no-cache                # Ignore digests cached by earlier runs
+    python3 extract_stats.py --jobs 4                  # Parse session files on 4 processes
+    python3 extract_stats.py --since 30d               # Only the last 30 days (also --until)
+    python3 extract_stats.py --top-words-capacity 2000 # Approximate top words in bounded memory
+    python3 extract_stats.py --compress gzip           # Compressed prompt chunks + prompts.idx
+    python3 extract_stats.py --dedupe-prompts --prompt-budget 4M  # Fewer, deduplicated prompts
+    python3 extract_stats.py --index                   # Keep sessions in a SQLite index
+    python3 extract_stats.py --index --project=-Users-me-app  # One project's stats from the index
+    python3 extract_stats.py --watch                   # Keep a snapshot up to date while sessions grow
+    python3 extract_stats.py --snapshot                # Print that snapshot if it is still current
+    python3 extract_stats.py --partial box.json        # Mergeable aggregate of this tree, no prompts
+    python3 extract_stats.py --merge box.json          # Stats of this tree plus other trees' aggregates
+    python3 extract_stats.py --events /tmp/vibes-events  # Also export every event as typed columns
+    python3 extract_stats.py --profile                 # Per-stage timings on stderr
 """
 
 from __future__ import annotations
 
 import argparse
+import array
+import copy
+import cProfile
+import gzip
+import hashlib
+import heapq
+import importlib
+import io
 import json
+import mmap
+import os
+import pstats
 import re
 import shutil
+import sqlite3
+import struct
 import sys
+import time
+import tracemalloc
+import zlib
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import date, datetime, timedelta, timezone
+from datetime import time as dt_time
+from functools import partial
 from pathlib import Path
-from typing import Dict, Iterator, List, Tuple
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
 
 # Common English stopwords to filter out from word counts
+# fmt: off
 STOPWORDS = frozenset(
     {
         "a", "an", "the", "and", "or", "but", "if", "then", "else", "when",
@@ -75,9 +112,11 @@ STOPWORDS = frozenset(
         "true", "false", "available",
     }
 )
+# fmt: on
 
-# Word tokenization pattern
-WORD_PATTERN = re.compile(r"[a-zA-Z][a-zA-Z0-9_-]*[a-zA-Z0-9]|[a-zA-Z]")
+# Word tokenization pattern, applied to lowercased text. Single letters never count as
+# words, so they are not matched at all rather than matched and thrown away.
+WORD_PATTERN = re.compile(r"[a-z][a-z0-9_-]*[a-z0-9]")
 
 # Pattern to identify system-injected messages (not real user input)
 SYSTEM_TAG_PATTERN = re.compile(
@@ -86,12 +125,239 @@ SYSTEM_TAG_PATTERN = re.compile(
 )
 
 PROMPTS_PER_CHUNK = 500
+PROMPT_SEPARATOR = "\n\n---\n\n"
+
+# Compressed prompt chunks (--compress) are a series of independent gzip members or zstd
+# frames of about PROMPT_FRAME_BYTES of chunk text each, so a whole chunk still
+# decompresses to the plain-text chunk while one prompt can be read by decompressing a
+# single frame. Prompts never span frames. prompts.idx locates every frame and prompt;
+# it is little-endian, with strings as UTF-8 behind a u16 length:
+#   b"VCPI", u8 version
+#   per chunk: str file name, str project,
+#              u32 frame count, then per frame u64 offset, u32 length (in the chunk file)
+#              u32 prompt count, then per prompt u32 frame, u32 start, u32 length
+#              (of the prompt's UTF-8 text in the decompressed frame)
+PROMPT_CHUNK_SUFFIXES = {"gzip": ".txt.gz", "zstd": ".txt.zst"}
+PROMPT_FRAME_BYTES = 64 * 1024
+PROMPT_INDEX_NAME = "prompts.idx"
+PROMPT_INDEX_MAGIC = b"VCPI"
+PROMPT_INDEX_VERSION = 1
+
+# --dedupe-prompts: near duplicates are prompts of NEAR_DUPLICATE_MIN_WORDS words or more
+# whose SimHashes differ in at most NEAR_DUPLICATE_MAX_BITS of 64 bits. SimHash bit tallies
+# are kept in byte lanes, so at most 255 bigrams of a prompt count.
+NEAR_DUPLICATE_MIN_WORDS = 8
+NEAR_DUPLICATE_MAX_BITS = 4
+SIMHASH_MAX_FEATURES = 255
+SIMHASH_CACHE_SIZE = 1 << 15
+# The bits of each byte value as 8 bytes of 0 or 1
+SIMHASH_BYTE_LANES = tuple(bytes((value >> bit) & 1 for bit in range(7, -1, -1)) for value in range(256))
+# --prompt-budget sizes, e.g. 800K or 4M
+BYTE_SIZE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)([KMG]?)B?")
+
+# Directories under projects/ that never hold top-level sessions (subagent transcripts)
+SKIPPED_DIR_NAMES = frozenset({"subagents"})
+
+# Stop reasons containing any of these count as interrupted turns
+INTERRUPT_MARKERS = ("interrupt", "cancel", "stop")
+
+# Byte patterns for the pre-parse filter that lets large irrelevant lines skip decoding.
+# It only pays where decoding costs more than checking the markers, so it is applied from
+# PREFILTER_MIN_BYTES of the JSON backend in use, and not at all for the others. With
+# json, bench_prefilter.py measures it at 1.1-1.2x on the tiny and small corpora and
+# 1.0-1.2x on medium (runs vary), about the same from 0 to 2048 bytes and less from 8192.
+# orjson and simdjson decode so fast that it is a net loss (0.7-0.9x) at any threshold.
+PREFILTER_MIN_BYTES = {"json": 512}
+USER_ROLE_PATTERN = re.compile(rb'"role"\s*:\s*"user"')
+USER_LIST_MESSAGE_PATTERN = re.compile(rb'"message"\s*:\s*\{\s*"role"\s*:\s*"user"\s*,\s*"content"\s*:\s*\[')
+STOP_REASON_PATTERN = re.compile(rb'"stop_reason"\s*:\s*(null|"[^"\\]*")')
+TIMESTAMP_PATTERN = re.compile(rb'"timestamp"\s*:\s*"([^"\\]*)"\s*([,}])')
+
+# Per-file session digests are cached next to stats-cache.json between runs
+SCAN_CACHE_NAME = "vibechecked-scan-cache.json"
+SCAN_CACHE_VERSION = 1
+
+# Optional SQLite index of every session (--index), next to stats-cache.json. sessions
+# holds one row per file with its digest totals and resume state; records holds every
+# record with a parseable timestamp (seconds since the epoch in time), and tool_calls,
+# prompts and words what each file adds to the digest. Rows are kept in file order by id.
+SESSION_INDEX_NAME = "vibechecked-index.db"
+SESSION_INDEX_VERSION = 1
+SESSION_INDEX_SCHEMA = f"""
+CREATE TABLE sessions (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    project TEXT NOT NULL,
+    walk_pos INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    head INTEGER NOT NULL,
+    head_len INTEGER NOT NULL,
+    user_messages INTEGER NOT NULL,
+    interrupts INTEGER NOT NULL,
+    parse_errors INTEGER NOT NULL,
+    first_timestamp TEXT,
+    last_timestamp TEXT,
+    timestamp_count INTEGER NOT NULL
+);
+CREATE INDEX sessions_project ON sessions (project);
+CREATE TABLE records (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    timestamp TEXT NOT NULL,
+    time REAL NOT NULL,
+    role TEXT,
+    interrupts INTEGER NOT NULL,
+    tool_calls INTEGER NOT NULL,
+    model TEXT,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cache_read_input_tokens INTEGER NOT NULL,
+    cache_creation_input_tokens INTEGER NOT NULL
+);
+CREATE INDEX records_session ON records (session_id, time);
+CREATE INDEX records_time ON records (time);
+CREATE TABLE tool_calls (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    time REAL
+);
+CREATE INDEX tool_calls_session ON tool_calls (session_id);
+CREATE TABLE prompts (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    start_offset INTEGER NOT NULL,
+    end_offset INTEGER NOT NULL,
+    time REAL
+);
+CREATE INDEX prompts_session ON prompts (session_id);
+CREATE TABLE words (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    word TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    UNIQUE (session_id, word)
+);
+CREATE VIEW hourly_activity AS
+    SELECT session_id, CAST(time / 3600 AS INTEGER) * 3600 AS hour,
+           COUNT(CASE WHEN role IN ('user', 'assistant') THEN 1 END) AS messages, SUM(tool_calls) AS tool_calls
+    FROM records GROUP BY session_id, hour;
+PRAGMA user_version = {SESSION_INDEX_VERSION};
+"""
+# Leading bytes fingerprinted to tell an appended session file from a rewritten one
+HEAD_FINGERPRINT_BYTES = 4096
+
+# --watch keeps the output of the last scan here for --snapshot, next to the prompt files
+SNAPSHOT_FILE = Path("/tmp/vibes-snapshot.json")
+SNAPSHOT_VERSION = 1
+WATCH_INTERVAL_SECONDS = 2.0
+
+# --partial aggregates merged by --merge; their word counts are cut to this many words
+PARTIAL_VERSION = 1
+PARTIAL_WORD_CAPACITY = 1000
+
+# --events writes one raw array file per column, described by a JSON manifest. Every record
+# is one event of its kind and each of its tool uses one more; ts is in milliseconds since
+# the epoch, the other columns hold ids into the manifest's sessions, projects, kinds and
+# names (tool names of tool_use events, stop reasons of stop events)
+EVENTS_MANIFEST_NAME = "events.json"
+EVENTS_VERSION = 1
+EVENT_KINDS = ("record", "prompt", "tool_use", "stop")
+EVENT_KIND_IDS = {kind: i for i, kind in enumerate(EVENT_KINDS)}
+EVENT_COLUMNS = {"ts": "q", "session": "I", "project": "I", "kind": "B", "name": "I"}
+EVENT_NO_TIME = -(2**63)
+EVENT_NO_NAME = 2**32 - 1
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Functions or allocation sites listed per stage by --profile-detail
+PROFILE_TOP_N = 15
+
+# Bytes read from each end of a session file when probing its first and last timestamps
+EDGE_PROBE_BYTES = 64 * 1024
+
+# --since/--until relative values, e.g. "30d" for 30 days ago
+RELATIVE_DAYS_PATTERN = re.compile(r"(\d+)d")
+
+# Token usage fields of assistant messages, and their names in stats-cache.json modelUsage
+USAGE_FIELDS = {
+    "input_tokens": "inputTokens",
+    "output_tokens": "outputTokens",
+    "cache_read_input_tokens": "cacheReadInputTokens",
+    "cache_creation_input_tokens": "cacheCreationInputTokens",
+}
+
+# Session lines are decoded with the first of these installed, unless the environment picks one
+JSON_BACKENDS = ("orjson", "simdjson", "json")
+JSON_BACKEND_ENV = "VIBECHECKED_JSON_BACKEND"
+
+
+# ---------------------------------------------------------------------------
+# JSON decoding (optional orjson / simdjson, stdlib json otherwise)
+# ---------------------------------------------------------------------------
+
+
+def _json_loads(name: str) -> Optional[Callable[[bytes], object]]:
+    """The loads function of JSON backend name, or None when it is not installed."""
+    if name == "json":
+        return json.loads
+    try:
+        module = importlib.import_module(name)
+    except ImportError:
+        return None
+    return module.loads
+
+
+def use_json_backend(name: Optional[str] = None) -> str:
+    """Decode with backend name from now on, or with the first of JSON_BACKENDS installed. Returns its name.
+
+    Raises ValueError if name is not one of JSON_BACKENDS or is not installed. Worker
+    processes started by --jobs pick their backend again on import, from JSON_BACKEND_ENV.
+    """
+    global JSON_BACKEND, _backend_loads, _prefilter_min_bytes
+    if name is not None and name not in JSON_BACKENDS:
+        raise ValueError(f"unknown JSON backend {name!r}, expected one of {', '.join(JSON_BACKENDS)}")
+    for candidate in [name] if name else JSON_BACKENDS:
+        loads = _json_loads(candidate)
+        if loads is not None:
+            JSON_BACKEND, _backend_loads = candidate, loads
+            _prefilter_min_bytes = PREFILTER_MIN_BYTES.get(candidate, sys.maxsize)
+            return candidate
+    raise ValueError(f"JSON backend {name} is not installed")
+
+
+def decode_json(data: bytes):
+    """Decode one JSON document straight from bytes with the selected backend.
+
+    orjson and simdjson reject a few documents json accepts (NaN, lone surrogates, a byte
+    order mark), so those are decoded again with json: what counts as a parse error never
+    depends on the backend. Raises ValueError like json.loads.
+    """
+    try:
+        return _backend_loads(data)
+    except ValueError:
+        if _backend_loads is json.loads:
+            raise
+        return json.loads(data)
+
+
+JSON_BACKEND = "json"
+_backend_loads: Callable[[bytes], object] = json.loads
+# Lines shorter than this are decoded without trying the pre-parse filter
+_prefilter_min_bytes = PREFILTER_MIN_BYTES["json"]
+try:
+    use_json_backend(os.environ.get(JSON_BACKEND_ENV) or None)
+except ValueError as e:
+    print(f"Warning: {e}, using {use_json_backend()}", file=sys.stderr)
 
 
 # ---------------------------------------------------------------------------
 # Session duration calculation (inlined from session_duration.py)
 # ---------------------------------------------------------------------------
 
+
 def _parse_timestamp(ts: str):
     """Parse ISO timestamp string to datetime."""
     try:
@@ -100,56 +366,1479 @@ def _parse_timestamp(ts: str):
         return None
 
 
-def _calculate_session_duration(jsonl_file: Path):
-    """Calculate duration of a single session in minutes."""
+def _calculate_session_duration(digest: dict):
+    """Calculate duration of a single session in minutes from its scanned timestamps."""
+    if digest["timestamp_count"] < 2:
+        return None
+
+    first = _parse_timestamp(digest["first_timestamp"])
+    last = _parse_timestamp(digest["last_timestamp"])
+
+    if first is None or last is None:
+        return None
+
     try:
-        timestamps = []
-        for line in jsonl_file.read_text().splitlines():
-            if not line.strip():
-                continue
+        return (last - first).total_seconds() / 60
+    except TypeError:
+        return None
+
+
+def calculate_total_session_minutes(scan: dict) -> int:
+    """Total session time in minutes from JSONL timestamps."""
+    return int(scan["session_minutes"])
+
+
+def _add_session_minutes(scan: dict, digest: dict) -> None:
+    """Add a session's duration to the scan's total and to the local day it started on."""
+    duration = _calculate_session_duration(digest)
+    if duration is None:
+        return
+    scan["session_minutes"] += duration
+    day = _parse_timestamp(digest["first_timestamp"]).astimezone().date().isoformat()
+    scan["daily_minutes"][day] = scan["daily_minutes"].get(day, 0) + duration
+
+
+# ---------------------------------------------------------------------------
+# Time windows (--since / --until)
+# ---------------------------------------------------------------------------
+
+
+def parse_window_bound(value: str, end: bool = False) -> datetime:
+    """Parse a --since/--until value: "30d" (days ago), a date, or an ISO datetime.
+
+    Dates and naive datetimes are local time. A date used as an end bound covers the whole
+    day. Raises ValueError for anything else.
+    """
+    match = RELATIVE_DAYS_PATTERN.fullmatch(value)
+    if match:
+        return datetime.now(timezone.utc) - timedelta(days=int(match.group(1)))
+    if len(value) == 10:
+        day = date.fromisoformat(value)
+        if end:
+            day += timedelta(days=1)
+        return datetime.combine(day, dt_time()).astimezone()
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return moment if moment.tzinfo else moment.astimezone()
+
+
+def _record_time(ts) -> Optional[datetime]:
+    """A record timestamp as an aware datetime (UTC if it has no offset), or None."""
+    moment = _parse_timestamp(ts) if isinstance(ts, str) else None
+    if moment is not None and moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def _in_window(moment: datetime, window: Tuple[Optional[datetime], Optional[datetime]]) -> bool:
+    """Whether since <= moment < until, with either bound optional."""
+    since, until = window
+    return (since is None or moment >= since) and (until is None or moment < until)
+
+
+# ---------------------------------------------------------------------------
+# Session scanning (every JSONL record is parsed exactly once)
+# ---------------------------------------------------------------------------
+
+
+def walk_session_files(projects_dir: Path) -> Iterator[Tuple[Path, Optional[os.stat_result]]]:
+    """Yield (path, stat) for every JSONL file under projects_dir, in rglob("*.jsonl") order.
+
+    Directories in SKIPPED_DIR_NAMES are pruned without being listed, and symlinked
+    directories are not followed. The stat comes from the directory entry, so callers need
+    not stat the file again; it is None if the file vanished or is a broken link.
+    """
+    try:
+        with os.scandir(projects_dir) as it:
+            entries = list(it)
+    except OSError:
+        return
+    subdirs = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            is_dir = False
+        if is_dir:
+            if entry.name not in SKIPPED_DIR_NAMES:
+                subdirs.append(entry.path)
+        elif entry.name.endswith(".jsonl"):
             try:
-                record = json.loads(line)
-                ts = record.get("timestamp")
-                if ts:
-                    timestamps.append(ts)
-            except json.JSONDecodeError:
-                continue
+                st = entry.stat()
+            except OSError:
+                st = None
+            yield Path(entry.path), st
+    for subdir in subdirs:
+        yield from walk_session_files(Path(subdir))
 
-        if len(timestamps) < 2:
-            return None
 
-        timestamps.sort()
-        first = _parse_timestamp(timestamps[0])
-        last = _parse_timestamp(timestamps[-1])
+def iter_jsonl_files(projects_dir: Path) -> Iterator[Path]:
+    """Yield all JSONL files, excluding subagents."""
+    for path, _ in walk_session_files(projects_dir):
+        yield path
+
+
+def _project_name(projects_dir: Path, path: Path) -> str:
+    """Name of the project directory a session file belongs to."""
+    try:
+        return path.relative_to(projects_dir).parts[0]
+    except (ValueError, IndexError):
+        return "unknown"
+
+
+def _extract_prompt(record: dict, message: dict):
+    """Return the user-typed prompt in a record, or None for tool results and system messages."""
+    if message.get("role") != "user" or record.get("isMeta"):
+        return None
+    content = message.get("content")
+    if isinstance(content, str) and content.strip():
+        if not SYSTEM_TAG_PATTERN.match(content.strip()):
+            return content
+    return None
+
+
+def _count_words(word_counts: Counter, text: str) -> None:
+    """Add the words of a prompt to word_counts, leaving out stopwords."""
+    word_counts.update([word for word in WORD_PATTERN.findall(text.lower()) if word not in STOPWORDS])
+
+
+def prune_word_counts(word_counts: Counter, capacity: int) -> None:
+    """Misra-Gries step: cut word_counts to at most capacity words.
+
+    The (capacity + 1)-th largest count is subtracted from every word and words left at
+    zero are dropped. Counts become lower bounds, each off by at most the total number
+    of words counted divided by capacity + 1, and summaries pruned like this can be added
+    together and pruned again with the same guarantee.
+    """
+    if len(word_counts) <= capacity:
+        return
+    floor = heapq.nlargest(capacity + 1, word_counts.values())[-1]
+    for word, count in list(word_counts.items()):
+        if count <= floor:
+            del word_counts[word]
+        else:
+            word_counts[word] = count - floor
+
+
+def _add_timestamp(digest: dict, ts: str) -> None:
+    """Widen the digest's first/last timestamps to include ts."""
+    digest["timestamp_count"] += 1
+    if digest["first_timestamp"] is None or ts < digest["first_timestamp"]:
+        digest["first_timestamp"] = ts
+    if digest["last_timestamp"] is None or ts > digest["last_timestamp"]:
+        digest["last_timestamp"] = ts
+
+
+def _feed_record(digest: dict, record: dict, span: List[int]) -> None:
+    """Update a session digest with one parsed record found at span ([start, end] byte offsets)."""
+    ts = record.get("timestamp")
+    if ts and isinstance(ts, str):
+        _add_timestamp(digest, ts)
+
+    message = record.get("message", {})
+    if not isinstance(message, dict):
+        return
+
+    if message.get("role") == "user":
+        digest["user_messages"] += 1
+
+    stop = message.get("stop_reason", "")
+    if stop and isinstance(stop, str) and stop not in ("end_turn", "tool_use"):
+        if any(x in stop.lower() for x in INTERRUPT_MARKERS):
+            digest["interrupts"] += 1
+
+    # Snapshots still count towards quirks and durations, but never hold tools or prompts
+    if record.get("type") == "file-history-snapshot":
+        return
+
+    content = message.get("content")
+    if isinstance(content, list):
+        for item in content:
+            if isinstance(item, dict) and item.get("type") == "tool_use":
+                name = item.get("name", "")
+                if name:
+                    digest["tool_counts"][name] += 1
+        return
+
+    prompt = _extract_prompt(record, message)
+    if prompt is not None:
+        digest["prompts"].append(span)
+        _count_words(digest["word_counts"], prompt)
+        # Pruning in batches keeps the amortized cost per word constant
+        capacity = digest.get("word_capacity")
+        if capacity and len(digest["word_counts"]) > 2 * capacity:
+            prune_word_counts(digest["word_counts"], capacity)
+
+
+def _new_digest(word_capacity: Optional[int] = None) -> dict:
+    """Empty per-file summary. Prompts are kept as [start, end] byte spans into the file.
+
+    With word_capacity set, word_counts is a Misra-Gries summary of at most that many words
+    (see prune_word_counts) instead of an exact count.
+    """
+    return {
+        "tool_counts": Counter(),
+        "word_counts": Counter(),
+        "word_capacity": word_capacity,
+        "prompts": [],
+        "user_messages": 0,
+        "interrupts": 0,
+        "first_timestamp": None,
+        "last_timestamp": None,
+        "timestamp_count": 0,
+        "parse_errors": 0,
+    }
+
+
+def iter_lines(f: BinaryIO, start: int = 0) -> Iterator[Tuple[int, bytes]]:
+    """Yield (offset, line) for each line of a binary file from byte offset start.
+
+    Lines keep their trailing newline and are read through the file buffer, so memory is
+    bounded by the longest single line rather than the size of the file.
+    """
+    f.seek(start)
+    offset = start
+    for line in f:
+        yield offset, line
+        offset += len(line)
+
+
+def _has_user_role(line: bytes) -> bool:
+    """Whether any object in a raw JSON line has "role": "user"."""
+    pos = line.find(b'"role"')
+    while pos != -1:
+        if USER_ROLE_PATTERN.match(line, pos):
+            return True
+        pos = line.find(b'"role"', pos + 1)
+    return False
+
+
+def _apply_without_decode(line: bytes, digest: dict, bounds: Optional[Tuple[str, str]] = None) -> bool:
+    """Apply a stripped line to the digest from its raw bytes when that is provably enough.
+
+    Returns False if the line must go through json.loads. Markers are matched on the raw
+    JSON, where quotes inside string values are escaped, so they only hit real keys and
+    values. Tool uses always need decoding, and so do stop reasons that look like an
+    interrupt. User messages need decoding until the session has two of them
+    (user_messages only matters up to 2), after which a lone user message whose content is
+    a list (tool results) cannot hold a prompt. A timestamp pair that closes the whole line
+    belongs to the top-level record and is applied directly; one closing a nested object
+    mid-line is not the record's timestamp. Any other timestamp forces a decode while it
+    could still move the first/last timestamp (timestamp_count only matters up to 2), unless
+    it lies strictly between bounds, the file's first and last timestamps as probed by
+    edge_timestamps: those two records are still applied when their lines come up, so
+    nothing in between can change the result. Lines that do not look like a complete
+    object are decoded so parse errors are still counted.
+    """
+    if not (line.startswith(b"{") and line.endswith(b"}")):
+        return False
+    if b'"tool_use"' in line:
+        return False
+    if _has_user_role(line):
+        if digest["user_messages"] < 2:
+            return False
+        pos = line.find(b'"message"')
+        if line.find(b'"message"', pos + 1) != -1 or not USER_LIST_MESSAGE_PATTERN.match(line, pos):
+            return False
+
+    pos = line.find(b'"stop_reason"')
+    while pos != -1:
+        match = STOP_REASON_PATTERN.match(line, pos)
+        if match is None:
+            return False
+        reason = match.group(1)
+        if reason != b"null" and any(x.encode() in reason.lower() for x in INTERRUPT_MARKERS):
+            return False
+        pos = line.find(b'"stop_reason"', match.end())
+
+    top_level = None
+    pos = line.find(b'"timestamp"')
+    while pos != -1:
+        match = TIMESTAMP_PATTERN.match(line, pos)
+        if match is None:
+            return False
+        try:
+            ts = match.group(1).decode("utf-8")
+        except UnicodeDecodeError:
+            return False
+        if match.group(2) == b"}":
+            if match.end() == len(line):
+                top_level = ts
+        elif bounds is not None and bounds[0] < ts < bounds[1]:
+            pass
+        elif digest["timestamp_count"] < 2 or not (digest["first_timestamp"] <= ts <= digest["last_timestamp"]):
+            return False
+        pos = line.find(b'"timestamp"', match.end())
+
+    if top_level:
+        _add_timestamp(digest, top_level)
+    return True
+
+
+def _feed_lines(
+    digest: dict,
+    f: BinaryIO,
+    start: int,
+    feed: Optional[Callable[[dict, dict, List[int]], None]] = None,
+    bounds: Optional[Tuple[str, str]] = None,
+    hold_partial: bool = False,
+) -> Tuple[int, int, int]:
+    """Feed every line of f from byte offset start, skipping lines that cannot matter.
+
+    bounds are the probed first and last timestamps of the file (see _apply_without_decode).
+    With feed, every line is decoded and passed to feed(digest, record, span) instead of
+    _feed_record, for callers that need every record (windowed tallies, the session index).
+    With hold_partial, a last line without a newline is not fed. Returns (offset after the
+    last complete line, offset of the end of the file, lines decoded).
+    """
+    consumed = end = start
+    decoded = 0
+    for offset, line in iter_lines(f, start):
+        end = offset + len(line)
+        if hold_partial and not line.endswith(b"\n"):
+            break
+        stripped = line.strip()
+        if stripped and (
+            feed is not None
+            or len(stripped) < _prefilter_min_bytes
+            or not _apply_without_decode(stripped, digest, bounds)
+        ):
+            decoded += 1
+            try:
+                record = decode_json(line)
+            except ValueError:
+                record = None
+            if isinstance(record, dict):
+                (feed or _feed_record)(digest, record, [offset, end])
+            else:
+                digest["parse_errors"] += 1
+        if line.endswith(b"\n"):
+            consumed = end
+    return consumed, end, decoded
+
+
+def _load_digest(raw: dict) -> dict:
+    """Copy a digest, or one read back from the JSON cache, into one that can be fed more records."""
+    digest = dict(raw)
+    digest["tool_counts"] = Counter(raw["tool_counts"])
+    digest["word_counts"] = Counter(raw["word_counts"])
+    digest["prompts"] = list(raw["prompts"])
+    return digest
+
+
+def _is_unchanged(cached: Optional[dict], st: os.stat_result) -> bool:
+    """Whether a cached entry still describes a file with this stat."""
+    return bool(cached) and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns
+
+
+def _cached_entry(cache: dict, path: Path, word_capacity: Optional[int]) -> Optional[dict]:
+    """The cache entry for path, unless its words were counted with another word_capacity."""
+    cached = cache.get(str(path))
+    if cached and cached["digest"].get("word_capacity") != word_capacity:
+        return None
+    return cached
+
+
+def _feed_accumulated_record(digest: dict, record: dict, span: List[int], accumulators: list, ctx: dict) -> None:
+    """Feed a record to digest and to every accumulator, with ctx["span"] set to its span."""
+    _feed_record(digest, record, span)
+    ctx["span"] = span
+    for accumulator in accumulators:
+        accumulator.feed(record, ctx)
+
+
+def _resume_point(f: BinaryIO, size: int, cached: Optional[dict]) -> Tuple[int, int, int]:
+    """Where to continue reading a session file that cached described, and its head fingerprint.
+
+    Returns (start, head, head_len). start is cached["offset"] when the file only grew since
+    (same leading bytes, and the last scan ended on a complete line or kept a "resume"
+    digest from before the unfinished one), otherwise 0 with a fresh fingerprint of the
+    first HEAD_FINGERPRINT_BYTES. f must be positioned at 0.
+    """
+    if cached and size > cached["size"] and (cached["offset"] == cached["size"] or "resume" in cached):
+        head_len = cached["head_len"]
+        if zlib.crc32(f.read(head_len)) == cached["head"]:
+            return cached["offset"], cached["head"], head_len
+    f.seek(0)
+    head_bytes = f.read(HEAD_FINGERPRINT_BYTES)
+    return 0, zlib.crc32(head_bytes), len(head_bytes)
+
+
+def scan_session_file(
+    path: Path,
+    cached: Optional[dict] = None,
+    word_capacity: Optional[int] = None,
+    st: Optional[os.stat_result] = None,
+    accumulated: Optional[Tuple[list, dict]] = None,
+    events: bool = False,
+):
+    """Summarize one session file, reusing or extending a cached entry where possible.
+
+    Returns a cache entry {size, mtime_ns, offset, head, head_len, digest}, or None if the
+    file is unreadable. Unchanged files are returned as-is; files that only grew since the
+    cached scan are resumed from the last complete line instead of being parsed again. A
+    file ending in an unfinished line, as one being written to often does, also gets
+    "resume", the digest without that line, so it can be resumed once the line is done.
+    Entries for files that were read also carry "scanned": {bytes, records, start}, which
+    scan_projects takes off before caching them. cached must have been scanned with the
+    same word_capacity. st is the file's stat from the walk, if already known.
+
+    accumulated is (accumulators, ctx) for scan_projects(accumulators=...): every record
+    read is also fed to those accumulators, which come back under "accumulators". With
+    events, the events of every record (see _feed_event_record) come back under "events"
+    as columns; cached must then be None, so the whole file is read.
+    """
+    try:
+        if st is None:
+            st = path.stat()
+        if _is_unchanged(cached, st):
+            return cached
+
+        with path.open("rb") as f:
+            start, head, head_len = _resume_point(f, st.st_size, cached)
+            if start:
+                digest = _load_digest(cached.get("resume", cached["digest"]))
+            else:
+                digest = _new_digest(word_capacity)
+
+            # Probing both ends first lets the byte filter skip timestamps in between
+            first, last = edge_timestamps(f, st.st_size)
+            bounds = (first, last) if first and last and first < last else None
+            feed = None
+            if accumulated is not None:
+                feed = partial(_feed_accumulated_record, accumulators=accumulated[0], ctx=accumulated[1])
+            elif events:
+                digest["events"] = _new_event_columns()
+                feed = partial(_feed_with_events, feed=_feed_record)
+            offset, size, decoded = _feed_lines(digest, f, start, feed, bounds, hold_partial=True)
+            resume = None
+            if size > offset:
+                resume = digest
+                digest = _load_digest(resume)
+                _, size, unfinished = _feed_lines(digest, f, offset, feed, bounds)
+                decoded += unfinished
+    except OSError:
+        return None
+    if word_capacity:
+        for finished in filter(None, (digest, resume)):
+            prune_word_counts(finished["word_counts"], word_capacity)
+
+    probed = min(st.st_size, EDGE_PROBE_BYTES) * 2
+    entry = {
+        "size": size,
+        "mtime_ns": st.st_mtime_ns,
+        "offset": offset,
+        "head": head,
+        "head_len": head_len,
+        "digest": digest,
+        "scanned": {"bytes": head_len + probed + size - start, "records": decoded, "start": start},
+    }
+    if resume is not None:
+        entry["resume"] = resume
+    if accumulated is not None:
+        entry["accumulators"] = accumulated[0]
+    if events:
+        # resume is a copy of the digest that shares its columns
+        entry["events"] = digest.pop("events")
+        if resume is not None:
+            del resume["events"]
+    return entry
+
+
+def _line_timestamp(line: bytes) -> Optional[str]:
+    """Top-level timestamp of one raw JSONL line, or None."""
+    try:
+        record = decode_json(line)
+    except ValueError:
+        return None
+    ts = record.get("timestamp") if isinstance(record, dict) else None
+    return ts if isinstance(ts, str) else None
+
+
+def edge_timestamps(f: BinaryIO, size: int) -> Tuple[Optional[str], Optional[str]]:
+    """Timestamps of the first and last timestamped records within EDGE_PROBE_BYTES of either end.
+
+    Only complete lines are decoded. Either value is None when no timestamped record lies
+    that close to its end of the file.
+    """
+    f.seek(0)
+    head = f.read(EDGE_PROBE_BYTES)
+    lines = head.split(b"\n")
+    if len(head) < size:
+        lines.pop()
+    first = next(filter(None, map(_line_timestamp, lines)), None)
+
+    tail_start = max(0, size - EDGE_PROBE_BYTES)
+    f.seek(tail_start)
+    lines = f.read(size - tail_start).split(b"\n")
+    if tail_start:
+        lines = lines[1:]
+    last = next(filter(None, map(_line_timestamp, reversed(lines))), None)
+    return first, last
+
+
+def _new_window_tallies() -> dict:
+    """Per-file numbers that stats-cache.json provides for the full history."""
+    return {"messages": 0, "days": {}, "models": {}}
+
+
+def _tally_message(message) -> Optional[Tuple[int, Optional[str], Dict[str, int]]]:
+    """(tool calls, model, token usage by modelUsage name) of a user or assistant message.
+
+    Returns None for anything else. model is None, and usage empty, unless the message
+    reports both.
+    """
+    if not isinstance(message, dict) or message.get("role") not in ("user", "assistant"):
+        return None
+    content = message.get("content")
+    tool_calls = 0
+    if isinstance(content, list):
+        tool_calls = sum(1 for item in content if isinstance(item, dict) and item.get("type") == "tool_use")
+
+    model = message.get("model")
+    usage = message.get("usage")
+    if not (isinstance(model, str) and isinstance(usage, dict)):
+        return tool_calls, None, {}
+    totals = {}
+    for field, name in USAGE_FIELDS.items():
+        value = usage.get(field)
+        totals[name] = value if isinstance(value, int) else 0
+    return tool_calls, model, totals
+
+
+def _feed_windowed_record(digest: dict, record: dict, span: List[int], window) -> None:
+    """Feed a record only if its timestamp is inside window, and tally it by day and model."""
+    moment = _record_time(record.get("timestamp"))
+    if moment is None or not _in_window(moment, window):
+        return
+    _feed_record(digest, record, span)
 
-        if first is None or last is None:
+    tally = _tally_message(record.get("message"))
+    if tally is None:
+        return
+    tool_calls, model, usage = tally
+    tallies = digest["window"]
+    tallies["messages"] += 1
+    day = tallies["days"].setdefault(moment.astimezone().date().isoformat(), [0, 0])
+    day[0] += 1
+    day[1] += tool_calls
+    if model is not None:
+        totals = tallies["models"].setdefault(model, dict.fromkeys(USAGE_FIELDS.values(), 0))
+        for name, value in usage.items():
+            totals[name] += value
+
+
+def scan_session_window(
+    path: Path,
+    window,
+    word_capacity: Optional[int] = None,
+    st: Optional[os.stat_result] = None,
+    events: bool = False,
+):
+    """Summarize the records of one session file that fall inside window (since, until).
+
+    Session files are append-only, so their records are in time order: a file last modified
+    before the window starts, or whose first or last timestamp lies beyond the window, is
+    skipped without being parsed. Returns {digest, scanned} like scan_session_file, with the
+    window tallies under digest["window"], or None for skipped and unreadable files. With
+    events, the events of the records inside window come back under "events" as columns.
+    """
+    since, until = window
+    try:
+        if st is None:
+            st = path.stat()
+        if since is not None and st.st_mtime < since.timestamp():
             return None
+        with path.open("rb") as f:
+            first, last = edge_timestamps(f, st.st_size)
+            first_time, last_time = _record_time(first), _record_time(last)
+            if until is not None and first_time is not None and first_time >= until:
+                return None
+            if since is not None and last_time is not None and last_time < since:
+                return None
+
+            digest = _new_digest(word_capacity)
+            digest["window"] = _new_window_tallies()
+            feed = partial(_feed_windowed_record, window=window)
+            if events:
+                digest["events"] = _new_event_columns()
+                feed = partial(_feed_with_events, feed=feed, window=window)
+            _, size, decoded = _feed_lines(digest, f, 0, feed)
+    except OSError:
+        return None
+    if word_capacity:
+        prune_word_counts(digest["word_counts"], word_capacity)
 
-        return (last - first).total_seconds() / 60
-    except Exception:
+    probed = min(size, EDGE_PROBE_BYTES) * 2
+    entry = {"digest": digest, "scanned": {"bytes": probed + size, "records": decoded}}
+    if events:
+        entry["events"] = digest.pop("events")
+    return entry
+
+
+def load_scan_cache(path: Path) -> dict:
+    """Load per-file session digests from the last run, keyed by file path."""
+    try:
+        cache = decode_json(path.read_bytes())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != SCAN_CACHE_VERSION:
+        return {}
+    files = cache.get("files")
+    return files if isinstance(files, dict) else {}
+
+
+def save_scan_cache(path: Path, files: dict) -> None:
+    """Write session digests atomically. A failed write only costs the next run a full scan."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        tmp_path.write_text(json.dumps({"version": SCAN_CACHE_VERSION, "files": files}, separators=(",", ":")))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Warning: Could not write scan cache {path}: {e}", file=sys.stderr)
+
+
+def scan_session_files(
+    files: List[Tuple[Path, Optional[os.stat_result]]],
+    cache: dict,
+    jobs: int = 1,
+    word_capacity: Optional[int] = None,
+    window=None,
+    accumulated: Optional[List[Tuple[list, dict]]] = None,
+    events: bool = False,
+) -> list:
+    """Cache entries for (path, stat) pairs from walk_session_files, in the same order.
+
+    Stale files are parsed on up to jobs processes. With a window the cache is not used and
+    every file goes through scan_session_window. accumulated holds (accumulators, ctx) for
+    each file (see scan_session_file); files are then all read in full. events is passed on
+    to scan_session_file and scan_session_window; cache must then be empty.
+    """
+    paths = [path for path, _ in files]
+    stats = [st for _, st in files]
+    if accumulated is not None:
+        if jobs <= 1:
+            return [
+                scan_session_file(path, None, word_capacity, st, per_file)
+                for (path, st), per_file in zip(files, accumulated)
+            ]
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            return list(
+                executor.map(
+                    scan_session_file,
+                    paths,
+                    [None] * len(files),
+                    [word_capacity] * len(files),
+                    stats,
+                    accumulated,
+                    chunksize=max(1, len(files) // (jobs * 8)),
+                )
+            )
+
+    if window is not None:
+        if jobs <= 1:
+            return [scan_session_window(path, window, word_capacity, st, events) for path, st in files]
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            return list(
+                executor.map(
+                    scan_session_window,
+                    paths,
+                    [window] * len(files),
+                    [word_capacity] * len(files),
+                    stats,
+                    [events] * len(files),
+                    chunksize=max(1, len(files) // (jobs * 8)),
+                )
+            )
+
+    if jobs <= 1:
+        return [
+            scan_session_file(path, _cached_entry(cache, path, word_capacity), word_capacity, st, None, events)
+            for path, st in files
+        ]
+
+    entries: list = [None] * len(files)
+    stale = []
+    for i, (path, st) in enumerate(files):
+        cached = _cached_entry(cache, path, word_capacity)
+        if st is None:
+            continue
+        if _is_unchanged(cached, st):
+            entries[i] = cached
+            continue
+        stale.append(i)
+
+    if stale:
+        # Several files per task keeps pickling overhead low; many tasks per worker keeps them balanced
+        chunksize = max(1, len(stale) // (jobs * 8))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = executor.map(
+                scan_session_file,
+                [paths[i] for i in stale],
+                [_cached_entry(cache, paths[i], word_capacity) for i in stale],
+                [word_capacity] * len(stale),
+                [stats[i] for i in stale],
+                [None] * len(stale),
+                [events] * len(stale),
+                chunksize=chunksize,
+            )
+            for i, entry in zip(stale, results):
+                entries[i] = entry
+    return entries
+
+
+def _merge_window_tallies(totals: dict, digest: dict) -> None:
+    """Add one file's window tallies to the scan's."""
+    tallies = digest["window"]
+    if digest["timestamp_count"]:
+        totals["sessions"].append((digest["first_timestamp"], digest["last_timestamp"], tallies["messages"]))
+    for day, (messages, tool_calls) in tallies["days"].items():
+        day_totals = totals["days"].setdefault(day, [0, 0])
+        day_totals[0] += messages
+        day_totals[1] += tool_calls
+    for model, usage in tallies["models"].items():
+        model_totals = totals["models"].setdefault(model, dict.fromkeys(usage, 0))
+        for name, value in usage.items():
+            model_totals[name] += value
+
+
+def scan_projects(
+    projects_dir: Path,
+    cache: Optional[dict] = None,
+    jobs: int = 1,
+    word_capacity: Optional[int] = None,
+    window=None,
+    accumulators: Optional[list] = None,
+    events: Optional[dict] = None,
+) -> dict:
+    """Walk all session files once and aggregate tools, words, prompts, quirks and durations.
+
+    The directory is walked once and scan["files"] keeps the (path, stat) pairs for later
+    stages. cache maps file paths to entries from a previous run; the entries for this run
+    end up in scan["cache"] so the caller can persist them. Digests are merged in walk
+    order, so the result does not depend on jobs. scan["metrics"] counts the files, bytes
+    and records actually read, for --profile, and scan["rescanned"] holds the paths of the
+    files read from their first byte: new ones, and ones truncated or rewritten since their
+    cached entry. With word_capacity set, word counts are
+    approximate and never hold more than twice that many words (see prune_word_counts).
+
+    With a window (since, until), only records inside it are counted, no cache is used or
+    produced, and scan["window"] holds the session, day and model totals windowed_stats
+    turns into stats-cache.json fields. A file with no record inside the window is not a
+    session of it and counts towards nothing, quirks included; scan["projects"] names the
+    projects that have a session in the window and scan["project_count"] counts them.
+
+    accumulators (see extract) see every record in the same pass. Each file is fed to its
+    own deep copy of them, merged back into them in walk order, so pass them empty. Their
+    state cannot be cached, so every file is then read in full; a window is not supported.
+
+    With events, columns from open_event_columns, the events of every record counted are
+    appended to them in walk order, from the same pass (see write_session_events). cache
+    is then not used, so every file is read in full, but scan["cache"] is still produced.
+    """
+    if accumulators is not None and window is not None:
+        raise ValueError("accumulators cannot be combined with a window")
+    if accumulators is not None and events is not None:
+        raise ValueError("accumulators cannot be combined with events")
+    cache = cache if cache and events is None else {}
+    scan = {
+        "tool_counts": Counter(),
+        "word_counts": Counter(),
+        "project_prompts": {},
+        "interrupt_count": 0,
+        "abandoned_count": 0,
+        "session_minutes": 0,
+        "daily_minutes": {},
+        "cache": {},
+        "rescanned": set(),
+        "metrics": {"files_visited": 0, "files_parsed": 0, "bytes_read": 0, "records_parsed": 0},
+    }
+    metrics = scan["metrics"]
+
+    if window is not None:
+        scan["window"] = {"sessions": [], "days": {}, "models": {}}
+
+    files = list(walk_session_files(projects_dir))
+    scan["files"] = files
+    metrics["files_visited"] = len(files)
+    accumulated = None
+    if accumulators is not None:
+        accumulated = [
+            (copy.deepcopy(accumulators), {"path": path, "project": _project_name(projects_dir, path)})
+            for path, _ in files
+        ]
+    entries = scan_session_files(files, cache, jobs, word_capacity, window, accumulated, events is not None)
+    active_projects = set()
+    for (path, _), entry in zip(files, entries):
+        if entry is None:
+            continue
+        for accumulator, part in zip(accumulators or (), entry.pop("accumulators", ())):
+            accumulator.merge(part)
+        if events is not None:
+            write_session_events(events, projects_dir, path, entry.pop("events"))
+        scanned = entry.pop("scanned", None)
+        if scanned is not None:
+            metrics["files_parsed"] += 1
+            metrics["bytes_read"] += scanned["bytes"]
+            metrics["records_parsed"] += scanned["records"]
+            if scanned.get("start") == 0:
+                scan["rescanned"].add(str(path))
+        digest = entry["digest"]
+        if window is None:
+            scan["cache"][str(path)] = entry
+        elif not digest["timestamp_count"]:
+            continue
+        else:
+            _merge_window_tallies(scan["window"], digest)
+            active_projects.add(_project_name(projects_dir, path))
+
+        scan["tool_counts"].update(digest["tool_counts"])
+        scan["word_counts"].update(digest["word_counts"])
+        if word_capacity and len(scan["word_counts"]) > 2 * word_capacity:
+            prune_word_counts(scan["word_counts"], word_capacity)
+        if digest["prompts"]:
+            project_name = _project_name(projects_dir, path)
+            scan["project_prompts"].setdefault(project_name, []).append((path, digest["prompts"]))
+
+        # Files with unparseable lines have never counted towards quirks
+        if not digest["parse_errors"]:
+            if digest["user_messages"] <= 1:
+                scan["abandoned_count"] += 1
+            scan["interrupt_count"] += digest["interrupts"]
+
+        _add_session_minutes(scan, digest)
+
+    if window is not None:
+        scan["projects"] = sorted(active_projects)
+        scan["project_count"] = len(active_projects)
+    return scan
+
+
+def extract(projects_dir: Path, accumulators: list, jobs: int = 1) -> list:
+    """Feed every record of every session file to accumulators in one pass; return their results.
+
+    An accumulator is any object with feed(record, ctx), merge(other) and result(). feed
+    gets each decoded JSONL record with ctx {path, project, span}, span being the record's
+    [start, end] byte offsets in path; merge(other) adds another accumulator of the same
+    kind that saw other records; result() returns the final value. With jobs > 1, files
+    are fed on worker processes, so accumulators must then be picklable. The built-in
+    stats come from the same pass: scan_projects(projects_dir, accumulators=...) returns
+    them alongside.
+    """
+    scan_projects(projects_dir, jobs=jobs, accumulators=accumulators)
+    return [accumulator.result() for accumulator in accumulators]
+
+
+def iter_prompt_records(path: Path, spans: List[List[int]]) -> Iterator[Tuple[List[int], str, Optional[str]]]:
+    """Read back the prompts at the given byte spans of a session file as (span, prompt, timestamp)."""
+    try:
+        with path.open("rb") as f:
+            for start, end in spans:
+                f.seek(start)
+                try:
+                    record = decode_json(f.read(end - start))
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and isinstance(record.get("message"), dict):
+                    prompt = _extract_prompt(record, record["message"])
+                    if prompt is not None:
+                        ts = record.get("timestamp")
+                        yield [start, end], prompt, ts if isinstance(ts, str) else None
+    except OSError:
+        return
+
+
+def iter_prompts(path: Path, spans: List[List[int]]) -> Iterator[str]:
+    """Read back the prompts at the given byte spans of a session file, one at a time."""
+    for _, prompt, _ in iter_prompt_records(path, spans):
+        yield prompt
+
+
+# ---------------------------------------------------------------------------
+# Session index (--index)
+# ---------------------------------------------------------------------------
+
+# Digest totals kept per file in the sessions table
+INDEXED_DIGEST_FIELDS = (
+    "user_messages",
+    "interrupts",
+    "parse_errors",
+    "first_timestamp",
+    "last_timestamp",
+    "timestamp_count",
+)
+
+# Orders aggregated index rows t of sessions s by where a scan would first count them
+FIRST_SEEN = "MIN(s.walk_pos * 4294967296 + t.id)"
+
+
+def _feed_indexed_record(digest: dict, record: dict, span: List[int]) -> None:
+    """Feed a record to digest and add its rows for the session index to digest["index"].
+
+    The record goes through _feed_record on its own, so its rows hold exactly what a scan
+    counts for it. digest["word_counts"] only gets the words of records fed to this digest,
+    which for a resumed file are the ones its stored counts lack.
+    """
+    part = _new_digest()
+    _feed_record(part, record, span)
+    digest["user_messages"] += part["user_messages"]
+    digest["interrupts"] += part["interrupts"]
+    if part["timestamp_count"]:
+        _add_timestamp(digest, part["first_timestamp"])
+    digest["word_counts"].update(part["word_counts"])
+
+    rows = digest["index"]
+    moment = _record_time(record.get("timestamp"))
+    seconds = moment.timestamp() if moment is not None else None
+    rows["tool_calls"].extend((name, count, seconds) for name, count in part["tool_counts"].items())
+    rows["prompts"].extend((start, end, seconds) for start, end in part["prompts"])
+    if moment is None:
+        return
+
+    message = record.get("message")
+    role = message.get("role") if isinstance(message, dict) else None
+    tool_calls, model, usage = _tally_message(message) or (0, None, {})
+    rows["records"].append(
+        (
+            record["timestamp"],
+            seconds,
+            role if isinstance(role, str) else None,
+            part["interrupts"],
+            tool_calls,
+            model,
+            *(usage.get(name, 0) for name in USAGE_FIELDS.values()),
+        )
+    )
+
+
+def index_session_file(path: Path, st: os.stat_result, row: Optional[dict] = None):
+    """Parse a new or changed session file into rows for the session index.
+
+    row is the file's sessions row, if it has one. A file that only grew since is read from
+    where row left off (see _resume_point); any other is read from the start and its rows
+    replace the old ones. Returns {size, mtime_ns, offset, head, head_len, start, digest,
+    scanned} with the rows under digest["index"], or None if the file is unreadable.
+    """
+    try:
+        with path.open("rb") as f:
+            start, head, head_len = _resume_point(f, st.st_size, row)
+            digest = _new_digest()
+            if start:
+                digest.update((field, row[field]) for field in INDEXED_DIGEST_FIELDS)
+            digest["index"] = {"records": [], "tool_calls": [], "prompts": []}
+            offset, size, decoded = _feed_lines(digest, f, start, _feed_indexed_record)
+    except OSError:
         return None
 
+    return {
+        "size": size,
+        "mtime_ns": st.st_mtime_ns,
+        "offset": offset,
+        "head": head,
+        "head_len": head_len,
+        "start": start,
+        "digest": digest,
+        "scanned": {"bytes": head_len + size - start, "records": decoded},
+    }
 
-def calculate_total_session_minutes(projects_dir: Path) -> int:
-    """Calculate total session time in minutes from JSONL timestamps."""
-    if not projects_dir.exists():
-        return 0
 
-    total_minutes = 0
-    for jsonl_file in projects_dir.rglob("*.jsonl"):
-        if "subagents" in str(jsonl_file):
+def open_session_index(path: Path, rebuild: bool = False) -> sqlite3.Connection:
+    """Open the session index at path, starting a new one if it is missing, outdated or unreadable."""
+    conn = sqlite3.connect(str(path))
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+    except sqlite3.DatabaseError:
+        version = None
+    if rebuild or version != SESSION_INDEX_VERSION:
+        conn.close()
+        for stale in (path, path.with_name(path.name + "-journal")):
+            stale.unlink(missing_ok=True)
+        conn = sqlite3.connect(str(path))
+        conn.executescript(SESSION_INDEX_SCHEMA)
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+def _store_indexed_file(
+    conn: sqlite3.Connection,
+    path: Path,
+    project: str,
+    walk_pos: int,
+    row: Optional[dict],
+    entry: dict,
+) -> None:
+    """Write an index_session_file entry, extending or replacing the file's previous rows."""
+    digest = entry["digest"]
+    values = {"walk_pos": walk_pos}
+    values.update((key, entry[key]) for key in ("size", "mtime_ns", "offset", "head", "head_len"))
+    values.update((field, digest[field]) for field in INDEXED_DIGEST_FIELDS)
+
+    resumed = row is not None and entry["start"] > 0
+    if resumed:
+        session_id = row["id"]
+        assignments = ", ".join(f"{key} = ?" for key in values)
+        conn.execute(f"UPDATE sessions SET {assignments} WHERE id = ?", (*values.values(), session_id))
+    else:
+        if row is not None:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (row["id"],))
+        values.update(path=str(path), project=project)
+        columns = ", ".join(values)
+        placeholders = ", ".join("?" * len(values))
+        session_id = conn.execute(
+            f"INSERT INTO sessions ({columns}) VALUES ({placeholders})", tuple(values.values())
+        ).lastrowid
+
+    rows = digest["index"]
+    usage_columns = ", ".join(USAGE_FIELDS)
+    conn.executemany(
+        f"INSERT INTO records (session_id, timestamp, time, role, interrupts, tool_calls, model, {usage_columns}) "
+        f"VALUES (?, ?, ?, ?, ?, ?, ?, {', '.join('?' * len(USAGE_FIELDS))})",
+        [(session_id, *record) for record in rows["records"]],
+    )
+    conn.executemany(
+        "INSERT INTO tool_calls (session_id, name, count, time) VALUES (?, ?, ?, ?)",
+        [(session_id, *call) for call in rows["tool_calls"]],
+    )
+    conn.executemany(
+        "INSERT INTO prompts (session_id, start_offset, end_offset, time) VALUES (?, ?, ?, ?)",
+        [(session_id, *prompt) for prompt in rows["prompts"]],
+    )
+    words = digest["word_counts"]
+    if resumed:
+        # Words already counted keep their row, and so their place in the order of first use
+        conn.executemany(
+            "INSERT OR IGNORE INTO words (session_id, word, count) VALUES (?, ?, 0)",
+            [(session_id, word) for word in words],
+        )
+        conn.executemany(
+            "UPDATE words SET count = count + ? WHERE session_id = ? AND word = ?",
+            [(count, session_id, word) for word, count in words.items()],
+        )
+    else:
+        conn.executemany(
+            "INSERT INTO words (session_id, word, count) VALUES (?, ?, ?)",
+            [(session_id, word, count) for word, count in words.items()],
+        )
+
+
+def update_session_index(conn: sqlite3.Connection, projects_dir: Path, jobs: int = 1) -> dict:
+    """Bring the session index up to date with the session files under projects_dir.
+
+    Unchanged files keep their rows, files that only grew get rows for their new records,
+    rewritten files are indexed again and files that are gone lose their rows. Stale files
+    are parsed on up to jobs processes and written in a single transaction. Returns
+    {files, metrics} like the same keys of a scan_projects result.
+    """
+    files = list(walk_session_files(projects_dir))
+    cursor = conn.execute("SELECT * FROM sessions")
+    columns = [description[0] for description in cursor.description]
+    known = {values[1]: dict(zip(columns, values)) for values in cursor}
+
+    positions = []
+    stale = []
+    for pos, (path, st) in enumerate(files):
+        if st is None:
             continue
-        duration = _calculate_session_duration(jsonl_file)
-        if duration is not None:
-            total_minutes += duration
+        row = known.pop(str(path), None)
+        if _is_unchanged(row, st):
+            positions.append((pos, row["id"]))
+        else:
+            stale.append((pos, path, st, row))
+
+    if jobs > 1 and len(stale) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            entries = list(
+                executor.map(
+                    index_session_file,
+                    [path for _, path, _, _ in stale],
+                    [st for _, _, st, _ in stale],
+                    [row for _, _, _, row in stale],
+                    chunksize=max(1, len(stale) // (jobs * 8)),
+                )
+            )
+    else:
+        entries = [index_session_file(path, st, row) for _, path, st, row in stale]
+
+    metrics = {"files_visited": len(files), "files_parsed": 0, "bytes_read": 0, "records_parsed": 0}
+    with conn:
+        conn.executemany("DELETE FROM sessions WHERE id = ?", [(row["id"],) for row in known.values()])
+        conn.executemany("UPDATE sessions SET walk_pos = ? WHERE id = ?", positions)
+        for (pos, path, _, row), entry in zip(stale, entries):
+            if entry is None:
+                if row is not None:
+                    conn.execute("DELETE FROM sessions WHERE id = ?", (row["id"],))
+                continue
+            scanned = entry.pop("scanned")
+            metrics["files_parsed"] += 1
+            metrics["bytes_read"] += scanned["bytes"]
+            metrics["records_parsed"] += scanned["records"]
+            _store_indexed_file(conn, path, _project_name(projects_dir, path), pos, row, entry)
+    return {"files": files, "metrics": metrics}
+
+
+def _index_where(window=None, projects: Optional[List[str]] = None, *clauses: str) -> Tuple[str, list]:
+    """WHERE clause and parameters keeping index rows t of sessions s inside window and projects."""
+    clauses = list(clauses)
+    params: list = []
+    since, until = window or (None, None)
+    if since is not None:
+        clauses.append("t.time >= ?")
+        params.append(since.timestamp())
+    if until is not None:
+        clauses.append("t.time < ?")
+        params.append(until.timestamp())
+    if projects:
+        clauses.append(f"s.project IN ({', '.join('?' * len(projects))})")
+        params.extend(projects)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def query_session_index(
+    conn: sqlite3.Connection,
+    window=None,
+    projects: Optional[List[str]] = None,
+    word_capacity: Optional[int] = None,
+) -> dict:
+    """The scan_projects result for the sessions in the index, aggregated by SQLite.
+
+    Without a window or projects it matches scan_projects. window (since, until) keeps only
+    the records inside it and projects only the sessions of those project directories; a
+    session then counts towards quirks and durations if it has a record in the window,
+    and scan["window"] holds the totals windowed_stats needs. scan["projects"] and
+    scan["project_count"] then name and count the projects with a session left after both
+    filters, not every project directory. Top words in a window are
+    counted from the prompts read back from their files. With word_capacity, only the
+    word_capacity most frequent words are loaded, with exact counts. scan["files"] and
+    scan["metrics"] are left to update_session_index.
+    """
+    scan = {
+        "tool_counts": Counter(),
+        "word_counts": Counter(),
+        "project_prompts": {},
+        "interrupt_count": 0,
+        "abandoned_count": 0,
+        "session_minutes": 0,
+        "daily_minutes": {},
+        "cache": {},
+    }
+
+    where, params = _index_where(window, projects)
+    for name, count in conn.execute(
+        f"SELECT t.name, SUM(t.count) FROM tool_calls t JOIN sessions s ON s.id = t.session_id{where} "
+        f"GROUP BY t.name ORDER BY {FIRST_SEEN}",
+        params,
+    ):
+        scan["tool_counts"][name] = count
+
+    sources: List[Tuple[Path, List[List[int]]]] = []
+    for path, project, start, end in conn.execute(
+        f"SELECT s.path, s.project, t.start_offset, t.end_offset FROM prompts t JOIN sessions s ON s.id = t.session_id"
+        f"{where} ORDER BY s.walk_pos, t.id",
+        params,
+    ):
+        if not sources or str(sources[-1][0]) != path:
+            sources.append((Path(path), []))
+            scan["project_prompts"].setdefault(project, []).append(sources[-1])
+        sources[-1][1].append([start, end])
+
+    if window is None:
+        query = (
+            f"SELECT t.word, SUM(t.count) AS total, {FIRST_SEEN} AS seen "
+            f"FROM words t JOIN sessions s ON s.id = t.session_id{where} GROUP BY t.word"
+        )
+        limit = []
+        if word_capacity:
+            query = f"SELECT * FROM ({query} ORDER BY total DESC, seen LIMIT ?)"
+            limit = [word_capacity]
+        for word, total, _ in conn.execute(f"{query} ORDER BY seen", params + limit):
+            scan["word_counts"][word] = total
+    else:
+        for path, spans in sources:
+            counts: Counter = Counter()
+            for prompt in iter_prompts(path, spans):
+                _count_words(counts, prompt)
+                if word_capacity and len(counts) > 2 * word_capacity:
+                    prune_word_counts(counts, word_capacity)
+            if word_capacity:
+                prune_word_counts(counts, word_capacity)
+            scan["word_counts"].update(counts)
+            if word_capacity and len(scan["word_counts"]) > 2 * word_capacity:
+                prune_word_counts(scan["word_counts"], word_capacity)
+
+    records = "FROM records t JOIN sessions s ON s.id = t.session_id"
+    if window is None:
+        query = (
+            f"SELECT parse_errors, user_messages, interrupts, first_timestamp, last_timestamp, timestamp_count "
+            f"FROM sessions s{where} ORDER BY walk_pos"
+        )
+    else:
+        query = (
+            f"SELECT s.parse_errors, COUNT(CASE WHEN t.role = 'user' THEN 1 END), SUM(t.interrupts), "
+            f"MIN(t.timestamp), MAX(t.timestamp), COUNT(*) {records}{where} GROUP BY s.id ORDER BY s.walk_pos"
+        )
+    for parse_errors, user_messages, interrupts, first, last, count in conn.execute(query, params):
+        if not parse_errors:
+            if user_messages <= 1:
+                scan["abandoned_count"] += 1
+            scan["interrupt_count"] += interrupts
+        _add_session_minutes(scan, {"first_timestamp": first, "last_timestamp": last, "timestamp_count": count})
+
+    if window is None and not projects:
+        return scan
+
+    if window is None:
+        query = f"SELECT DISTINCT s.project FROM sessions s{where} ORDER BY 1"
+    else:
+        query = f"SELECT DISTINCT s.project {records}{where} ORDER BY 1"
+    scan["projects"] = [project for (project,) in conn.execute(query, params)]
+    scan["project_count"] = len(scan["projects"])
+    sessions = conn.execute(
+        f"SELECT MIN(t.timestamp), MAX(t.timestamp), COUNT(CASE WHEN t.role IN ('user', 'assistant') THEN 1 END) "
+        f"{records}{where} GROUP BY s.id ORDER BY s.walk_pos",
+        params,
+    ).fetchall()
+    totals = {"sessions": sessions, "days": {}, "models": {}}
+    where, params = _index_where(window, projects, "t.role IN ('user', 'assistant')")
+    for day, messages, tool_calls in conn.execute(
+        f"SELECT date(t.time, 'unixepoch', 'localtime') AS day, COUNT(*), SUM(t.tool_calls) {records}{where} "
+        f"GROUP BY day",
+        params,
+    ):
+        totals["days"][day] = [messages, tool_calls]
+    where, params = _index_where(window, projects, "t.model IS NOT NULL")
+    usage = ", ".join(f"SUM(t.{field})" for field in USAGE_FIELDS)
+    for model, *values in conn.execute(
+        f"SELECT t.model, {usage} {records}{where} GROUP BY t.model ORDER BY {FIRST_SEEN}", params
+    ):
+        totals["models"][model] = dict(zip(USAGE_FIELDS.values(), values))
+    scan["window"] = totals
+    return scan
+
+
+# ---------------------------------------------------------------------------
+# Columnar event export (--events)
+# ---------------------------------------------------------------------------
+
+
+def _new_event_columns() -> dict:
+    """Empty columns for one session file's events; names are ids into its own "names"."""
+    return {
+        "ts": array.array(EVENT_COLUMNS["ts"]),
+        "kind": array.array(EVENT_COLUMNS["kind"]),
+        "name": array.array(EVENT_COLUMNS["name"]),
+        "names": {},
+    }
+
+
+def _add_event(events: dict, ms: int, kind: int, name=None) -> None:
+    events["ts"].append(ms)
+    events["kind"].append(kind)
+    events["name"].append(EVENT_NO_NAME if name is None else events["names"].setdefault(name, len(events["names"])))
+
+
+def _feed_event_record(digest: dict, record: dict, span: List[int], window=None) -> None:
+    """Add the events of one record to digest["events"], telling tools and prompts apart like _feed_record.
+
+    With a window, records without a timestamp inside it have no events.
+    """
+    moment = _record_time(record.get("timestamp"))
+    if window is not None and (moment is None or not _in_window(moment, window)):
+        return
+    ms = (moment - EPOCH) // timedelta(milliseconds=1) if moment is not None else EVENT_NO_TIME
+
+    kind, name, tools = "record", None, ()
+    message = record.get("message", {})
+    if isinstance(message, dict):
+        if record.get("type") != "file-history-snapshot":
+            content = message.get("content")
+            if isinstance(content, list):
+                tools = [
+                    item.get("name", "")
+                    for item in content
+                    if isinstance(item, dict) and item.get("type") == "tool_use" and item.get("name", "")
+                ]
+            elif _extract_prompt(record, message) is not None:
+                kind = "prompt"
+        stop = message.get("stop_reason")
+        if kind == "record" and stop and isinstance(stop, str):
+            kind, name = "stop", stop
+
+    events = digest["events"]
+    _add_event(events, ms, EVENT_KIND_IDS[kind], name)
+    for tool in tools:
+        _add_event(events, ms, EVENT_KIND_IDS["tool_use"], tool)
+
+
+def _feed_with_events(digest: dict, record: dict, span: List[int], feed, window=None) -> None:
+    """Feed a record with feed, then add its events to digest["events"]."""
+    feed(digest, record, span)
+    _feed_event_record(digest, record, span, window)
+
+
+def export_session_file(path: Path, window=None) -> Optional[dict]:
+    """Events of one whole session file as columns (see _new_event_columns), or None if unreadable.
+
+    The columns come back with "scanned": {bytes, records} like scan_session_file entries.
+    """
+    try:
+        with path.open("rb") as f:
+            digest = _new_digest()
+            digest["events"] = _new_event_columns()
+            _, size, decoded = _feed_lines(digest, f, 0, partial(_feed_event_record, window=window))
+    except OSError:
+        return None
+    events = digest["events"]
+    events["scanned"] = {"bytes": size, "records": decoded}
+    return events
+
+
+def _export_session_files(paths: List[Path], jobs: int = 1, window=None) -> Iterator[Optional[dict]]:
+    """export_session_file for each path in order, on up to jobs processes."""
+    if jobs <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield export_session_file(path, window)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(
+            export_session_file, paths, [window] * len(paths), chunksize=max(1, len(paths) // (jobs * 8))
+        )
 
-    return int(total_minutes)
+
+def open_event_columns(out_dir: Path) -> dict:
+    """Start writing events to out_dir; append with write_session_events, finish with close_event_columns.
+
+    Raises OSError if out_dir cannot be written.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return {
+        "dir": out_dir,
+        "outputs": {column: (out_dir / f"{column}.bin.tmp").open("wb") for column in EVENT_COLUMNS},
+        "sessions": [],
+        "projects": {},
+        "names": {},
+        "count": 0,
+    }
+
+
+def write_session_events(columns: dict, projects_dir: Path, path: Path, events: dict) -> None:
+    """Append the events of one session file (see _new_event_columns) to columns from open_event_columns."""
+    n = len(events["ts"])
+    if not n:
+        return
+    outputs, names = columns["outputs"], columns["names"]
+    project = columns["projects"].setdefault(_project_name(projects_dir, path), len(columns["projects"]))
+    ids = [names.setdefault(name, len(names)) for name in events["names"]]
+    events["ts"].tofile(outputs["ts"])
+    (array.array(EVENT_COLUMNS["session"], [len(columns["sessions"])]) * n).tofile(outputs["session"])
+    (array.array(EVENT_COLUMNS["project"], [project]) * n).tofile(outputs["project"])
+    events["kind"].tofile(outputs["kind"])
+    array.array(
+        EVENT_COLUMNS["name"], [EVENT_NO_NAME if i == EVENT_NO_NAME else ids[i] for i in events["name"]]
+    ).tofile(outputs["name"])
+    columns["sessions"].append(str(path.relative_to(projects_dir)))
+    columns["count"] += n
+
+
+def close_event_columns(columns: dict, window=None, failed: bool = False) -> Optional[dict]:
+    """Finish columns from open_event_columns: move the column files in place, then write the manifest.
+
+    Returns the manifest (see export_events). With failed, the files are only closed and
+    None is returned, leaving any earlier export in out_dir as it was.
+    """
+    for output in columns["outputs"].values():
+        output.close()
+    if failed:
+        return None
+    out_dir = columns["dir"]
+    manifest = {
+        "version": EVENTS_VERSION,
+        "count": columns["count"],
+        "byteorder": sys.byteorder,
+        "columns": {column: {"file": f"{column}.bin", "type": typecode} for column, typecode in EVENT_COLUMNS.items()},
+        "kinds": list(EVENT_KINDS),
+        "sessions": columns["sessions"],
+        "projects": list(columns["projects"]),
+        "names": list(columns["names"]),
+        "window": [bound.isoformat() if bound else None for bound in window] if window else None,
+    }
+    for column in EVENT_COLUMNS:
+        os.replace(out_dir / f"{column}.bin.tmp", out_dir / f"{column}.bin")
+    tmp_path = out_dir / (EVENTS_MANIFEST_NAME + ".tmp")
+    tmp_path.write_text(json.dumps(manifest, separators=(",", ":")))
+    os.replace(tmp_path, out_dir / EVENTS_MANIFEST_NAME)
+    return manifest
+
+
+def export_events(
+    files: List[Tuple[Path, Optional[os.stat_result]]],
+    projects_dir: Path,
+    out_dir: Path,
+    jobs: int = 1,
+    window=None,
+) -> dict:
+    """Write the events of the (path, stat) pairs from walk_session_files to out_dir as columns.
+
+    Every file is read in full, on up to jobs processes, and its events are appended in walk
+    order, so nothing but one file's columns is held at a time. With a window, only records
+    inside it have events, and the manifest's "window" holds its bounds. Each column goes to
+    <column>.bin as a raw array of its EVENT_COLUMNS typecode in native byte order, and the
+    manifest (EVENTS_MANIFEST_NAME) is written last. Returns the manifest with the scan
+    counts under "metrics". Raises OSError if out_dir cannot be written.
+
+    This reads the files a second time; scan_projects(events=...) writes the same columns
+    from its own pass.
+    """
+    paths = [path for path, st in files if st is not None]
+    metrics = {"files_visited": len(files), "files_parsed": 0, "bytes_read": 0, "records_parsed": 0}
+    columns = open_event_columns(out_dir)
+    try:
+        for path, events in zip(paths, _export_session_files(paths, jobs, window)):
+            if events is None:
+                continue
+            scanned = events.pop("scanned")
+            metrics["files_parsed"] += 1
+            metrics["bytes_read"] += scanned["bytes"]
+            metrics["records_parsed"] += scanned["records"]
+            write_session_events(columns, projects_dir, path, events)
+    except BaseException:
+        close_event_columns(columns, failed=True)
+        raise
+    return dict(close_event_columns(columns, window), metrics=metrics)
+
+
+def load_events(events_dir: Path) -> dict:
+    """Read the manifest written by export_events, with each column under "columns".
+
+    Columns are memoryviews cast to their typecode over a read-only mmap of the column file,
+    so nothing is decoded or copied until used (numpy.frombuffer takes them as they are).
+    Files written on a machine of the other byte order are read into byte-swapped arrays
+    instead. Raises ValueError for an unknown version or a column of the wrong size, and
+    OSError if a file cannot be read.
+    """
+    manifest = json.loads((events_dir / EVENTS_MANIFEST_NAME).read_text())
+    if manifest.get("version") != EVENTS_VERSION:
+        raise ValueError(f"unsupported events version {manifest.get('version')!r}")
+    columns = {}
+    for column, spec in manifest["columns"].items():
+        path = events_dir / spec["file"]
+        values = array.array(spec["type"])
+        if path.stat().st_size != manifest["count"] * values.itemsize:
+            raise ValueError(f"{path} does not hold {manifest['count']} values")
+        if manifest["byteorder"] != sys.byteorder or not manifest["count"]:
+            values.frombytes(path.read_bytes())
+            if manifest["byteorder"] != sys.byteorder:
+                values.byteswap()
+            columns[column] = values
+            continue
+        with path.open("rb") as f:
+            columns[column] = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast(spec["type"])
+    return dict(manifest, columns=columns)
 
 
 # ---------------------------------------------------------------------------
 # Data extraction functions
 # ---------------------------------------------------------------------------
 
+
 def load_stats_cache(path: Path) -> dict:
     """Load and validate stats-cache.json."""
     if not path.exists():
@@ -165,77 +1854,47 @@ def load_stats_cache(path: Path) -> dict:
         sys.exit(1)
 
 
-def iter_jsonl_files(projects_dir: Path) -> Iterator[Path]:
-    """Yield all JSONL files, excluding subagents."""
-    if not projects_dir.exists():
-        return
-    for path in projects_dir.rglob("*.jsonl"):
-        if "subagents" not in path.parts:
-            yield path
-
-
-def iter_jsonl_records(projects_dir: Path) -> Iterator[dict]:
-    """Stream all JSONL records from project files, excluding metadata records."""
-    for path in iter_jsonl_files(projects_dir):
-        try:
-            for line in path.read_text().splitlines():
-                if line.strip():
-                    try:
-                        record = json.loads(line)
-                        if record.get("type") == "file-history-snapshot":
-                            continue
-                        yield record
-                    except json.JSONDecodeError:
-                        pass
-        except Exception:
-            pass
-
-
-def extract_tools(projects_dir: Path) -> Dict[str, int]:
-    """Count tool usage from all session files."""
-    counts: Counter = Counter()
-    for record in iter_jsonl_records(projects_dir):
-        content = record.get("message", {}).get("content")
-        if isinstance(content, list):
-            for item in content:
-                if isinstance(item, dict) and item.get("type") == "tool_use":
-                    name = item.get("name", "")
-                    if name:
-                        counts[name] += 1
-    return dict(counts.most_common())
+def windowed_stats(scan: dict) -> dict:
+    """The stats-cache.json fields the bundle uses, recomputed from a windowed scan.
 
+    Sessions count towards the local hour and day of their first record in the window;
+    messages and tool calls towards the local day they were sent.
+    """
+    totals = scan["window"]
+    daily = {
+        day: {"date": day, "messageCount": messages, "sessionCount": 0, "toolCallCount": tool_calls}
+        for day, (messages, tool_calls) in totals["days"].items()
+    }
+    hour_counts: Counter = Counter()
+    longest = {"duration": 0, "messageCount": 0}
+    sessions = 0
+    for first, last, messages in totals["sessions"]:
+        start, end = _record_time(first), _record_time(last)
+        if start is None or end is None:
+            continue
+        sessions += 1
+        local_start = start.astimezone()
+        hour_counts[str(local_start.hour)] += 1
+        day = local_start.date().isoformat()
+        daily.setdefault(day, {"date": day, "messageCount": 0, "sessionCount": 0, "toolCallCount": 0})
+        daily[day]["sessionCount"] += 1
+        duration = int((end - start).total_seconds() * 1000)
+        if duration > longest["duration"]:
+            longest = {"duration": duration, "messageCount": messages}
 
-def extract_user_prompts_by_project(projects_dir: Path) -> Iterator[Tuple[str, str]]:
-    """Extract user prompts grouped by project. Yields (project_name, prompt) tuples."""
-    if not projects_dir.exists():
-        return
+    return {
+        "totalSessions": sessions,
+        "totalMessages": sum(day["messageCount"] for day in daily.values()),
+        "modelUsage": totals["models"],
+        "hourCounts": {str(h): hour_counts[str(h)] for h in range(24) if hour_counts[str(h)]},
+        "dailyActivity": [daily[day] for day in sorted(daily)],
+        "longestSession": longest,
+    }
 
-    for jsonl_path in iter_jsonl_files(projects_dir):
-        try:
-            project_name = jsonl_path.relative_to(projects_dir).parts[0]
-        except (ValueError, IndexError):
-            project_name = "unknown"
 
-        try:
-            for line in jsonl_path.read_text().splitlines():
-                if not line.strip():
-                    continue
-                try:
-                    record = json.loads(line)
-                    if record.get("type") == "file-history-snapshot":
-                        continue
-                    if record.get("isMeta"):
-                        continue
-                    msg = record.get("message", {})
-                    if msg.get("role") == "user":
-                        content = msg.get("content")
-                        if isinstance(content, str) and content.strip():
-                            if not SYSTEM_TAG_PATTERN.match(content.strip()):
-                                yield (project_name, content)
-                except json.JSONDecodeError:
-                    pass
-        except Exception:
-            pass
+def extract_tools(scan: dict) -> Dict[str, int]:
+    """Tool usage counts from all session files, most used first."""
+    return dict(scan["tool_counts"].most_common())
 
 
 def longest_streak(dates: List[str]) -> int:
@@ -271,17 +1930,12 @@ def weekend_percentage(dates: List[str]) -> int:
     return round(weekends / len(parsed) * 100)
 
 
-def compute_top_words(projects_dir: Path, top_n: int = 20) -> List[Tuple[str, int]]:
-    """Count word frequencies from all user prompts, excluding stopwords."""
-    word_counts: Counter = Counter()
-    for _, prompt_text in extract_user_prompts_by_project(projects_dir):
-        words = WORD_PATTERN.findall(prompt_text.lower())
-        meaningful_words = [w for w in words if w not in STOPWORDS and len(w) > 1]
-        word_counts.update(meaningful_words)
-    return word_counts.most_common(top_n)
+def compute_top_words(scan: dict, top_n: int = 20) -> List[Tuple[str, int]]:
+    """Most frequent words across all user prompts, excluding stopwords."""
+    return scan["word_counts"].most_common(top_n)
 
 
-def calculate_quirks(stats: dict, projects_dir: Path) -> dict:
+def calculate_quirks(stats: dict, scan: dict) -> dict:
     """Calculate behavioral quirks (time-based, not text-based)."""
     hour_counts = stats.get("hourCounts", {})
 
@@ -301,28 +1955,9 @@ def calculate_quirks(stats: dict, projects_dir: Path) -> dict:
     streak = longest_streak(dates)
     weekend_pct = weekend_percentage(dates)
 
-    # Count interrupted/abandoned sessions
-    interrupt_count = 0
-    abandoned_count = 0
-
-    for path in iter_jsonl_files(projects_dir):
-        try:
-            records = [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
-            user_msgs = [r for r in records if r.get("message", {}).get("role") == "user"]
-            if len(user_msgs) <= 1:
-                abandoned_count += 1
-
-            for r in records:
-                stop = r.get("message", {}).get("stop_reason", "")
-                if stop and stop not in ("end_turn", "tool_use"):
-                    if any(x in stop.lower() for x in ("interrupt", "cancel", "stop")):
-                        interrupt_count += 1
-        except Exception:
-            pass
-
     return {
-        "interruptCount": interrupt_count,
-        "abandonedSessions": abandoned_count,
+        "interruptCount": scan["interrupt_count"],
+        "abandonedSessions": scan["abandoned_count"],
         "lateNightSessions": late_night,
         "earlyMorningSessions": early_morning,
         "weekendPercentage": weekend_pct,
@@ -336,8 +1971,13 @@ def build_bundle(
     tool_usage: Dict[str, int],
     quirks: dict,
     projects_dir: Path,
+    total_minutes: int,
+    project_count: Optional[int] = None,
 ) -> dict:
-    """Assemble the stats bundle as a plain dict."""
+    """Assemble the stats bundle as a plain dict.
+
+    project_count defaults to the number of project directories under projects_dir.
+    """
     # Calculate token totals from model usage
     model_usage_raw = base_stats.get("modelUsage", {})
     input_tokens = sum(v.get("inputTokens", 0) for v in model_usage_raw.values())
@@ -368,26 +2008,22 @@ def build_bundle(
         peak_hour = int(max(hour_counts_dict, key=lambda k: hour_counts_dict[k]))
 
     # Project count
-    project_count = 0
-    if projects_dir.exists():
-        project_count = sum(1 for p in projects_dir.iterdir() if p.is_dir())
+    if project_count is None:
+        project_count = 0
+        if projects_dir.exists():
+            project_count = sum(1 for p in projects_dir.iterdir() if p.is_dir())
 
     # Days active with full date list
     daily_activity = base_stats.get("dailyActivity", [])
     days_active = len(daily_activity)
     active_dates = [
-        {"date": d.get("date"), "sessions": d.get("sessionCount", 1)}
-        for d in daily_activity
-        if d.get("date")
+        {"date": d.get("date"), "sessions": d.get("sessionCount", 1)} for d in daily_activity if d.get("date")
     ]
 
     # Longest session
     longest_session = base_stats.get("longestSession", {})
     longest_minutes = longest_session.get("duration", 0) // 60000
 
-    # Calculate total session time from timestamps
-    total_minutes = calculate_total_session_minutes(projects_dir)
-
     return {
         "stats": {
             "totalSessions": base_stats.get("totalSessions", 0),
@@ -413,41 +2049,957 @@ def build_bundle(
     }
 
 
-def write_prompts_to_files(projects_dir: Path, prompts_dir: Path) -> Tuple[int, int]:
-    """Write prompts to temp files organized by project. Returns (total_prompts, total_files)."""
+def _zstandard():
+    """The optional zstandard module, or None when it is not installed."""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _pack_str(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return struct.pack("<H", len(data)) + data
+
+
+def _unpack_str(data: bytes, pos: int) -> Tuple[str, int]:
+    (length,) = struct.unpack_from("<H", data, pos)
+    pos += 2
+    return data[pos : pos + length].decode("utf-8"), pos + length
+
+
+def _open_chunk(path: Path, compression: Optional[str]) -> dict:
+    """Start a prompt chunk file, plain text or compressed."""
+    chunk = {"path": path, "count": 0, "compress": None}
+    if compression is None:
+        chunk["file"] = path.open("w")
+        return chunk
+
+    chunk["file"] = path.open("wb")
+    if compression == "zstd":
+        chunk["compress"] = _zstandard().ZstdCompressor(level=3).compress
+    else:
+        chunk["compress"] = lambda data: gzip.compress(data, compresslevel=6, mtime=0)
+    chunk["pending"] = bytearray()
+    chunk["frames"] = []
+    chunk["prompts"] = []
+    return chunk
+
+
+def _flush_frame(chunk: dict) -> None:
+    """Compress the text buffered for a chunk into its next frame."""
+    if chunk["pending"]:
+        frame = chunk["compress"](bytes(chunk["pending"]))
+        chunk["frames"].append((chunk["file"].tell(), len(frame)))
+        chunk["file"].write(frame)
+        chunk["pending"] = bytearray()
+
+
+def _write_prompt(chunk: dict, prompt: str) -> None:
+    """Append a prompt to a chunk, after the separator unless it is the first."""
+    if chunk["compress"] is None:
+        chunk["file"].write(PROMPT_SEPARATOR + prompt if chunk["count"] else prompt)
+    else:
+        pending = chunk["pending"]
+        if chunk["count"]:
+            pending += PROMPT_SEPARATOR.encode()
+        data = prompt.encode("utf-8", "replace")
+        chunk["prompts"].append((len(chunk["frames"]), len(pending), len(data)))
+        pending += data
+        if len(pending) >= PROMPT_FRAME_BYTES:
+            _flush_frame(chunk)
+    chunk["count"] += 1
+
+
+def _close_chunk(chunk: dict, index: Optional[BinaryIO], project_name: str) -> None:
+    """Finish a chunk file and, for compressed chunks, append its record to the index."""
+    if chunk["compress"] is not None:
+        _flush_frame(chunk)
+    chunk["file"].close()
+    if index is not None:
+        index.write(_pack_str(chunk["path"].name) + _pack_str(project_name))
+        index.write(struct.pack("<I", len(chunk["frames"])))
+        index.write(b"".join(struct.pack("<QI", *frame) for frame in chunk["frames"]))
+        index.write(struct.pack("<I", len(chunk["prompts"])))
+        index.write(b"".join(struct.pack("<III", *prompt) for prompt in chunk["prompts"]))
+
+
+def _reopen_chunk(chunk: dict) -> None:
+    """Open a chunk closed by _close_chunk again, to append to it."""
+    chunk["file"] = chunk["path"].open("a" if chunk["compress"] is None else "ab")
+
+
+def _record_file(files: dict, path: Path) -> None:
+    st = path.stat()
+    files["on_disk"][path.name] = (st.st_size, st.st_mtime_ns)
+
+
+def open_prompt_files(prompts_dir: Path, compression: Optional[str] = None) -> dict:
+    """Empty prompts_dir and return the state append_prompt_files writes prompt files with.
+
+    The state counts the prompts and files written so far, keeps each project's last chunk
+    so later prompts of that project continue it, and records the size and mtime every
+    file was left with (see prompt_files_intact).
+    """
     if prompts_dir.exists():
         shutil.rmtree(prompts_dir)
     prompts_dir.mkdir(parents=True)
+    files = {
+        "dir": prompts_dir,
+        "compression": compression,
+        "suffix": PROMPT_CHUNK_SUFFIXES[compression] if compression else ".txt",
+        "chunks": {},
+        "names": {},
+        "on_disk": {},
+        "prompts": 0,
+        "files": 0,
+    }
+    if compression:
+        index_path = prompts_dir / PROMPT_INDEX_NAME
+        index_path.write_bytes(PROMPT_INDEX_MAGIC + struct.pack("<B", PROMPT_INDEX_VERSION))
+        _record_file(files, index_path)
+    return files
+
+
+def prompt_files_intact(files: dict) -> bool:
+    """Whether the files written through files are still on disk exactly as they were left.
+
+    Not so once the prompts directory was deleted or written again by another run, and
+    appending would then fail or mix prompts into files it no longer describes.
+    """
+    try:
+        names = {path.name for path in files["dir"].iterdir()}
+        if names != files["on_disk"].keys():
+            return False
+        for name, recorded in files["on_disk"].items():
+            st = (files["dir"] / name).stat()
+            if (st.st_size, st.st_mtime_ns) != recorded:
+                return False
+    except OSError:
+        return False
+    return True
+
+
+def append_prompt_files(files: dict, project_prompts: Dict[str, list]) -> None:
+    """Append the prompts of project_prompts to the prompt files of open_prompt_files.
+
+    Prompts are streamed from the session files into rolling chunk files of
+    PROMPTS_PER_CHUNK, so only one prompt and one open chunk file are held at a time. A
+    project's last chunk is continued until it is full. Every chunk is closed again before
+    returning, so the files are complete between calls; a compressed chunk written to
+    again gets a new record in prompts.idx, which supersedes the old one. File names start
+    with the first 20 characters of the project name, and a hash of the full name when
+    another project already has that prefix.
+    """
+    compression = files["compression"]
+    index = (files["dir"] / PROMPT_INDEX_NAME).open("ab") if compression else None
+    try:
+        for project_name, sources in project_prompts.items():
+            safe_name = files["names"].get(project_name)
+            if safe_name is None:
+                safe_name = project_name[:20].replace("/", "-").replace("\\", "-")
+                if safe_name in files["names"].values():
+                    safe_name += "-" + hashlib.blake2b(project_name.encode(), digest_size=4).hexdigest()
+                files["names"][project_name] = safe_name
+            chunk = files["chunks"].get(project_name)
+            is_open = False
+            try:
+                for path, spans in sources:
+                    for prompt in iter_prompts(path, spans):
+                        if chunk is None or chunk["count"] == PROMPTS_PER_CHUNK:
+                            if is_open:
+                                _close_chunk(chunk, index, project_name)
+                            number = chunk["number"] + 1 if chunk is not None else 1
+                            filename = f"project-{safe_name}-chunk-{number}{files['suffix']}"
+                            chunk = _open_chunk(files["dir"] / filename, compression)
+                            chunk["number"] = number
+                            files["chunks"][project_name] = chunk
+                            files["files"] += 1
+                            is_open = True
+                        elif not is_open:
+                            _reopen_chunk(chunk)
+                            is_open = True
+                        _write_prompt(chunk, prompt)
+                        files["prompts"] += 1
+            finally:
+                if is_open:
+                    _close_chunk(chunk, index, project_name)
+                    _record_file(files, chunk["path"])
+    finally:
+        if index is not None:
+            index.close()
+            _record_file(files, files["dir"] / PROMPT_INDEX_NAME)
+
+
+def write_prompts_to_files(
+    project_prompts: Dict[str, list],
+    prompts_dir: Path,
+    compression: Optional[str] = None,
+) -> Tuple[int, int]:
+    """Write prompts to temp files organized by project. Returns (total_prompts, total_files).
+
+    With compression ("gzip" or "zstd") chunks are written compressed and indexed in
+    prompts.idx (see read_indexed_prompt). See append_prompt_files.
+    """
+    files = open_prompt_files(prompts_dir, compression)
+    append_prompt_files(files, project_prompts)
+    return files["prompts"], files["files"]
+
+
+def read_prompt_index(prompts_dir: Path) -> Dict[str, dict]:
+    """Chunks listed in prompts.idx by file name, as {project, frames, prompts}.
+
+    frames are (offset, length) in the chunk file; prompts are (frame, start, length) in
+    the decompressed frame. A chunk appended to later has a record for each time it was
+    written; the last record of a file name, the one describing the file on disk, wins.
+    """
+    path = prompts_dir / PROMPT_INDEX_NAME
+    data = path.read_bytes()
+    if data[:4] != PROMPT_INDEX_MAGIC or data[4:5] != struct.pack("<B", PROMPT_INDEX_VERSION):
+        raise ValueError(f"{path} is not a version {PROMPT_INDEX_VERSION} prompt index")
+
+    chunks = {}
+    pos = 5
+    while pos < len(data):
+        filename, pos = _unpack_str(data, pos)
+        project, pos = _unpack_str(data, pos)
+        (frame_count,) = struct.unpack_from("<I", data, pos)
+        pos += 4
+        frames = list(struct.iter_unpack("<QI", data[pos : pos + 12 * frame_count]))
+        pos += 12 * frame_count
+        (prompt_count,) = struct.unpack_from("<I", data, pos)
+        pos += 4
+        prompts = list(struct.iter_unpack("<III", data[pos : pos + 12 * prompt_count]))
+        pos += 12 * prompt_count
+        chunks[filename] = {"project": project, "frames": frames, "prompts": prompts}
+    return chunks
+
+
+def read_indexed_prompt(prompts_dir: Path, filename: str, chunk: dict, i: int) -> str:
+    """Prompt i of a compressed chunk from read_prompt_index, decompressing only its frame."""
+    frame_idx, start, length = chunk["prompts"][i]
+    offset, frame_length = chunk["frames"][frame_idx]
+    with (prompts_dir / filename).open("rb") as f:
+        f.seek(offset)
+        frame = f.read(frame_length)
+    if filename.endswith(PROMPT_CHUNK_SUFFIXES["zstd"]):
+        data = _zstandard().ZstdDecompressor().decompress(frame)
+    else:
+        data = gzip.decompress(frame)
+    return data[start : start + length].decode("utf-8")
+
+
+# ---------------------------------------------------------------------------
+# Prompt deduplication and sampling (--dedupe-prompts / --prompt-budget)
+# ---------------------------------------------------------------------------
+
+
+def _prompt_digest(prompt: str) -> bytes:
+    """Hash of a prompt ignoring case and whitespace, to find exact duplicates."""
+    return hashlib.blake2b(" ".join(prompt.split()).casefold().encode(), digest_size=16).digest()
+
+
+def simhash(text: str, cache: Optional[dict] = None) -> Optional[int]:
+    """64-bit SimHash of the distinct word bigrams of text, or None below NEAR_DUPLICATE_MIN_WORDS words.
+
+    Only the first SIMHASH_MAX_FEATURES bigrams count. Each adds the bits of its hash into
+    byte lanes of one integer, so the per-bit tallies cost one addition per bigram. cache
+    maps bigrams to those integers across calls; it is emptied at SIMHASH_CACHE_SIZE.
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < NEAR_DUPLICATE_MIN_WORDS:
+        return None
+    if cache is None:
+        cache = {}
+    lanes = features = 0
+    for bigram in dict.fromkeys(zip(words, words[1:])):
+        spread = cache.get(bigram)
+        if spread is None:
+            if len(cache) >= SIMHASH_CACHE_SIZE:
+                cache.clear()
+            digest = hashlib.blake2b(" ".join(bigram).encode(), digest_size=8).digest()
+            spread = cache[bigram] = int.from_bytes(b"".join([SIMHASH_BYTE_LANES[byte] for byte in digest]), "big")
+        lanes += spread
+        features += 1
+        if features == SIMHASH_MAX_FEATURES:
+            break
+    return int("".join("1" if 2 * count > features else "0" for count in lanes.to_bytes(64, "big")), 2)
+
+
+def _is_near_duplicate(bands: List[dict], fingerprint: int) -> bool:
+    """Whether a SimHash within NEAR_DUPLICATE_MAX_BITS bits of fingerprint was seen; if not, remember it.
+
+    Fingerprints are indexed by len(bands) slices of their bits. Two within that many bits
+    of each other differ in fewer slices than there are, so they share at least one.
+    """
+    width = 64 // len(bands)
+    keys = [(fingerprint >> (i * width)) & ((1 << width) - 1) for i in range(len(bands))]
+    for band, key in zip(bands, keys):
+        for other in band.get(key, ()):
+            if bin(fingerprint ^ other).count("1") <= NEAR_DUPLICATE_MAX_BITS:
+                return True
+    for band, key in zip(bands, keys):
+        band.setdefault(key, []).append(fingerprint)
+    return False
+
+
+def _stratum_shares(sizes: Dict[tuple, int], budget: int) -> Dict[tuple, int]:
+    """Split budget over strata as evenly as their sizes allow: small ones get all they need."""
+    shares = {}
+    pending = sorted(sizes, key=lambda stratum: sizes[stratum])
+    for i, stratum in enumerate(pending):
+        share = budget // (len(pending) - i)
+        if sizes[stratum] > share:
+            shares.update(dict.fromkeys(pending[i:], share))
+            break
+        shares[stratum] = sizes[stratum]
+        budget -= sizes[stratum]
+    return shares
+
+
+def new_prompt_selection() -> dict:
+    """What select_prompts has seen: the report so far and the prompts to deduplicate against."""
+    return {
+        "report": {"prompts": 0, "bytes": 0, "duplicates": 0, "nearDuplicates": 0, "sampledOut": 0, "bytesRemoved": 0},
+        "seen": set(),
+        "bands": [{} for _ in range(NEAR_DUPLICATE_MAX_BITS + 1)],
+        "bigrams": {},
+    }
+
+
+def select_prompts(
+    project_prompts: Dict[str, list],
+    dedupe: bool = False,
+    budget: Optional[int] = None,
+    selection: Optional[dict] = None,
+) -> Tuple[Dict[str, list], dict]:
+    """Drop repeated prompts and sample the rest down to budget bytes before they are written.
+
+    With dedupe, a prompt is dropped if the same text, ignoring case and whitespace, came
+    before it, or a near duplicate did (see simhash and _is_near_duplicate). With budget,
+    the prompts left are sampled per project and month, splitting budget bytes of UTF-8
+    text over those strata as evenly as their sizes allow; within each, prompts are taken
+    in the order of their hashes, so the sample is the same on every run. Each prompt is
+    read here once, and the kept ones again by write_prompts_to_files. Returns
+    project_prompts with only the kept spans, and a report of what was removed.
+
+    selection, from new_prompt_selection, carries the prompts seen by earlier calls, so
+    prompts added later are deduplicated against them, and the report covers all calls.
+    """
+    if selection is None:
+        selection = new_prompt_selection()
+    report = selection["report"]
+    seen = selection["seen"]
+    bands = selection["bands"]
+    bigram_cache = selection["bigrams"]
+    kept = []
+    for project, sources in project_prompts.items():
+        for i, (path, spans) in enumerate(sources):
+            for span, prompt, ts in iter_prompt_records(path, spans):
+                size = len(prompt.encode())
+                report["prompts"] += 1
+                report["bytes"] += size
+                digest = _prompt_digest(prompt)
+                if dedupe:
+                    if digest in seen:
+                        report["duplicates"] += 1
+                        report["bytesRemoved"] += size
+                        continue
+                    seen.add(digest)
+                    fingerprint = simhash(prompt, bigram_cache)
+                    if fingerprint is not None and _is_near_duplicate(bands, fingerprint):
+                        report["nearDuplicates"] += 1
+                        report["bytesRemoved"] += size
+                        continue
+                kept.append((project, i, span, (project, ts[:7] if ts else ""), size, digest))
+
+    if budget is not None:
+        sizes: Counter = Counter()
+        for _, _, _, stratum, size, _ in kept:
+            sizes[stratum] += size
+        shares = _stratum_shares(sizes, budget)
+        used: Counter = Counter()
+        sampled = set()
+        for n in sorted(range(len(kept)), key=lambda n: kept[n][5]):
+            _, _, _, stratum, size, _ = kept[n]
+            if used[stratum] + size <= shares[stratum]:
+                used[stratum] += size
+                sampled.add(n)
+            else:
+                report["sampledOut"] += 1
+                report["bytesRemoved"] += size
+        kept = [item for n, item in enumerate(kept) if n in sampled]
+
+    selected: Dict[str, list] = {}
+    last = None
+    for project, i, span, _, _, _ in kept:
+        if (project, i) != last:
+            selected.setdefault(project, []).append((project_prompts[project][i][0], []))
+            last = (project, i)
+        selected[project][-1][1].append(span)
+    return selected, dict(report)
+
+
+def parse_byte_size(value: str) -> int:
+    """Bytes in a size like 500000, 800K or 4M (powers of 1024)."""
+    match = BYTE_SIZE_PATTERN.fullmatch(value.strip().upper())
+    if not match:
+        raise ValueError(f"expected a size like 500000, 800K or 4M, got {value!r}")
+    number, unit = match.groups()
+    return int(float(number) * 1024 ** " KMG".index(unit or " "))
+
+
+# ---------------------------------------------------------------------------
+# Profiling
+# ---------------------------------------------------------------------------
+
+
+def new_profile(detail: Optional[str] = None) -> dict:
+    """Empty --profile report. detail is None, "cprofile" or "tracemalloc"."""
+    return {"detail": detail, "json_backend": JSON_BACKEND, "stages": {}, "metrics": {}}
+
+
+@contextmanager
+def profile_stage(profile: Optional[dict], name: str) -> Iterator[None]:
+    """Time the enclosed block as one stage of profile. Does nothing when profile is None.
+
+    With cprofile detail the stage's profiler is kept under "profiler" for dumping; with
+    tracemalloc detail the peak allocation and the top allocation sites are recorded.
+    Worker processes started by --jobs are not covered by either.
+    """
+    if profile is None:
+        yield
+        return
 
-    # Group prompts by project
-    project_prompts: Dict[str, List[str]] = {}
-    for project_name, prompt_text in extract_user_prompts_by_project(projects_dir):
-        if project_name not in project_prompts:
-            project_prompts[project_name] = []
-        project_prompts[project_name].append(prompt_text)
+    detail = profile["detail"]
+    stage: dict = {}
+    profiler = None
+    if detail == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    elif detail == "tracemalloc":
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage["seconds"] = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+            stage["profiler"] = profiler
+        elif detail == "tracemalloc":
+            _, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics("lineno")[:PROFILE_TOP_N]
+            tracemalloc.stop()
+            stage["peak_bytes"] = peak
+            stage["top_allocations"] = [{"site": str(stat.traceback), "bytes": stat.size} for stat in top]
+        profile["stages"][name] = stage
+
+
+def _top_functions(profiler) -> str:
+    """The PROFILE_TOP_N functions with the highest cumulative time, as pstats prints them."""
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+    return out.getvalue()
+
+
+def write_profile(profile: dict, path: Optional[Path] = None) -> None:
+    """Report stage timings and scan metrics to stderr, or as JSON to path.
+
+    cProfile data for each stage is written next to path as <stem>.<stage>.prof, for
+    pstats or snakeviz; without a path the top functions are printed instead.
+    """
+    stages = profile["stages"]
+    metrics = profile["metrics"]
+    total = sum(stage["seconds"] for stage in stages.values())
+
+    if path is None:
+        print(
+            f"profile: {metrics.get('files_visited', 0)} files visited, "
+            f"{metrics.get('files_parsed', 0)} parsed, "
+            f"{metrics.get('bytes_read', 0) / 1e6:.1f} MB read, "
+            f"{metrics.get('records_parsed', 0)} records parsed with {profile['json_backend']}",
+            file=sys.stderr,
+        )
+        for name, stage in stages.items():
+            line = f"  {name:<24} {stage['seconds'] * 1000:>10.1f} ms"
+            if "peak_bytes" in stage:
+                line += f" {stage['peak_bytes'] / 1e6:>9.1f} MB peak"
+            print(line, file=sys.stderr)
+            for alloc in stage.get("top_allocations", []):
+                print(f"      {alloc['bytes'] / 1e6:>8.2f} MB  {alloc['site']}", file=sys.stderr)
+            if "profiler" in stage:
+                print(_top_functions(stage["profiler"]), file=sys.stderr)
+        print(f"  {'total':<24} {total * 1000:>10.1f} ms", file=sys.stderr)
+        return
+
+    report: dict = {
+        "total_seconds": round(total, 6),
+        "json_backend": profile["json_backend"],
+        "metrics": metrics,
+        "stages": {},
+    }
+    try:
+        for name, stage in stages.items():
+            entry = {key: value for key, value in stage.items() if key != "profiler"}
+            entry["seconds"] = round(stage["seconds"], 6)
+            if "profiler" in stage:
+                prof_path = path.with_name(f"{path.stem}.{name}.prof")
+                stage["profiler"].dump_stats(str(prof_path))
+                entry["cprofile"] = str(prof_path)
+            report["stages"][name] = entry
+        path.write_text(json.dumps(report, indent=2) + "\n")
+    except OSError as e:
+        print(f"Warning: Could not write profile {path}: {e}", file=sys.stderr)
 
-    total_prompts = 0
-    total_files = 0
 
-    for project_name, prompts_list in project_prompts.items():
-        safe_name = project_name[:20].replace("/", "-").replace("\\", "-")
+# ---------------------------------------------------------------------------
+# Partial aggregates (--partial / --merge)
+# ---------------------------------------------------------------------------
 
-        for chunk_idx, start in enumerate(range(0, len(prompts_list), PROMPTS_PER_CHUNK), 1):
-            chunk = prompts_list[start : start + PROMPTS_PER_CHUNK]
-            total_prompts += len(chunk)
-            total_files += 1
 
-            filename = f"project-{safe_name}-chunk-{chunk_idx}.txt"
-            filepath = prompts_dir / filename
-            filepath.write_text("\n\n---\n\n".join(chunk))
+def build_partial(base_stats: dict, scan: dict, projects_dir: Path, word_capacity: Optional[int] = None) -> dict:
+    """What the output of one claude dir is computed from, as a small dict merge_partials can add up.
+
+    Daily activity and session minutes are keyed by local day, so partials of trees with
+    overlapping days add up. Word counts are a Misra-Gries summary of at most
+    word_capacity (default PARTIAL_WORD_CAPACITY) words (see prune_word_counts). Prompts
+    are not included, only counts, project directory names and those words. A filtered
+    scan's project names are those it found sessions in (scan["projects"]).
+    """
+    daily = {
+        day["date"]: {
+            "messageCount": day.get("messageCount", 0),
+            "sessionCount": day.get("sessionCount", 1),
+            "toolCallCount": day.get("toolCallCount", 0),
+        }
+        for day in base_stats.get("dailyActivity", [])
+        if day.get("date")
+    }
+    models = {
+        model: {name: value for name, value in usage.items() if isinstance(value, (int, float))}
+        for model, usage in base_stats.get("modelUsage", {}).items()
+        if isinstance(usage, dict)
+    }
+    longest = base_stats.get("longestSession", {})
+    capacity = word_capacity or PARTIAL_WORD_CAPACITY
+    words = Counter(scan["word_counts"])
+    prune_word_counts(words, capacity)
+    if "projects" in scan:
+        projects = scan["projects"]
+    else:
+        projects = sorted(p.name for p in projects_dir.iterdir() if p.is_dir()) if projects_dir.exists() else []
+
+    return {
+        "version": PARTIAL_VERSION,
+        "sources": 1,
+        "totalSessions": base_stats.get("totalSessions", 0),
+        "totalMessages": base_stats.get("totalMessages", 0),
+        "modelUsage": models,
+        "hourCounts": {str(hour): count for hour, count in base_stats.get("hourCounts", {}).items()},
+        "dailyActivity": daily,
+        "longestSession": {"duration": longest.get("duration", 0), "messageCount": longest.get("messageCount", 0)},
+        "sessionMinutes": scan["daily_minutes"],
+        "toolCounts": dict(scan["tool_counts"]),
+        "interruptCount": scan["interrupt_count"],
+        "abandonedCount": scan["abandoned_count"],
+        "projects": projects,
+        "wordCapacity": capacity,
+        "words": list(words.items()),
+    }
 
-    return total_prompts, total_files
+
+def _add_counts(totals: dict, counts: dict) -> None:
+    """Add counts to totals, key by key."""
+    for name, value in counts.items():
+        totals[name] = totals.get(name, 0) + value
+
+
+def merge_partials(partials: List[dict]) -> dict:
+    """Add up partial aggregates (see build_partial), in order, into one.
+
+    The longest session is the longest of all, projects with the same directory name
+    count once, and word summaries are added and cut to the smallest capacity among them,
+    which keeps the Misra-Gries error bound. Ties are ordered as they first appear, like
+    in a single scan, so the result is also a partial and can be merged again.
+    """
+    merged = {
+        "version": PARTIAL_VERSION,
+        "sources": 0,
+        "totalSessions": 0,
+        "totalMessages": 0,
+        "modelUsage": {},
+        "hourCounts": {},
+        "dailyActivity": {},
+        "longestSession": {"duration": 0, "messageCount": 0},
+        "sessionMinutes": {},
+        "toolCounts": {},
+        "interruptCount": 0,
+        "abandonedCount": 0,
+    }
+    projects = set()
+    capacity = None
+    words: Counter = Counter()
+    for part in partials:
+        for key in ("sources", "totalSessions", "totalMessages", "interruptCount", "abandonedCount"):
+            merged[key] += part[key]
+        for model, usage in part["modelUsage"].items():
+            _add_counts(merged["modelUsage"].setdefault(model, {}), usage)
+        for day, counts in part["dailyActivity"].items():
+            _add_counts(merged["dailyActivity"].setdefault(day, {}), counts)
+        for key in ("hourCounts", "sessionMinutes", "toolCounts"):
+            _add_counts(merged[key], part[key])
+        if part["longestSession"]["duration"] > merged["longestSession"]["duration"]:
+            merged["longestSession"] = dict(part["longestSession"])
+        projects.update(part["projects"])
+        capacity = part["wordCapacity"] if capacity is None else min(capacity, part["wordCapacity"])
+        words.update(dict(part["words"]))
+        if len(words) > 2 * capacity:
+            prune_word_counts(words, capacity)
+
+    capacity = capacity or PARTIAL_WORD_CAPACITY
+    prune_word_counts(words, capacity)
+    merged["projects"] = sorted(projects)
+    merged["wordCapacity"] = capacity
+    merged["words"] = list(words.items())
+    return merged
+
+
+def partial_stats(partial: dict) -> Tuple[dict, dict]:
+    """The stats-cache.json fields and the scan build_output needs, from a partial aggregate.
+
+    The scan holds no prompts; its project_count is the number of distinct project names.
+    """
+    daily = partial["dailyActivity"]
+    base_stats = {
+        "totalSessions": partial["totalSessions"],
+        "totalMessages": partial["totalMessages"],
+        "modelUsage": partial["modelUsage"],
+        "hourCounts": partial["hourCounts"],
+        "dailyActivity": [{"date": day, **daily[day]} for day in sorted(daily)],
+        "longestSession": partial["longestSession"],
+    }
+    scan = {
+        "tool_counts": Counter(partial["toolCounts"]),
+        "word_counts": Counter(dict(partial["words"])),
+        "project_prompts": {},
+        "interrupt_count": partial["interruptCount"],
+        "abandoned_count": partial["abandonedCount"],
+        "session_minutes": sum(partial["sessionMinutes"].values()),
+        "daily_minutes": dict(partial["sessionMinutes"]),
+        "project_count": len(partial["projects"]),
+    }
+    return base_stats, scan
+
+
+def load_partial(path: Path) -> dict:
+    """Load a partial aggregate written by --partial."""
+    try:
+        partial = json.loads(path.read_text())
+    except (OSError, ValueError) as e:
+        print(json.dumps({"error": f"Could not read partial aggregate {path}: {e}"}), file=sys.stdout)
+        sys.exit(1)
+    if not isinstance(partial, dict) or partial.get("version") != PARTIAL_VERSION:
+        print(json.dumps({"error": f"{path} is not a version {PARTIAL_VERSION} partial aggregate"}), file=sys.stdout)
+        sys.exit(1)
+    return partial
+
+
+def write_partial(partial: dict, path: Path) -> None:
+    """Write a partial aggregate to path, or to stdout if path is "-"."""
+    text = json.dumps(partial, separators=(",", ":"))
+    if str(path) == "-":
+        sys.stdout.write(text)
+        sys.stdout.flush()
+        return
+    try:
+        path.write_text(text)
+    except OSError as e:
+        print(json.dumps({"error": f"Could not write partial aggregate {path}: {e}"}), file=sys.stdout)
+        sys.exit(1)
+
+
+# ---------------------------------------------------------------------------
+# Watch mode (--watch / --snapshot)
+# ---------------------------------------------------------------------------
+
+
+def build_output(
+    base_stats: dict,
+    scan: dict,
+    projects_dir: Path,
+    prompts_dir: Path,
+    compression: Optional[str] = None,
+    profile: Optional[dict] = None,
+    dedupe: bool = False,
+    budget: Optional[int] = None,
+    prompt_files: Optional[dict] = None,
+    selection: Optional[dict] = None,
+) -> dict:
+    """Turn stats and a scan into the JSON printed on stdout, writing the prompt files on the way.
+
+    With dedupe or budget, only the prompts select_prompts keeps are written, and
+    "promptSelection" reports how many were removed. With prompt_files (see
+    open_prompt_files) the scan's prompts are appended to those files instead of replacing
+    prompts_dir, and selection is passed on to select_prompts; both then count everything
+    written so far.
+    """
+    # Extract tool usage
+    with profile_stage(profile, "extract_tools"):
+        tool_usage = extract_tools(scan)
+
+    # Calculate quirks
+    with profile_stage(profile, "calculate_quirks"):
+        quirks = calculate_quirks(base_stats, scan)
+
+    # Compute top words
+    with profile_stage(profile, "compute_top_words"):
+        top_words = compute_top_words(scan)
+
+    # Build bundle (stats + quirks)
+    with profile_stage(profile, "build_bundle"):
+        bundle = build_bundle(
+            base_stats,
+            tool_usage,
+            quirks,
+            projects_dir,
+            calculate_total_session_minutes(scan),
+            scan.get("project_count"),
+        )
+
+    # Drop duplicate prompts and sample to the budget
+    project_prompts = scan["project_prompts"]
+    report = None
+    if dedupe or budget is not None:
+        with profile_stage(profile, "select_prompts"):
+            project_prompts, report = select_prompts(project_prompts, dedupe, budget, selection)
+
+    # Write prompt files
+    with profile_stage(profile, "write_prompts_to_files"):
+        if prompt_files is None:
+            prompt_count, file_count = write_prompts_to_files(project_prompts, prompts_dir, compression)
+        else:
+            append_prompt_files(prompt_files, project_prompts)
+            prompt_count, file_count = prompt_files["prompts"], prompt_files["files"]
+
+    output = {
+        **bundle,
+        "topWords": [{"word": w, "count": c} for w, c in top_words],
+        "promptsDir": str(prompts_dir),
+        "promptCount": prompt_count,
+        "fileCount": file_count,
+    }
+    if report is not None:
+        output["promptSelection"] = report
+    return output
+
+
+def tree_state(claude_dir: Path) -> dict:
+    """What the output depends on: the mtime of stats-cache.json and the size and mtime of every session file."""
+    try:
+        stats_mtime = (claude_dir / "stats-cache.json").stat().st_mtime_ns
+    except OSError:
+        stats_mtime = None
+    files = {
+        str(path): [st.st_size, st.st_mtime_ns]
+        for path, st in walk_session_files(claude_dir / "projects")
+        if st is not None
+    }
+    return {"stats": stats_mtime, "files": files}
+
+
+def save_snapshot(path: Path, state: dict, options: dict, output: dict) -> None:
+    """Write the output of a run over the tree in state atomically, with the options it was made with."""
+    try:
+        prompts_mtime = Path(options["promptsDir"]).stat().st_mtime_ns
+    except OSError:
+        prompts_mtime = None
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "options": options,
+        "state": state,
+        "promptsMtimeNs": prompts_mtime,
+        "output": output,
+    }
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        tmp_path.write_text(json.dumps(snapshot, separators=(",", ":"), default=str))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Warning: Could not write snapshot {path}: {e}", file=sys.stderr)
+
+
+def load_snapshot(path: Path, state: dict, options: dict) -> Optional[dict]:
+    """The output saved in the snapshot at path, or None unless it was made with options of the tree in state.
+
+    The prompt files it refers to must also still be there, untouched since.
+    """
+    try:
+        snapshot = decode_json(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    if snapshot.get("options") != options or snapshot.get("state") != state:
+        return None
+    try:
+        prompts_mtime = Path(options["promptsDir"]).stat().st_mtime_ns
+    except OSError:
+        return None
+    if prompts_mtime != snapshot.get("promptsMtimeNs"):
+        return None
+    return snapshot.get("output")
+
+
+def _unwritten_prompts(project_prompts: Dict[str, list], written: Dict[str, int], rescanned: set) -> Optional[dict]:
+    """The prompt spans of project_prompts not in the prompt files yet, or None if those must be rewritten.
+
+    written maps session files to how many of their prompt spans were written, and is
+    updated. The prompt files no longer match once a session file with prompts in them
+    was read again from its start (see scan_projects), has fewer prompts, or is gone.
+    """
+    unwritten: Dict[str, list] = {}
+    counts = {}
+    for project, sources in project_prompts.items():
+        for path, spans in sources:
+            key = str(path)
+            done = written.get(key, 0)
+            if done and (key in rescanned or len(spans) < done):
+                return None
+            counts[key] = len(spans)
+            if len(spans) > done:
+                unwritten.setdefault(project, []).append((path, spans[done:]))
+    if not written.keys() <= counts.keys():
+        return None
+    written.update(counts)
+    return unwritten
+
+
+def new_watcher(cache: Optional[dict] = None) -> dict:
+    """The state update_watched keeps between updates, starting from a loaded scan cache."""
+    return {"cache": cache or {}, "prompt_files": None, "selection": None, "written": {}}
+
+
+def update_watched(
+    claude_dir: Path,
+    prompts_dir: Path,
+    watcher: dict,
+    jobs: int = 1,
+    word_capacity: Optional[int] = None,
+    compression: Optional[str] = None,
+    dedupe: bool = False,
+    budget: Optional[int] = None,
+) -> dict:
+    """Scan claude_dir again and bring the prompt files up to date; one update of watch.
+
+    Returns the output a run would print, the scan metrics, how many prompts were written
+    and whether the prompt files were written again from scratch, which they also are when
+    they were deleted or changed by something else since the last update.
+    """
+    projects_dir = claude_dir / "projects"
+    base_stats = load_stats_cache(claude_dir / "stats-cache.json")
+    scan = scan_projects(projects_dir, watcher["cache"], jobs, word_capacity)
+    watcher["cache"] = scan["cache"]
+    unwritten = None
+    if watcher["prompt_files"] is not None and budget is None and prompt_files_intact(watcher["prompt_files"]):
+        unwritten = _unwritten_prompts(scan["project_prompts"], watcher["written"], scan["rescanned"])
+    rewritten = unwritten is None
+    if rewritten:
+        watcher["prompt_files"] = open_prompt_files(prompts_dir, compression)
+        watcher["selection"] = new_prompt_selection()
+        watcher["written"] = {}
+        unwritten = _unwritten_prompts(scan["project_prompts"], watcher["written"], set())
+    output = build_output(
+        base_stats,
+        {**scan, "project_prompts": unwritten},
+        projects_dir,
+        prompts_dir,
+        compression,
+        None,
+        dedupe,
+        budget,
+        watcher["prompt_files"],
+        watcher["selection"],
+    )
+    return {
+        "output": output,
+        "metrics": scan["metrics"],
+        "prompts": sum(len(spans) for sources in unwritten.values() for _, spans in sources),
+        "rewritten": rewritten,
+    }
+
+
+def watch(
+    claude_dir: Path,
+    prompts_dir: Path,
+    interval: float = WATCH_INTERVAL_SECONDS,
+    jobs: int = 1,
+    word_capacity: Optional[int] = None,
+    compression: Optional[str] = None,
+    dedupe: bool = False,
+    budget: Optional[int] = None,
+) -> None:
+    """Keep the scan cache, prompt files and snapshot current until interrupted.
+
+    The tree is polled every interval seconds and nothing is read until a session file or
+    stats-cache.json changes. Then only the new bytes of appended files are parsed,
+    including the rest of a line that was unfinished at the last poll; truncated or
+    replaced files are scanned again and deleted ones dropped (see scan_session_file).
+    Aggregates are merged again from the per-file digests, so the stats in the snapshot
+    are exactly what a run at that moment would print.
+
+    Only the prompts of the new bytes are written, at the end of their project's last
+    chunk, so the prompt files hold the same prompts as a run would write but in the order
+    they arrived (with dedupe, the copy of a repeated prompt seen first is the one kept).
+    The prompt files are written again from scratch when a session file with prompts in
+    them was truncated, replaced or deleted, when the prompt files themselves were deleted
+    or written by another run, and on every update with a budget, since the sample depends
+    on all the prompts. An update that fails with an OSError is tried again at the next
+    poll instead of stopping the watch.
+    """
+    cache_file = claude_dir / SCAN_CACHE_NAME
+    options = {
+        "claudeDir": str(claude_dir),
+        "promptsDir": str(prompts_dir),
+        "compress": compression,
+        "topWordsCapacity": word_capacity,
+        "dedupePrompts": dedupe,
+        "promptBudget": budget,
+    }
+    watcher = new_watcher(load_scan_cache(cache_file))
+    last_state = None
+    while True:
+        state = tree_state(claude_dir)
+        if state != last_state:
+            try:
+                update = update_watched(
+                    claude_dir, prompts_dir, watcher, jobs, word_capacity, compression, dedupe, budget
+                )
+            except OSError as e:
+                # E.g. the prompts directory removed mid-update: write it all again next time
+                print(f"{datetime.now():%H:%M:%S} update failed, retrying: {e}", file=sys.stderr)
+                watcher["prompt_files"] = None
+                time.sleep(interval)
+                continue
+            save_scan_cache(cache_file, watcher["cache"])
+            save_snapshot(SNAPSHOT_FILE, state, options, update["output"])
+            metrics = update["metrics"]
+            print(
+                f"{datetime.now():%H:%M:%S} snapshot updated: {metrics['files_parsed']} of "
+                f"{metrics['files_visited']} files parsed, {metrics['bytes_read'] / 1e6:.1f} MB read, "
+                f"{update['prompts']} prompts {'written' if update['rewritten'] else 'appended'}",
+                file=sys.stderr,
+            )
+            last_state = state
+        time.sleep(interval)
 
 
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
 
+
 def main():
     parser = argparse.ArgumentParser(description="Extract Claude Code usage stats for VibeChecked")
     parser.add_argument(
@@ -462,40 +3014,301 @@ def main():
         default=Path.home() / ".claude",
         help="Path to .claude directory (default: ~/.claude)",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Re-scan every session file instead of reusing {SCAN_CACHE_NAME} from the last run "
+        "(with --index, rebuild the index)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes used to parse session files (default: 1)",
+    )
+    parser.add_argument(
+        "--since",
+        help="Only count activity from this point on: YYYY-MM-DD, an ISO datetime, or Nd for N days ago",
+    )
+    parser.add_argument(
+        "--until",
+        help="Only count activity before this point (a date includes that whole day)",
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help=f"Keep every session in a SQLite index ({SESSION_INDEX_NAME} in the claude dir), updated "
+        "incrementally, and compute the stats from it",
+    )
+    parser.add_argument(
+        "--project",
+        action="append",
+        metavar="NAME",
+        help="With --index, only count sessions of this project directory under projects/, "
+        "e.g. --project=-Users-me-app (repeatable)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help=f"Keep running, and after every change to the session files refresh the prompt files, "
+        f"the scan cache and {SNAPSHOT_FILE} (Ctrl-C to stop)",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=WATCH_INTERVAL_SECONDS,
+        metavar="SECONDS",
+        help=f"How often --watch polls the session files (default: {WATCH_INTERVAL_SECONDS:g})",
+    )
+    parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help=f"Print the {SNAPSHOT_FILE} written by --watch if nothing changed since, "
+        "otherwise run as usual and save a new one",
+    )
+    parser.add_argument(
+        "--partial",
+        type=Path,
+        metavar="FILE",
+        help="Write a partial aggregate of this tree to FILE ('-' for stdout) instead of the stats, "
+        "for --merge elsewhere; no prompt files are written",
+    )
+    parser.add_argument(
+        "--merge",
+        type=Path,
+        action="append",
+        metavar="FILE",
+        help="Add a partial aggregate written by --partial, e.g. on another machine, to the stats of this "
+        "tree; prompt files only come from this tree (repeatable)",
+    )
+    parser.add_argument(
+        "--events",
+        type=Path,
+        metavar="DIR",
+        help=f"Also write every tool use, prompt, stop reason and record timestamp to DIR as memory-mappable "
+        f"typed columns described by {EVENTS_MANIFEST_NAME} (reads every session file in full)",
+    )
+    parser.add_argument(
+        "--top-words-capacity",
+        type=int,
+        metavar="N",
+        help="Approximate top words keeping at most N word counters per session file and 2N overall, "
+        "instead of counting every distinct word (at least 20)",
+    )
+    parser.add_argument(
+        "--compress",
+        choices=sorted(PROMPT_CHUNK_SUFFIXES),
+        help=f"Write prompt chunks compressed, with a {PROMPT_INDEX_NAME} index of every prompt "
+        "(zstd needs the zstandard package; default: plain text)",
+    )
+    parser.add_argument(
+        "--dedupe-prompts",
+        action="store_true",
+        help="Leave repeated prompts out of the prompt files: the same text ignoring case and whitespace, "
+        "and near duplicates by SimHash",
+    )
+    parser.add_argument(
+        "--prompt-budget",
+        metavar="SIZE",
+        help="Sample the prompt files down to about SIZE bytes of prompts (e.g. 4M), spread evenly over "
+        "projects and months",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Report per-stage timings and scan counts on stderr (stdout is unchanged)",
+    )
+    parser.add_argument(
+        "--profile-file",
+        type=Path,
+        help="Write the --profile report as JSON to this file instead of stderr (implies --profile)",
+    )
+    parser.add_argument(
+        "--profile-detail",
+        choices=["cprofile", "tracemalloc"],
+        help="Also run each stage under cProfile or tracemalloc (implies --profile)",
+    )
     args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.top_words_capacity is not None and args.top_words_capacity < 20:
+        parser.error("--top-words-capacity must be at least 20, the number of top words reported")
+    if args.project and not args.index:
+        parser.error("--project needs --index")
+    if (args.watch or args.snapshot) and (args.since or args.until or args.index):
+        parser.error("--watch and --snapshot cannot be combined with --since, --until or --index")
+    if (args.watch or args.snapshot) and (args.partial is not None or args.merge or args.events is not None):
+        parser.error("--watch and --snapshot cannot be combined with --partial, --merge or --events")
+    if args.watch_interval <= 0:
+        parser.error("--watch-interval must be positive")
+    prompt_budget = None
+    if args.prompt_budget is not None:
+        try:
+            prompt_budget = parse_byte_size(args.prompt_budget)
+        except ValueError as e:
+            parser.error(f"invalid --prompt-budget: {e}")
+    if args.compress == "zstd" and _zstandard() is None:
+        parser.error("--compress zstd needs the zstandard package (pip install zstandard)")
+    window = None
+    if args.since or args.until:
+        try:
+            window = (
+                parse_window_bound(args.since) if args.since else None,
+                parse_window_bound(args.until, end=True) if args.until else None,
+            )
+        except ValueError as e:
+            parser.error(f"invalid --since/--until value: {e}")
+    profiling = args.profile or args.profile_file is not None or args.profile_detail is not None
+    profile = new_profile(args.profile_detail) if profiling else None
 
     claude_dir = args.claude_dir
     stats_file = claude_dir / "stats-cache.json"
     projects_dir = claude_dir / "projects"
 
-    # Load stats
-    base_stats = load_stats_cache(stats_file)
-
-    # Extract tool usage
-    tool_usage = extract_tools(projects_dir)
-
-    # Calculate quirks
-    quirks = calculate_quirks(base_stats, projects_dir)
-
-    # Compute top words
-    top_words = compute_top_words(projects_dir)
+    if args.watch:
+        try:
+            watch(
+                claude_dir,
+                args.prompts_dir,
+                args.watch_interval,
+                args.jobs,
+                args.top_words_capacity,
+                args.compress,
+                args.dedupe_prompts,
+                prompt_budget,
+            )
+        except KeyboardInterrupt:
+            pass
+        return
 
-    # Build bundle (stats + quirks)
-    bundle = build_bundle(base_stats, tool_usage, quirks, projects_dir)
+    # A snapshot is only used if it describes the tree as it is now
+    if args.snapshot:
+        snapshot_options = {
+            "claudeDir": str(claude_dir),
+            "promptsDir": str(args.prompts_dir),
+            "compress": args.compress,
+            "topWordsCapacity": args.top_words_capacity,
+            "dedupePrompts": args.dedupe_prompts,
+            "promptBudget": prompt_budget,
+        }
+        with profile_stage(profile, "load_snapshot"):
+            state = tree_state(claude_dir)
+            output = load_snapshot(SNAPSHOT_FILE, state, snapshot_options)
+        if output is not None:
+            with profile_stage(profile, "write_output"):
+                json.dump(output, sys.stdout, default=str)
+                sys.stdout.flush()
+            if profile is not None:
+                write_profile(profile, args.profile_file)
+            return
+
+    # Partials from other trees are checked before any scanning
+    if args.merge:
+        with profile_stage(profile, "load_partials"):
+            partials = [load_partial(path) for path in args.merge]
+
+    # Load stats (recomputed from the session records instead when only part of them count)
+    filtered = window is not None or bool(args.project)
+    if not filtered:
+        with profile_stage(profile, "load_stats_cache"):
+            base_stats = load_stats_cache(stats_file)
+
+    if args.index:
+        # Index new or changed session files, then aggregate everything from SQLite
+        index_file = claude_dir / SESSION_INDEX_NAME
+        try:
+            with profile_stage(profile, "update_session_index"):
+                index = open_session_index(index_file, rebuild=args.no_cache)
+                indexed = update_session_index(index, projects_dir, args.jobs)
+            with profile_stage(profile, "query_session_index"):
+                scan = query_session_index(index, window, args.project, args.top_words_capacity)
+            index.close()
+        except sqlite3.Error as e:
+            print(json.dumps({"error": f"Session index {index_file} failed: {e}"}), file=sys.stdout)
+            sys.exit(1)
+        scan.update(indexed)
+    else:
+        # Single pass over new or changed session files, reusing cached digests for the rest.
+        # Windowed scans only hold part of each file, so they neither use nor update the cache.
+        # Events come from the same pass, which then reads every file but still saves the cache.
+        use_cache = window is None and not args.no_cache
+        cache_file = claude_dir / SCAN_CACHE_NAME
+        with profile_stage(profile, "load_scan_cache"):
+            cache = load_scan_cache(cache_file) if use_cache and args.events is None else None
+        columns = None
+        try:
+            if args.events is not None:
+                columns = open_event_columns(args.events)
+            with profile_stage(profile, "scan_projects"):
+                scan = scan_projects(projects_dir, cache, args.jobs, args.top_words_capacity, window, events=columns)
+            if columns is not None:
+                with profile_stage(profile, "export_events"):
+                    close_event_columns(columns, window)
+        except OSError as e:
+            if args.events is None:
+                raise
+            if columns is not None:
+                close_event_columns(columns, failed=True)
+            print(json.dumps({"error": f"Event export to {args.events} failed: {e}"}), file=sys.stdout)
+            sys.exit(1)
+        if use_cache:
+            with profile_stage(profile, "save_scan_cache"):
+                save_scan_cache(cache_file, scan["cache"])
+    if filtered:
+        with profile_stage(profile, "windowed_stats"):
+            base_stats = windowed_stats(scan)
+
+    if args.index and args.events is not None:
+        # The index only reads what was appended, so events need their own pass
+        try:
+            with profile_stage(profile, "export_events"):
+                files = scan["files"]
+                if args.project:
+                    files = [(path, st) for path, st in files if _project_name(projects_dir, path) in args.project]
+                export_events(files, projects_dir, args.events, args.jobs, window)
+        except OSError as e:
+            print(json.dumps({"error": f"Event export to {args.events} failed: {e}"}), file=sys.stdout)
+            sys.exit(1)
+
+    output_scan = scan
+    if args.partial is not None or args.merge:
+        with profile_stage(profile, "build_partial"):
+            aggregate = build_partial(base_stats, scan, projects_dir, args.top_words_capacity)
+        if args.merge:
+            with profile_stage(profile, "merge_partials"):
+                aggregate = merge_partials([aggregate] + partials)
+                base_stats, output_scan = partial_stats(aggregate)
+                output_scan["project_prompts"] = scan["project_prompts"]
+    if args.partial is not None:
+        with profile_stage(profile, "write_partial"):
+            write_partial(aggregate, args.partial)
+        if profile is not None:
+            profile["metrics"] = scan["metrics"]
+            write_profile(profile, args.profile_file)
+        return
 
-    # Write prompt files
-    prompt_count, file_count = write_prompts_to_files(projects_dir, args.prompts_dir)
+    output = build_output(
+        base_stats,
+        output_scan,
+        projects_dir,
+        args.prompts_dir,
+        args.compress,
+        profile,
+        args.dedupe_prompts,
+        prompt_budget,
+    )
+    if args.snapshot:
+        with profile_stage(profile, "save_snapshot"):
+            save_snapshot(SNAPSHOT_FILE, state, snapshot_options, output)
 
     # Output JSON to stdout
-    output = {
-        **bundle,
-        "topWords": [{"word": w, "count": c} for w, c in top_words],
-        "promptsDir": str(args.prompts_dir),
-        "promptCount": prompt_count,
-        "fileCount": file_count,
-    }
+    with profile_stage(profile, "write_output"):
+        json.dump(output, sys.stdout, default=str)
+        sys.stdout.flush()
 
-    json.dump(output, sys.stdout, default=str)
+    if profile is not None:
+        profile["metrics"] = scan["metrics"]
+        write_profile(profile, args.profile_file)
 
 
 if __name__ == "__main__":
@@ -7,23 +7,36 @@ Combines:
   - /tmp/vibes-style.json   (Analysis B: communication style + obsessions)
   - /tmp/vibes-persona.json (Analysis C: persona + traits + fun facts)
 
-Produces the final AnonymousBundle, uploads to server, prints the URL.
+Produces the final AnonymousBundle, checks it against schema/bundle.schema.json (see the
+generated bundle_validator.py), uploads to server, prints the URL.
+The upload is gzip-compressed and retried with backoff under one Idempotency-Key, so the
+server stores it once; a bundle that still could not be uploaded stays in
+/tmp/vibes-outbox for --resume, unless the server rejected it outright (a 4xx).
 
 Usage:
     python3 merge_and_upload.py
     python3 merge_and_upload.py --dry-run   # Print bundle JSON without uploading
+    python3 merge_and_upload.py --resume    # Upload queued bundles again, without merging
+    python3 merge_and_upload.py --base-url http://127.0.0.1:3000  # Another server, e.g. a local one
 """
 
 from __future__ import annotations
 
 import argparse
+import gzip
+import http.client
 import json
+import os
+import random
 import sys
-import urllib.error
-import urllib.request
+import time
+import urllib.parse
+import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 
+from bundle_validator import validate_bundle
+
 BASE_URL = "https://getyourvibechecked.vercel.app"
 
 STATS_FILE = Path("/tmp/vibes-stats.json")
@@ -31,6 +44,19 @@ QUOTES_FILE = Path("/tmp/vibes-quotes.json")
 STYLE_FILE = Path("/tmp/vibes-style.json")
 PERSONA_FILE = Path("/tmp/vibes-persona.json")
 
+# Uploads are queued here until the server accepts them, so --resume can retry them
+OUTBOX_DIR = Path("/tmp/vibes-outbox")
+
+# Retries back off exponentially from RETRY_BASE_SECONDS; only these statuses are retried
+UPLOAD_TIMEOUT_SECONDS = 15
+UPLOAD_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 8.0
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+# A server that cannot decode gzip request bodies answers 415, or 400 with an error about decoding
+GZIP_REJECTED_STATUS = 415
+GZIP_DECODE_ERROR = "decode"
+
 
 def load_json(path: Path) -> dict:
     """Load a JSON file, returning empty dict if missing or invalid."""
@@ -64,31 +90,256 @@ def merge_bundle(stats_data: dict, quotes: dict, style: dict, persona: dict) ->
     }
 
 
-def upload_bundle(bundle: dict) -> str | None:
-    """Upload bundle to server and return short ID."""
+def encode_payload(payload: dict, compress: bool = True) -> bytes:
+    """Compact JSON for a request body, gzip-compressed unless compress is False."""
+    data = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    return gzip.compress(data, mtime=0) if compress else data
+
+
+def new_session(base_url: str = BASE_URL, timeout: float = UPLOAD_TIMEOUT_SECONDS) -> dict:
+    """Upload state for requests to base_url: one keep-alive connection, and whether gzip bodies work.
+
+    The connection is only opened by the first request and reopened after a failure, so
+    several endpoints (e.g. /api/store and /api/submit) share one TCP and TLS handshake.
+    """
+    parts = urllib.parse.urlsplit(base_url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"Unsupported server URL: {base_url}")
+    return {
+        "scheme": parts.scheme,
+        "host": parts.hostname,
+        "port": parts.port,
+        "prefix": parts.path.rstrip("/"),
+        "timeout": timeout,
+        "conn": None,
+        "connections": 0,
+        "gzip": True,
+        "rejected": None,
+    }
+
+
+def close_session(session: dict) -> None:
+    """Close the session's connection, if open. The next request opens a new one."""
+    if session["conn"] is not None:
+        session["conn"].close()
+        session["conn"] = None
+
+
+def post_json(session: dict, endpoint: str, payload: dict, key: str | None = None) -> tuple[int, dict | None]:
+    """POST payload to endpoint over the session's connection. Returns (status, JSON object in the response).
+
+    key is sent as the Idempotency-Key header. gzip bodies are sent as
+    application/octet-stream, which the Vercel body parser hands over as raw bytes instead
+    of failing to parse them as JSON. Raises OSError or http.client.HTTPException if the
+    connection fails, after closing it.
+    """
+    headers = {"Content-Type": "application/json"}
+    if session["gzip"]:
+        headers = {"Content-Type": "application/octet-stream", "Content-Encoding": "gzip"}
+    if key:
+        headers["Idempotency-Key"] = key
+    body = encode_payload(payload, session["gzip"])
+    if session["conn"] is None:
+        connection_class = http.client.HTTPSConnection if session["scheme"] == "https" else http.client.HTTPConnection
+        session["conn"] = connection_class(session["host"], session["port"], timeout=session["timeout"])
+        session["connections"] += 1
+    try:
+        session["conn"].request("POST", session["prefix"] + endpoint, body=body, headers=headers)
+        response = session["conn"].getresponse()
+        data = response.read()
+    except (OSError, http.client.HTTPException):
+        close_session(session)
+        raise
+    if response.will_close:
+        close_session(session)
     try:
-        data = json.dumps(bundle).encode("utf-8")
-        req = urllib.request.Request(
-            f"{BASE_URL}/api/store",
-            data=data,
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
-        with urllib.request.urlopen(req, timeout=15) as response:
-            if response.status == 200:
-                result = json.loads(response.read().decode("utf-8"))
-                return result.get("id")
-    except urllib.error.URLError as e:
-        print(f"Upload failed: {e}", file=sys.stderr)
-    except Exception as e:
-        print(f"Upload error: {e}", file=sys.stderr)
+        result = json.loads(data.decode("utf-8"))
+    except ValueError:
+        result = None
+    return response.status, result if isinstance(result, dict) else None
+
+
+def gzip_rejected(status: int, result: dict | None) -> bool:
+    """Whether a response to a gzip-encoded body says the server could not decode it."""
+    if status == GZIP_REJECTED_STATUS:
+        return True
+    error = result.get("error") if result else None
+    return status == 400 and isinstance(error, str) and GZIP_DECODE_ERROR in error.lower()
+
+
+def send_with_retries(
+    session: dict, endpoint: str, payload: dict, attempts: int = UPLOAD_ATTEMPTS, key: str | None = None
+) -> dict | None:
+    """POST payload to endpoint until the server accepts it. Returns its JSON response, or None.
+
+    Connection failures and RETRYABLE_STATUSES are retried with exponential backoff (with
+    jitter, capped at RETRY_MAX_SECONDS) up to attempts times; other statuses fail at once.
+    A 4xx among those means the server will never take the payload: session["rejected"]
+    is then set to the error, and to None after any other outcome.
+    Every attempt carries the same Idempotency-Key (key, or a new one), so a request the
+    server got but whose response was lost is not stored again when retried. A server that
+    cannot decode a gzip-encoded body (see gzip_rejected) gets it again uncompressed right
+    away, and the rest of the session is sent uncompressed.
+    """
+    key = key or str(uuid.uuid4())
+    session["rejected"] = None
+    for attempt in range(1, attempts + 1):
+        try:
+            status, result = post_json(session, endpoint, payload, key)
+            if session["gzip"] and gzip_rejected(status, result):
+                session["gzip"] = False
+                status, result = post_json(session, endpoint, payload, key)
+        except (OSError, http.client.HTTPException) as e:
+            error = f"{type(e).__name__}: {e}"
+            retry = True
+        else:
+            if 200 <= status < 300 and result is not None:
+                return result
+            error = f"HTTP {status}"
+            if result and isinstance(result.get("error"), str):
+                error += f": {result['error']}"
+            retry = status in RETRYABLE_STATUSES
+        if not retry or attempt == attempts:
+            print(f"Upload to {endpoint} failed: {error}", file=sys.stderr)
+            if not retry and 400 <= status < 500:
+                session["rejected"] = error
+            return None
+        delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempt - 1)) * random.uniform(0.5, 1)
+        print(f"Upload to {endpoint} failed ({error}), retrying in {delay:.1f}s", file=sys.stderr)
+        time.sleep(delay)
     return None
 
 
+def _write_queued(path: Path, entry: dict) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(entry, default=str))
+    os.replace(tmp_path, path)
+
+
+def add_to_outbox(outbox: Path, endpoint: str, payload: dict) -> Path:
+    """Queue payload for endpoint as a file in outbox, written atomically. Returns the file.
+
+    The entry gets the Idempotency-Key every attempt to send it uses, --resume included.
+    """
+    outbox.mkdir(parents=True, exist_ok=True)
+    path = outbox / f"{time.time_ns()}-{endpoint.strip('/').replace('/', '-')}.json"
+    _write_queued(path, {"endpoint": endpoint, "payload": payload, "key": str(uuid.uuid4())})
+    return path
+
+
+def queued_uploads(outbox: Path) -> list[Path]:
+    """Files queued in outbox, oldest first."""
+    return sorted(outbox.glob("*.json")) if outbox.is_dir() else []
+
+
+def send_queued(session: dict, path: Path) -> dict | None:
+    """Send one queued request and remove it from the outbox once accepted. Returns the response, or None.
+
+    An entry that cannot be read, or that the server rejected for good (see
+    send_with_retries), is renamed to *.invalid or *.rejected and {} returned, so it does
+    not block the uploads queued after it.
+    """
+    try:
+        entry = json.loads(path.read_text())
+        endpoint, payload = entry["endpoint"], entry["payload"]
+        if not entry.get("key"):
+            # Queued before entries had keys: keep one for the retries of later runs too
+            entry["key"] = str(uuid.uuid4())
+            _write_queued(path, entry)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Warning: Could not read queued upload {path}, renamed to *.invalid: {e}", file=sys.stderr)
+        path.replace(path.with_name(path.name + ".invalid"))
+        return {}
+    result = send_with_retries(session, endpoint, payload, key=entry["key"])
+    if result is not None:
+        path.unlink()
+    elif session["rejected"]:
+        print(f"Warning: The server rejected queued upload {path}, renamed to *.rejected", file=sys.stderr)
+        path.replace(path.with_name(path.name + ".rejected"))
+        return {}
+    return result
+
+
+def upload_bundle(bundle: dict, base_url: str = BASE_URL, outbox: Path = OUTBOX_DIR) -> tuple[str | None, Path | None]:
+    """Queue bundle in outbox and upload it to base_url. Returns its short ID, or None, and where it is queued.
+
+    If the upload failed but may still succeed, the bundle stays queued for --resume and
+    the second item is its file in outbox; otherwise (uploaded, rejected by the server, or
+    the outbox could not be written) it is None.
+    """
+    try:
+        path = add_to_outbox(outbox, "/api/store", bundle)
+    except OSError as e:
+        print(f"Warning: Could not queue upload in {outbox}: {e}", file=sys.stderr)
+        path = None
+    session = new_session(base_url)
+    try:
+        if path is None:
+            result = send_with_retries(session, "/api/store", bundle)
+        else:
+            result = send_queued(session, path)
+    finally:
+        close_session(session)
+    if result is None and path is not None:
+        return None, path
+    return (result.get("id") if result else None), None
+
+
+def resume_uploads(base_url: str = BASE_URL, outbox: Path = OUTBOX_DIR) -> list[str] | None:
+    """Upload everything queued in outbox, oldest first, over one connection.
+
+    Returns the short IDs of the bundles stored, or None if an upload still failed; it and
+    everything after it stay queued, in order. Bundles the server rejected are set aside
+    (see send_queued) and the rest still sent.
+    """
+    ids = []
+    session = new_session(base_url)
+    try:
+        for path in queued_uploads(outbox):
+            result = send_queued(session, path)
+            if result is None:
+                return None
+            if result.get("id"):
+                ids.append(result["id"])
+    finally:
+        close_session(session)
+    return ids
+
+
 def main():
     parser = argparse.ArgumentParser(description="Merge VibeChecked analysis results and upload")
     parser.add_argument("--dry-run", action="store_true", help="Print bundle JSON without uploading")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Only upload the bundles left in the outbox by failed uploads, oldest first",
+    )
+    parser.add_argument("--base-url", default=BASE_URL, help=f"Server to upload to (default: {BASE_URL})")
+    parser.add_argument(
+        "--outbox",
+        type=Path,
+        default=OUTBOX_DIR,
+        help=f"Directory of queued uploads (default: {OUTBOX_DIR})",
+    )
     args = parser.parse_args()
+    try:
+        new_session(args.base_url)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.resume:
+        queued = len(queued_uploads(args.outbox))
+        if not queued:
+            print(f"Nothing queued in {args.outbox}", file=sys.stderr)
+            return
+        ids = resume_uploads(args.base_url, args.outbox)
+        if ids is None:
+            remaining = len(queued_uploads(args.outbox))
+            print(f"Error: Upload failed, {remaining} of {queued} still queued for --resume", file=sys.stderr)
+            sys.exit(1)
+        for short_id in ids:
+            print(f"{args.base_url.rstrip('/')}/vibes?id={short_id}")
+        return
 
     # Load all inputs
     stats_data = load_json(STATS_FILE)
@@ -102,17 +353,29 @@ def main():
 
     # Merge into final bundle
     bundle = merge_bundle(stats_data, quotes, style, persona)
+    errors = validate_bundle(bundle)
 
     if args.dry_run:
         json.dump(bundle, sys.stdout, indent=2, default=str)
         sys.stdout.write("\n")
+
+    # Reject what the server would, before anything is sent
+    if errors:
+        print("Error: The bundle does not match the schema:", file=sys.stderr)
+        for error in errors:
+            print(f"  {error}", file=sys.stderr)
+        sys.exit(1)
+    if args.dry_run:
         return
 
     # Upload
-    short_id = upload_bundle(bundle)
+    short_id, queued_path = upload_bundle(bundle, args.base_url, args.outbox)
     if short_id:
-        url = f"{BASE_URL}/vibes?id={short_id}"
+        url = f"{args.base_url.rstrip('/')}/vibes?id={short_id}"
         print(url)
+    elif queued_path is not None:
+        print(f"Error: Upload failed, the bundle is queued in {args.outbox}: retry with --resume", file=sys.stderr)
+        sys.exit(1)
     else:
         print("Error: Upload failed", file=sys.stderr)
         sys.exit(1)